@@ -0,0 +1,216 @@
+"""Cache des résultats de CodeAnalyzer, indexé par le contenu du fichier."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".analysis_cache"
+)
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_DISK_ENTRIES = 4096
+# Une purge descend sous la limite pour ne pas se relancer à chaque écriture
+DISK_PRUNE_RATIO = 0.9
+
+_analyzer_version: Optional[str] = None
+
+
+def analyzer_version() -> str:
+    """
+    Version des règles d'analyse : empreinte du fichier code_analyzer.py.
+
+    Toute modification de l'analyseur change la version, donc les clés :
+    les anciens résultats ne sont plus jamais relus.
+    """
+    global _analyzer_version
+    if _analyzer_version is None:
+        import code_analyzer
+
+        with open(code_analyzer.__file__, "rb") as f:
+            _analyzer_version = hashlib.sha256(f.read()).hexdigest()[:16]
+    return _analyzer_version
+
+
+def make_key(
+    source_code: str, filename: str, tests_generated: int, use_ai: bool = False
+) -> str:
+    """
+    Construit la clé d'une analyse.
+
+    Args:
+        source_code: Code analysé
+        filename: Nom du fichier (son extension choisit les règles)
+        tests_generated: Nombre de tests générés (prédiction de couverture)
+        use_ai: Analyse enrichie par l'IA
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    source_hash = hashlib.sha256(source_code.encode("utf-8")).hexdigest()
+    payload = json.dumps(
+        [source_hash, analyzer_version(), filename, tests_generated, use_ai]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Cache à deux niveaux des résultats de `CodeAnalyzer.analyze_all`.
+
+    Un LRU en mémoire borné à `max_entries` sert les fichiers récents sans
+    copie ni lecture disque ; un fichier JSON par analyse les garde entre
+    deux redémarrages. Le disque est borné à `max_disk_entries` fichiers :
+    au-delà, les moins récemment lus ou écrits (date de modification, mise à
+    jour à chaque lecture disque) sont supprimés. Les résultats renvoyés sont
+    partagés : ne pas les modifier.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+    ):
+        """
+        Prépare le cache, sans rien lire sur disque.
+
+        Args:
+            directory: Dossier des fichiers JSON
+            max_entries: Nombre d'analyses gardées en mémoire
+            max_disk_entries: Nombre d'analyses gardées sur disque (0 : illimité)
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Nombre de fichiers sur disque, compté au premier put
+        self._disk_count: Optional[int] = None
+        self._disk_lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retourne l'analyse en cache, ou None."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                return value
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            # La date de modification sert d'ordre LRU pour la purge du disque
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Enregistre une analyse en mémoire et sur disque."""
+        self._remember(key, value)
+
+        path = self._path(key)
+        is_new = not os.path.exists(path)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Écriture atomique : un lecteur ne voit jamais de fichier partiel
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Analyse non sauvegardée sur disque: {e}")
+            return
+
+        if self.max_disk_entries:
+            with self._disk_lock:
+                if self._disk_count is None:
+                    self._disk_count = len(self._disk_files())
+                elif is_new:
+                    self._disk_count += 1
+                if self._disk_count > self.max_disk_entries:
+                    self._disk_count = self._prune_disk()
+
+    def _disk_files(self) -> List[Tuple[float, str]]:
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        files.append((os.stat(path).st_mtime, path))
+                    except OSError:
+                        pass
+        return files
+
+    def _prune_disk(self) -> int:
+        """Supprime les analyses les plus anciennes, retourne le nombre restant."""
+        files = sorted(self._disk_files())
+        excess = len(files) - int(self.max_disk_entries * DISK_PRUNE_RATIO)
+        removed = 0
+        for _, path in files[: max(0, excess)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return len(files) - removed
+
+    def analyze(
+        self,
+        source_code: str,
+        filename: str,
+        tests_generated: int = 1,
+        use_ai: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Retourne `CodeAnalyzer(...).analyze_all(...)`, depuis le cache si possible.
+
+        Args:
+            source_code: Code à analyser
+            filename: Nom du fichier
+            tests_generated: Nombre de tests générés
+            use_ai: Analyse enrichie par l'IA
+
+        Returns:
+            Dict: Résultats de l'analyse (partagés, en lecture seule)
+        """
+        key = make_key(source_code, filename, tests_generated, use_ai)
+        value = self.get(key)
+        if value is None:
+            from code_analyzer import CodeAnalyzer
+
+            value = CodeAnalyzer(source_code, filename, use_ai=use_ai).analyze_all(
+                tests_generated=tests_generated
+            )
+            self.put(key, value)
+        return value
+
+
+_cache: Optional[AnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Retourne le cache d'analyses partagé du processus."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache()
+        return _cache
@@ -0,0 +1,372 @@
+"""
+Base SQLite unique des analyses de code de tous les fichiers.
+
+Catégories : bugs, complexité, sécurité, couverture, performance et code smells.
+
+Remplace les six dossiers de JSON par catégorie. Utilisation hors ligne :
+
+    python analysis_store.py import-legacy          # migrer les anciens dossiers
+    python analysis_store.py analyze src/*.py       # analyser un lot de fichiers
+    python analysis_store.py query security_analysis --max-score 70
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(PROJECT_DIR, "analysis_store.sqlite3")
+
+# Catégorie -> (ancien dossier, suffixe des anciens fichiers JSON)
+CATEGORIES = {
+    "bug_analysis": ("bug_analysis", "bugs"),
+    "test_complexity": ("test_complexity", "complexity"),
+    "security_analysis": ("security_analysis", "security"),
+    "coverage_prediction": ("coverage_prediction", "coverage"),
+    "performance_analysis": ("performance_analysis", "performance"),
+    "code_smells": ("code_smells", "smells"),
+}
+
+# Préfixe des clés des analyses migrées, connues par nom de fichier seulement
+LEGACY_KEY_PREFIX = "legacy:"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    analyzer_version TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT NOT NULL REFERENCES files (key) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    score REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (key, category)
+);
+CREATE INDEX IF NOT EXISTS files_name ON files (name);
+CREATE INDEX IF NOT EXISTS analyses_category_score ON analyses (category, score);
+"""
+
+
+def source_hash(source_code: str) -> str:
+    """Empreinte SHA-256 du code source, clé des analyses d'un fichier."""
+    return hashlib.sha256(source_code.encode("utf-8")).hexdigest()
+
+
+def base_filename(filename: str) -> str:
+    """
+    Nom de base utilisé par les anciens dossiers d'analyses.
+
+    calculator.py -> calculator, Calculator.java -> Calculator_java,
+    user.service.ts -> user_service_ts
+    """
+    base_name, _, extension = filename.rpartition(".")
+    extension = extension.lower()
+    if extension == "ts":
+        return base_name.replace(".", "_") + "_ts"
+    if extension == "java":
+        return base_name + "_java"
+    return base_name
+
+
+def _score(data: Dict[str, Any]) -> Optional[float]:
+    score = data.get("score", data.get("coverage_score"))
+    return float(score) if isinstance(score, (int, float)) else None
+
+
+class AnalysisStore:
+    """
+    Analyses de tous les fichiers dans une seule base SQLite indexée.
+
+    Chaque fichier a une ligne dans `files` et une ligne par catégorie dans
+    `analyses` ; toutes les catégories d'un fichier se lisent en une requête,
+    et l'index (catégorie, score) permet de chercher à travers les fichiers.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """
+        Ouvre la base, en créant les tables si besoin.
+
+        Args:
+            db_path: Chemin de la base SQLite
+        """
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Une connexion par opération : la base est lue depuis plusieurs threads Flask
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            with conn:  # commit, ou rollback en cas d'erreur
+                yield conn
+        finally:
+            conn.close()
+
+    def is_empty(self) -> bool:
+        """Indique si la base ne contient encore aucun fichier."""
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def put(
+        self,
+        key: str,
+        name: str,
+        analyses: Dict[str, Any],
+        analyzer_version: Optional[str] = None,
+    ):
+        """
+        Enregistre (ou remplace) les analyses d'un fichier, en une transaction.
+
+        Args:
+            key: Empreinte du source (source_hash) ou clé legacy
+            name: Nom du fichier
+            analyses: Résultats par catégorie ; les autres clés sont ignorées
+            analyzer_version: Version de l'analyseur qui les a produits
+        """
+        rows = [
+            (key, category, _score(data), json.dumps(data))
+            for category, data in analyses.items()
+            if category in CATEGORIES and isinstance(data, dict)
+        ]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO files"
+                " (key, name, analyzer_version, updated_at) VALUES (?, ?, ?, ?)",
+                (key, name, analyzer_version, time.time()),
+            )
+            conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+            conn.executemany(
+                "INSERT INTO analyses (key, category, score, data) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def get(self, key: str) -> Dict[str, Any]:
+        """Retourne les catégories enregistrées pour une clé (dict vide sinon)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT category, data FROM analyses WHERE key = ?", (key,)
+            ).fetchall()
+        return {category: json.loads(data) for category, data in rows}
+
+    def lookup(
+        self,
+        filename: str,
+        source_code: Optional[str] = None,
+        analyzer_version: Optional[str] = None,
+        include_legacy: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Retourne les analyses d'un fichier, par contenu puis par nom.
+
+        Les analyses par contenu ne sont retenues que si elles viennent de
+        `analyzer_version` (toute version si None). Celles migrées des anciens
+        dossiers, sans version ni contenu, ne servent qu'en dernier recours.
+
+        Args:
+            filename: Nom du fichier uploadé
+            source_code: Son contenu, s'il est connu
+            analyzer_version: Version de l'analyseur exigée (voir analysis_cache)
+            include_legacy: Accepter les analyses migrées, connues par nom
+
+        Returns:
+            Dict: Résultats par catégorie (éventuellement incomplets)
+        """
+        keys = []
+        if source_code is not None:
+            keys.append(source_hash(source_code))
+        if include_legacy:
+            keys.append(LEGACY_KEY_PREFIX + base_filename(filename))
+        if not keys:
+            return {}
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT a.key, f.analyzer_version, a.category, a.data FROM analyses a "
+                "JOIN files f ON f.key = a.key "
+                f"WHERE a.key IN ({', '.join('?' * len(keys))})",
+                keys,
+            ).fetchall()
+
+        # Un seul aller-retour ; les analyses par contenu passent avant les anciennes
+        found: Dict[str, Dict[str, Any]] = {key: {} for key in keys}
+        for key, version, category, data in rows:
+            stale = analyzer_version is not None and version != analyzer_version
+            if key.startswith(LEGACY_KEY_PREFIX) or not stale:
+                found[key][category] = data
+        for key in keys:
+            if found[key]:
+                return {
+                    category: json.loads(data) for category, data in found[key].items()
+                }
+        return {}
+
+    def query(
+        self,
+        category: str,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Cherche à travers tous les fichiers, par catégorie et par score.
+
+        Args:
+            category: Une des CATEGORIES
+            min_score: Score minimal inclus
+            max_score: Score maximal inclus
+            limit: Nombre maximal de résultats
+
+        Returns:
+            List[Dict]: {key, name, score, data}, du score le plus bas au plus haut
+        """
+        sql = (
+            "SELECT a.key, f.name, a.score, a.data FROM analyses a "
+            "JOIN files f ON f.key = a.key WHERE a.category = ?"
+        )
+        params: List[Any] = [category]
+        if min_score is not None:
+            sql += " AND a.score >= ?"
+            params.append(min_score)
+        if max_score is not None:
+            sql += " AND a.score <= ?"
+            params.append(max_score)
+        sql += " ORDER BY a.score LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [
+            {"key": key, "name": name, "score": score, "data": json.loads(data)}
+            for key, name, score, data in rows
+        ]
+
+    def import_legacy(self, root: str = PROJECT_DIR) -> int:
+        """
+        Migre les six anciens dossiers de JSON (un fichier par catégorie).
+
+        Args:
+            root: Répertoire contenant bug_analysis/, code_smells/, etc.
+
+        Returns:
+            int: Nombre de fichiers sources importés
+        """
+        by_base: Dict[str, Dict[str, Any]] = {}
+        for category, (folder, suffix) in CATEGORIES.items():
+            directory = os.path.join(root, folder)
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                ending = f"_{suffix}.json"
+                if not entry.name.endswith(ending):
+                    continue
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    by_base.setdefault(entry.name[: -len(ending)], {})[
+                        category
+                    ] = json.load(f)
+
+        for base, analyses in by_base.items():
+            self.put(LEGACY_KEY_PREFIX + base, base, analyses)
+        return len(by_base)
+
+    def analyze_files(self, paths: Iterable[str], tests_generated: int = 1) -> int:
+        """
+        Analyse un lot de fichiers avec CodeAnalyzer et enregistre les résultats.
+
+        Args:
+            paths: Fichiers sources
+            tests_generated: Nombre de tests supposé pour la prédiction de couverture
+
+        Returns:
+            int: Nombre de fichiers analysés
+        """
+        from analysis_cache import analyzer_version
+        from code_analyzer import CodeAnalyzer
+
+        version = analyzer_version()
+        count = 0
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                source_code = f.read()
+            name = os.path.basename(path)
+            results = CodeAnalyzer(source_code, name).analyze_all(
+                tests_generated=tests_generated
+            )
+            self.put(source_hash(source_code), name, results, version)
+            count += 1
+        return count
+
+
+_store: Optional[AnalysisStore] = None
+_store_lock = threading.Lock()
+
+
+def get_analysis_store() -> AnalysisStore:
+    """
+    Retourne la base d'analyses partagée du processus.
+
+    À la première ouverture d'une base vide, les anciens dossiers de JSON
+    sont migrés automatiquement.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AnalysisStore()
+            if _store.is_empty():
+                _store.import_legacy()
+        return _store
+
+
+def main(argv: Optional[List[str]] = None):
+    """Point d'entrée en ligne de commande : import-legacy, analyze, query."""
+    parser = argparse.ArgumentParser(description="Base d'analyses de code")
+    parser.add_argument(
+        "--db", default=DEFAULT_DB_PATH, help="Chemin de la base SQLite"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    legacy = commands.add_parser(
+        "import-legacy", help="Migrer les anciens dossiers JSON"
+    )
+    legacy.add_argument(
+        "--root", default=PROJECT_DIR, help="Répertoire des anciens dossiers"
+    )
+
+    analyze = commands.add_parser("analyze", help="Analyser un lot de fichiers")
+    analyze.add_argument("paths", nargs="+", help="Fichiers sources")
+    analyze.add_argument("--tests-generated", type=int, default=1)
+
+    query = commands.add_parser("query", help="Chercher à travers les fichiers")
+    query.add_argument("category", choices=sorted(CATEGORIES))
+    query.add_argument("--min-score", type=float)
+    query.add_argument("--max-score", type=float)
+    query.add_argument("--limit", type=int, default=100)
+
+    args = parser.parse_args(argv)
+    store = AnalysisStore(args.db)
+
+    if args.command == "import-legacy":
+        print(
+            f"✅ {store.import_legacy(args.root)} fichier(s) importé(s) dans {args.db}"
+        )
+    elif args.command == "analyze":
+        count = store.analyze_files(args.paths, args.tests_generated)
+        print(f"✅ {count} fichier(s) analysé(s)")
+    else:
+        for row in store.query(
+            args.category, args.min_score, args.max_score, args.limit
+        ):
+            print(f"{row['score']:>6}  {row['name']}  ({row['key'][:12]})")
+
+
+if __name__ == "__main__":
+    main()
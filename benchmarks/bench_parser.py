@@ -0,0 +1,74 @@
+"""Measure the time spent extracting functions from large modules.
+
+Usage:
+    python benchmarks/bench_parser.py --classes 20 --methods 50
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from ut.parser import source_code_analysis
+
+
+def make_module(classes: int, methods: int) -> str:
+    """Build the source of a synthetic module.
+
+    Args:
+        classes (int): Number of classes in the module.
+        methods (int): Number of methods in each class.
+
+    Returns:
+        str: The module source.
+    """
+    lines = ["import os", "from typing import Optional", ""]
+    for c in range(classes):
+        lines.append(f"class Service{c}:")
+        lines.append(f'    """Service number {c}."""')
+        for m in range(methods):
+            lines.append(f"    def method_{m}(self, x: int) -> Optional[int]:")
+            lines.append(f'        """Return x plus {m}."""')
+            lines.append(f"        return x + {m} if os.sep else None")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def run(classes: int, methods: int, repeat: int) -> float:
+    """Analyze a synthetic module and return the best time in seconds.
+
+    Args:
+        classes (int): Number of classes in the module.
+        methods (int): Number of methods in each class.
+        repeat (int): Number of measured runs.
+
+    Returns:
+        float: The fastest run.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "module.py"
+        path.write_text(make_module(classes, methods), encoding="utf-8")
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            source_code_analysis(str(path))
+            timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    """Print the analysis time for modules of increasing size."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=20)
+    parser.add_argument("--methods", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for methods in (args.methods // 5, args.methods // 2, args.methods):
+        elapsed = run(args.classes, methods, args.repeat)
+        functions = args.classes * methods
+        print(f"functions={functions:>6}  {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Measure generation throughput with the offline fake provider.
+
+Usage:
+    python benchmarks/bench_providers.py --prompts 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from ut.providers import FakeProvider
+
+
+def run(prompts: int, latency: float, concurrency: int) -> float:
+    """Generate `prompts` responses and return the throughput in calls/s.
+
+    Args:
+        prompts (int): Number of prompts to send.
+        latency (float): Simulated latency of each call, in seconds.
+        concurrency (int): Maximum number of calls in flight.
+
+    Returns:
+        float: The measured throughput.
+    """
+    provider = FakeProvider(latency=latency)
+    batch = [f"def func_{i}(x):\n    return x" for i in range(prompts)]
+
+    start = time.perf_counter()
+    asyncio.run(provider.generate_many(batch, max_concurrency=concurrency))
+    return prompts / (time.perf_counter() - start)
+
+
+def main():
+    """Print the throughput for increasing concurrency levels."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    for concurrency in (1, 4, 16, 64):
+        throughput = run(args.prompts, args.latency, concurrency)
+        print(f"concurrency={concurrency:>3}  {throughput:8.1f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
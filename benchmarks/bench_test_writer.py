@@ -0,0 +1,111 @@
+"""Measure the extraction and appending of tests on large test files.
+
+Usage:
+    python benchmarks/bench_test_writer.py --lines 5000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from ut.test_writer import (
+    _extract_imports_and_functions_tolerant,
+    _recombine_test_file,
+    append_test_to_file,
+    extract_imports_and_functions,
+)
+
+NEW_TEST = "import os\n\n\ndef test_new():\n    assert os.sep\n"
+
+
+def make_test_file(lines: int) -> str:
+    """Build a synthetic test file of about `lines` lines.
+
+    Args:
+        lines (int): The approximate number of lines.
+
+    Returns:
+        str: The test file source.
+    """
+    parts = ["import pytest", "from mymod import (\n    add,\n    sub,\n)", ""]
+    for i in range(lines // 6):
+        parts.append(f"def test_add_{i}():")
+        parts.append(f"    # Arrange\n    x = {i}")
+        parts.append(f"    assert add(x, 1) == {i + 1}")
+        parts.append("\n")
+    return "\n".join(parts)
+
+
+def run(extract, code: str, repeat: int) -> float:
+    """Return the best extraction time in seconds.
+
+    Args:
+        extract (Callable): The extraction function.
+        code (str): The test file source.
+        repeat (int): Number of measured runs.
+
+    Returns:
+        float: The fastest run.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(code)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_append(append, code: str, repeat: int) -> float:
+    """Return the best time to append one test to a test file, in seconds.
+
+    Args:
+        append (Callable): Appends NEW_TEST to the file at the given path.
+        code (str): The initial test file source.
+        repeat (int): Number of measured runs.
+
+    Returns:
+        float: The fastest run.
+    """
+    timings = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "test_mymod.py"
+        for _ in range(repeat):
+            path.write_text(code, encoding="utf-8")
+            start = time.perf_counter()
+            append(path)
+            timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    """Compare the extractors, then splicing a test with rebuilding the file."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    code = make_test_file(args.lines)
+    print(f"lines={code.count(chr(10)) + 1}")
+    for label, extract in (
+        ("ast", extract_imports_and_functions),
+        ("line scanner", _extract_imports_and_functions_tolerant),
+    ):
+        elapsed = run(extract, code, args.repeat)
+        print(f"extract  {label:>12}  {elapsed * 1000:8.1f} ms")
+
+    new_imports, new_functions = extract_imports_and_functions(NEW_TEST)
+    for label, append in (
+        ("splice", lambda path: append_test_to_file(path, NEW_TEST, "new")),
+        (
+            "recombine",
+            lambda path: _recombine_test_file(
+                path, path.read_text(encoding="utf-8"), new_imports, new_functions
+            ),
+        ),
+    ):
+        elapsed = run_append(append, code, args.repeat)
+        print(f"append   {label:>12}  {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
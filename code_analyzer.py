@@ -7,7 +7,7 @@ from typing import Dict, List, Any, Optional
 
 # Import Ollama pour IA
 try:
-    from ollama_client import OllamaClient
+    from ollama_client import get_client
     OLLAMA_AVAILABLE = True
 except ImportError:
     OLLAMA_AVAILABLE = False
@@ -22,7 +22,7 @@ class CodeAnalyzer:
         self.extension = filename.split('.')[-1].lower()
         self.lines = source_code.split('\n')
         self.use_ai = use_ai and OLLAMA_AVAILABLE
-        self.ollama = OllamaClient(model="phi") if self.use_ai else None
+        self.ollama = get_client(model="phi") if self.use_ai else None
         self.is_interface = self._detect_interface()
     
     def _detect_interface(self) -> bool:
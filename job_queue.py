@@ -0,0 +1,291 @@
+"""File de tâches en arrière-plan pour l'interface web, persistée dans SQLite."""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 32
+# Les tâches terminées (et leurs événements) sont supprimées après ce délai
+DEFAULT_RETENTION = 7 * 24 * 3600
+PURGE_INTERVAL = 3600
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_job ON events (job_id, id);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+# handler(payload, emit) -> résultat JSON ; emit(stage, data) publie un événement
+Emit = Callable[[str, dict], None]
+Handler = Callable[[dict, Emit], dict]
+# on_purge(payload) libère les ressources d'une tâche purgée (fichiers, ...)
+PurgeHook = Callable[[dict], None]
+
+
+class QueueFullError(Exception):
+    """Levée quand trop de tâches attendent déjà d'être exécutées."""
+
+
+class JobQueue:
+    """
+    Exécute les tâches sur un pool borné de threads et les suit dans SQLite.
+
+    Chaque tâche a une ligne dans `jobs` (statut, étape, résultat) et une suite
+    d'événements dans `events`, lus par l'endpoint de suivi et le flux SSE.
+    Les tâches non terminées au démarrage (serveur arrêté en cours de route)
+    sont remises en file. Les tâches terminées depuis plus de `retention`
+    secondes sont purgées avec leurs événements, au démarrage puis au plus
+    une fois par PURGE_INTERVAL.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        handler: Handler,
+        workers: int = DEFAULT_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        retention: float = DEFAULT_RETENTION,
+        on_purge: Optional[PurgeHook] = None,
+    ):
+        """
+        Ouvre (ou crée) la base et reprend les tâches interrompues.
+
+        Args:
+            db_path: Chemin de la base SQLite
+            handler: Fonction exécutant une tâche
+            workers: Nombre de tâches exécutées en parallèle
+            max_pending: Nombre maximal de tâches en attente ou en cours
+            retention: Durée de conservation des tâches terminées, en secondes
+            on_purge: Appelée avec le payload de chaque tâche purgée
+        """
+        self.db_path = db_path
+        self.handler = handler
+        self.max_pending = max_pending
+        self.retention = retention
+        self.on_purge = on_purge
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_purge = 0.0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="job"
+        )
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+        self.purge()
+        self._recover()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Une connexion par opération : sqlite3 n'aime pas le partage entre threads
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:  # commit, ou rollback en cas d'erreur
+                yield conn
+        finally:
+            conn.close()
+
+    def _recover(self):
+        """Remet en file les tâches interrompues par un arrêt du serveur."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (STATUS_QUEUED, STATUS_RUNNING),
+            ).fetchall()
+        # Les tâches reprises comptent dans `max_pending`, même au-delà
+        with self._lock:
+            self._pending += len(rows)
+        for row in rows:
+            self._emit(
+                row["id"], STATUS_QUEUED, {"message": "Tâche reprise après redémarrage"}
+            )
+            self._schedule(row["id"])
+
+    def _schedule(self, job_id: str):
+        # La place dans `_pending` a déjà été réservée par l'appelant
+        self._executor.submit(self._run, job_id)
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id)
+            )
+
+    def _emit(self, job_id: str, stage: str, data: Optional[dict] = None):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO events (job_id, stage, data, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (job_id, stage, json.dumps(data or {}), now),
+            )
+            conn.execute(
+                "UPDATE jobs SET stage = ?, updated_at = ? WHERE id = ?",
+                (stage, now, job_id),
+            )
+
+    def _run(self, job_id: str):
+        try:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                return
+
+            def emit(stage: str, data: Optional[dict] = None) -> None:
+                self._emit(job_id, stage, data)
+
+            self._update(job_id, status=STATUS_RUNNING)
+            self._emit(job_id, STATUS_RUNNING)
+            try:
+                result = self.handler(job["payload"], emit)
+            except Exception as e:
+                self._update(job_id, status=STATUS_FAILED, error=str(e))
+                self._emit(job_id, STATUS_FAILED, {"error": str(e)})
+                return
+
+            self._update(job_id, status=STATUS_DONE, result=json.dumps(result))
+            self._emit(job_id, STATUS_DONE)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                purge_due = time.time() - self._last_purge >= PURGE_INTERVAL
+            if purge_due:
+                self.purge()
+
+    def submit(self, payload: dict) -> str:
+        """
+        Enregistre une tâche et la met en file.
+
+        Args:
+            payload: Paramètres JSON transmis au handler
+
+        Returns:
+            Identifiant de la tâche
+
+        Raises:
+            QueueFullError: Si `max_pending` tâches attendent déjà
+        """
+        # Vérification et réservation sous le même verrou : deux requêtes
+        # simultanées ne peuvent pas dépasser `max_pending`
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError("Trop de tâches en attente, réessayez plus tard")
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO jobs (id, status, payload, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (job_id, STATUS_QUEUED, json.dumps(payload), now, now),
+                )
+            self._emit(job_id, STATUS_QUEUED)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        self._schedule(job_id)
+        return job_id
+
+    def purge(self) -> int:
+        """
+        Supprime les tâches terminées depuis plus de `retention` secondes.
+
+        Les événements des tâches supprimées le sont dans la même transaction,
+        puis `on_purge` est appelée pour chacune.
+
+        Returns:
+            Nombre de tâches supprimées
+        """
+        now = time.time()
+        with self._lock:
+            self._last_purge = now
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, payload FROM jobs"
+                " WHERE status IN (?, ?) AND updated_at < ?",
+                (*FINISHED_STATUSES, now - self.retention),
+            ).fetchall()
+            ids = [(row["id"],) for row in rows]
+            conn.executemany("DELETE FROM events WHERE job_id = ?", ids)
+            conn.executemany("DELETE FROM jobs WHERE id = ?", ids)
+
+        if self.on_purge is not None:
+            for row in rows:
+                try:
+                    self.on_purge(json.loads(row["payload"]))
+                except Exception as e:
+                    print(f"⚠️  Nettoyage de la tâche {row['id']} impossible: {e}")
+        return len(rows)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Retourne l'état d'une tâche, ou None si elle n'existe pas."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "stage": row["stage"],
+            "payload": json.loads(row["payload"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def events(self, job_id: str, after: int = 0) -> List[Dict]:
+        """Retourne les événements d'une tâche postérieurs à l'événement `after`."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, stage, data, created_at FROM events"
+                " WHERE job_id = ? AND id > ? ORDER BY id",
+                (job_id, after),
+            ).fetchall()
+        return [
+            {
+                "id": row["id"],
+                "stage": row["stage"],
+                "data": json.loads(row["data"]),
+                "time": row["created_at"],
+            }
+            for row in rows
+        ]
+
+    def shutdown(self, wait: bool = True):
+        """Arrête le pool ; les tâches non terminées reprennent au redémarrage."""
+        self._executor.shutdown(wait=wait)
@@ -1,48 +1,319 @@
 """Client IA gratuit utilisant Ollama (IA locale)."""
 import requests
 import json
-from typing import Optional
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+# Surveillance de disponibilité : durée de validité du dernier test, nombre
+# d'échecs consécutifs avant d'ouvrir le disjoncteur et durée d'ouverture
+HEALTH_TTL = 30.0
+HEALTH_PROBE_TIMEOUT = 2
+HEALTH_FAILURE_THRESHOLD = 3
+HEALTH_COOLDOWN = 30.0
+
+# Sessions HTTP, moniteurs et clients partagés dans tout le processus
+_sessions: Dict[str, requests.Session] = {}
+_monitors: Dict[str, "OllamaHealthMonitor"] = {}
+_clients: Dict[Tuple[str, str], "OllamaClient"] = {}
+_registry_lock = threading.Lock()
+
+
+def _create_session(
+    pool_size: int, max_retries: int, backoff_factor: float
+) -> requests.Session:
+    """Crée une session avec pool de connexions keep-alive et retry/backoff."""
+    # Les erreurs de connexion ne sont pas relancées : un serveur arrêté doit
+    # échouer tout de suite. On relance seulement 429/5xx (Ollama occupé).
+    retry = Retry(
+        total=max_retries,
+        connect=0,
+        read=0,  # Ne pas relancer une génération déjà en cours côté serveur
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(
+    base_url: str = DEFAULT_BASE_URL,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+) -> requests.Session:
+    """
+    Retourne la session HTTP partagée pour un serveur Ollama.
+
+    La session est créée au premier appel ; les paramètres du pool ne sont
+    pris en compte qu'à ce moment-là.
+
+    Args:
+        base_url: URL de l'API Ollama
+        pool_size: Nombre de connexions gardées ouvertes
+        max_retries: Nombre de tentatives sur réponse 429/5xx (les erreurs de
+            connexion ne sont pas relancées, un serveur arrêté échoue tout de suite)
+        backoff_factor: Facteur du backoff exponentiel entre les tentatives
+
+    Returns:
+        requests.Session: La session partagée
+    """
+    with _registry_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = _create_session(pool_size, max_retries, backoff_factor)
+            _sessions[base_url] = session
+        return session
+
+
+class OllamaHealthMonitor:
+    """
+    Surveille la disponibilité d'un serveur Ollama.
+
+    Le résultat du dernier test (GET /api/tags) est gardé en cache pendant
+    `ttl` secondes puis rafraîchi en arrière-plan, sans bloquer l'appelant.
+    Après `failure_threshold` échecs consécutifs (tests ou générations), le
+    disjoncteur s'ouvre : le serveur est considéré indisponible sans aucun
+    appel réseau pendant `cooldown` secondes, puis un nouveau test est tenté.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        session: Optional[requests.Session] = None,
+        ttl: float = HEALTH_TTL,
+        failure_threshold: int = HEALTH_FAILURE_THRESHOLD,
+        cooldown: float = HEALTH_COOLDOWN,
+        probe_timeout: float = HEALTH_PROBE_TIMEOUT,
+    ):
+        """
+        Initialise le moniteur et lance le premier test en arrière-plan.
+
+        Args:
+            base_url: URL de l'API Ollama
+            session: Session HTTP (par défaut la session partagée du serveur)
+            ttl: Durée de validité du dernier test, en secondes
+            failure_threshold: Échecs consécutifs avant d'ouvrir le disjoncteur
+            cooldown: Durée d'ouverture du disjoncteur, en secondes
+            probe_timeout: Timeout d'un test, en secondes
+        """
+        self.base_url = base_url
+        self.session = session or get_session(base_url)
+        self.ttl = ttl
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+
+        self._available: Optional[bool] = None
+        self._checked_at = 0.0
+        self._failures = 0
+        self._open_until = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Levé dès que le premier résultat (test ou appel) est connu
+        self._known = threading.Event()
+
+        # Premier test lancé tout de suite, sans bloquer le constructeur
+        self._refresh_in_background()
+
+    @property
+    def circuit_open(self) -> bool:
+        """Indique si le disjoncteur est ouvert (échec immédiat)."""
+        return time.monotonic() < self._open_until
+
+    def record_success(self):
+        """Enregistre un appel réussi et referme le disjoncteur."""
+        with self._lock:
+            self._available = True
+            self._checked_at = time.monotonic()
+            self._failures = 0
+            self._open_until = 0.0
+        self._known.set()
+
+    def record_failure(self):
+        """Enregistre un échec ; ouvre le disjoncteur au-delà du seuil."""
+        with self._lock:
+            now = time.monotonic()
+            self._available = False
+            self._checked_at = now
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._open_until = now + self.cooldown
+        self._known.set()
+
+    def probe(self) -> bool:
+        """Test immédiat (bloquant) du serveur, qui met à jour l'état."""
+        try:
+            response = self.session.get(
+                f"{self.base_url}/api/tags", timeout=self.probe_timeout
+            )
+            healthy = response.status_code == 200
+        except requests.RequestException:
+            healthy = False
+
+        if healthy:
+            self.record_success()
+        else:
+            self.record_failure()
+        return healthy
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self.probe()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=_run, name="ollama-health-refresh", daemon=True).start()
+
+    def is_available(self) -> bool:
+        """
+        Retourne la disponibilité connue du serveur.
+
+        Le premier test part dès la construction du moniteur. Tant qu'il n'a
+        pas répondu, les appelants attendent tous ce même test (au plus
+        `probe_timeout` secondes) au lieu d'en lancer chacun un. Ensuite la
+        valeur en cache est renvoyée immédiatement et rafraîchie en
+        arrière-plan quand elle a expiré.
+        """
+        if not self._known.is_set():
+            self._refresh_in_background()
+            self._known.wait(self.probe_timeout)
+            return bool(self._available)
+
+        now = time.monotonic()
+        if now < self._open_until:
+            return False
+
+        expired = now - self._checked_at > self.ttl
+        if expired or self._failures >= self.failure_threshold:
+            # Entrée expirée, ou disjoncteur à refermer (semi-ouvert) :
+            # un seul test à la fois
+            self._refresh_in_background()
+
+        return bool(self._available)
+
+    def start(self, interval: Optional[float] = None):
+        """Démarre un thread qui rafraîchit l'état toutes les `interval` secondes."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        interval = interval or self.ttl
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(interval):
+                if not self.circuit_open:
+                    self.probe()
+
+        self._thread = threading.Thread(target=_loop, name="ollama-health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête le rafraîchissement périodique."""
+        self._stop.set()
+
+
+def get_health_monitor(base_url: str = DEFAULT_BASE_URL) -> OllamaHealthMonitor:
+    """
+    Retourne le moniteur de disponibilité partagé pour un serveur Ollama.
+
+    Le moniteur est créé au premier appel, avec son rafraîchissement périodique.
+
+    Args:
+        base_url: URL de l'API Ollama
+
+    Returns:
+        OllamaHealthMonitor: Le moniteur partagé
+    """
+    session = get_session(base_url)
+    with _registry_lock:
+        monitor = _monitors.get(base_url)
+        if monitor is None:
+            monitor = OllamaHealthMonitor(base_url, session)
+            monitor.start()
+            _monitors[base_url] = monitor
+        return monitor
+
+
+class OllamaUnavailableError(RuntimeError):
+    """Levée quand un flux est demandé alors qu'Ollama est injoignable."""
+
 
 class OllamaClient:
     """Client pour interagir avec Ollama (IA locale gratuite)."""
-    
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3"):
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        model: str = "llama3",
+        session: Optional[requests.Session] = None,
+        health: Optional[OllamaHealthMonitor] = None,
+    ):
         """
-        Initialise le client Ollama.
-        
+        Initialise le client Ollama (sans appel réseau).
+
         Args:
             base_url: URL de l'API Ollama (par défaut localhost:11434)
             model: Modèle à utiliser (llama3, phi, codellama, etc.)
+            session: Session HTTP à utiliser (par défaut la session partagée du serveur)
+            health: Moniteur de disponibilité (par défaut le moniteur partagé
+                du serveur)
         """
         self.base_url = base_url
         self.model = model
-        self.available = self._check_availability()
-    
-    def _check_availability(self) -> bool:
-        """Vérifie si Ollama est disponible."""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
-            return response.status_code == 200
-        except:
-            return False
-    
-    def generate(self, prompt: str, temperature: float = 0.3, max_tokens: int = 2048) -> Optional[str]:
+        self.session = session or get_session(base_url)
+        self.health = health or get_health_monitor(base_url)
+
+    @property
+    def available(self) -> bool:
+        """Indique si Ollama est disponible (en cache, voir OllamaHealthMonitor)."""
+        return self.health.is_available()
+
+    def generate(
+        self, prompt: str, temperature: float = 0.3, max_tokens: int = 2048
+    ) -> Optional[str]:
         """
         Génère du contenu avec Ollama.
-        
+
         Args:
             prompt: Le prompt à envoyer à l'IA
             temperature: Température de génération (0.0-1.0)
             max_tokens: Nombre maximum de tokens
-            
+
         Returns:
             str: La réponse générée ou None si erreur
         """
         if not self.available:
             return None
-        
+
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
                 json={
                     "model": self.model,
@@ -55,23 +326,92 @@ class OllamaClient:
                 },
                 timeout=120  # 2 minutes timeout pour génération complexe
             )
-            
+
             if response.status_code == 200:
+                self.health.record_success()
                 return response.json()["response"]
             else:
+                if response.status_code >= 500:
+                    self.health.record_failure()
                 return None
         except Exception as e:
+            if isinstance(e, requests.ConnectionError):
+                self.health.record_failure()
             print(f"❌ Erreur Ollama: {e}")
             return None
-    
-    def explain_code(self, code: str, language: str = "java") -> str:
+
+    def generate_stream(
+        self, prompt: str, temperature: float = 0.3, max_tokens: int = 2048
+    ) -> Iterator[str]:
+        """
+        Génère du contenu avec Ollama en renvoyant les tokens au fil de l'eau.
+
+        Fermer le générateur (ex: client déconnecté) ferme la connexion,
+        ce qui interrompt la génération côté Ollama.
+
+        Args:
+            prompt: Le prompt à envoyer à l'IA
+            temperature: Température de génération (0.0-1.0)
+            max_tokens: Nombre maximum de tokens
+
+        Yields:
+            str: Les morceaux de texte dans l'ordre de génération
+
+        Raises:
+            OllamaUnavailableError: Si Ollama n'est pas joignable
+        """
+        if not self.available:
+            raise OllamaUnavailableError(
+                f"❌ Ollama non disponible sur {self.base_url}"
+            )
+
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": True,
+                    "options": {
+                        "temperature": temperature,
+                        "num_predict": max_tokens
+                    }
+                },
+                stream=True,
+                # Connexion rapide, puis 2 minutes max entre deux tokens
+                timeout=(5, 120),
+            )
+        except requests.ConnectionError:
+            self.health.record_failure()
+            raise
+
+        try:
+            if response.status_code >= 500:
+                self.health.record_failure()
+            response.raise_for_status()
+            self.health.record_success()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+        finally:
+            response.close()
+
+    def explain_code(
+        self, code: str, language: str = "java", stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Explique le code fourni.
-        
+
         Args:
             code: Le code source à expliquer
             language: Le langage du code
-            
+            stream: Renvoyer un itérateur de tokens au lieu du texte complet
+
         Returns:
             str: L'explication générée
         """
@@ -88,17 +428,23 @@ Fournis:
 
 Sois concis et technique."""
 
+        if stream:
+            return self.generate_stream(prompt, temperature=0.2)
+
         response = self.generate(prompt, temperature=0.2)
         return response if response else "❌ Ollama non disponible. Installez Ollama: https://ollama.com"
-    
-    def detect_bugs(self, code: str, language: str = "java") -> str:
+
+    def detect_bugs(
+        self, code: str, language: str = "java", stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Détecte les bugs potentiels dans le code.
-        
+
         Args:
             code: Le code source à analyser
             language: Le langage du code
-            
+            stream: Renvoyer un itérateur de tokens au lieu du texte complet
+
         Returns:
             str: Les bugs détectés
         """
@@ -116,17 +462,23 @@ Liste uniquement les bugs RÉELS (pas de faux positifs):
 
 Format: Bug → Impact → Solution"""
 
+        if stream:
+            return self.generate_stream(prompt, temperature=0.1)
+
         response = self.generate(prompt, temperature=0.1)
         return response if response else "❌ Ollama non disponible"
-    
-    def improve_tests(self, test_code: str, language: str = "java") -> str:
+
+    def improve_tests(
+        self, test_code: str, language: str = "java", stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Suggère des améliorations pour les tests unitaires.
-        
+
         Args:
             test_code: Le code de test à améliorer
             language: Le langage du code
-            
+            stream: Renvoyer un itérateur de tokens au lieu du texte complet
+
         Returns:
             str: Les suggestions d'amélioration
         """
@@ -144,17 +496,23 @@ Suggère:
 
 Sois concret avec des exemples."""
 
+        if stream:
+            return self.generate_stream(prompt, temperature=0.3)
+
         response = self.generate(prompt, temperature=0.3)
         return response if response else "❌ Ollama non disponible"
-    
-    def add_edge_cases(self, code: str, language: str = "java") -> str:
+
+    def add_edge_cases(
+        self, code: str, language: str = "java", stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Identifie les cas limites à tester.
-        
+
         Args:
             code: Le code source à analyser
             language: Le langage du code
-            
+            stream: Renvoyer un itérateur de tokens au lieu du texte complet
+
         Returns:
             str: Les cas limites identifiés
         """
@@ -173,19 +531,45 @@ Liste les cas limites à tester:
 
 Format: Cas limite → Pourquoi important → Assertion suggérée"""
 
+        if stream:
+            return self.generate_stream(prompt, temperature=0.2)
+
         response = self.generate(prompt, temperature=0.2)
         return response if response else "❌ Ollama non disponible"
 
 
+def get_client(model: str = "llama3", base_url: str = DEFAULT_BASE_URL) -> OllamaClient:
+    """
+    Retourne le client partagé pour un modèle (registre global au processus).
+
+    Les analyses successives réutilisent ainsi les connexions déjà ouvertes.
+
+    Args:
+        model: Modèle à utiliser
+        base_url: URL de l'API Ollama
+
+    Returns:
+        OllamaClient: Le client partagé
+    """
+    key = (base_url, model)
+    with _registry_lock:
+        client = _clients.get(key)
+    if client is None:
+        client = OllamaClient(base_url=base_url, model=model)
+        with _registry_lock:
+            client = _clients.setdefault(key, client)
+    return client
+
+
 def get_ai_client():
     """
     Retourne un client IA (Ollama si disponible, sinon message).
-    
+
     Returns:
         OllamaClient: Le client IA
     """
-    client = OllamaClient()
-    
+    client = get_client()
+
     if client.available:
         print("✅ Ollama détecté - IA gratuite activée")
         return client
@@ -198,7 +582,7 @@ def get_ai_client():
 if __name__ == "__main__":
     # Test du client
     client = get_ai_client()
-    
+
     if client.available:
         print("\n🧪 Test: Explication de code")
         code = """
@@ -206,5 +590,6 @@ public int add(int a, int b) {
     return a + b;
 }
 """
-        explanation = client.explain_code(code, "java")
-        print(explanation)
+        for token in client.explain_code(code, "java", stream=True):
+            print(token, end="", flush=True)
+        print()
@@ -0,0 +1,272 @@
+"""Pool de processus pytest pré-importés pour exécuter les tests générés."""
+import io
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Dict, Optional
+
+from result_collector import ResultCollector, build_report
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_TIMEOUT = 30.0
+PYTEST_ARGS = ["-v", "--tb=short", "-p", "no:cacheprovider"]
+# Sans fork, un worker exécute les tests lui-même et est remplacé après ce
+# nombre d'exécutions
+MAX_RUNS_PER_WORKER = 20
+
+# Chaque exécution a lieu dans un enfant forké du worker, jeté ensuite
+CAN_FORK = hasattr(os, "fork")
+
+# Processus lancés en "spawn" : pas d'état hérité du serveur (threads, sockets)
+_context = multiprocessing.get_context("spawn")
+
+
+def _failed_run(output: str, duration: float = 0.0, timed_out: bool = False) -> Dict:
+    """Résultat d'une exécution qui n'a pas pu aller au bout."""
+    report = build_report([], output, duration)
+    report.update(exit_code=-1, timed_out=timed_out)
+    return report
+
+
+def _run_pytest(test_path: str, cwd: str) -> Dict:
+    """
+    Exécute pytest dans le processus courant et restaure l'état global modifié.
+
+    Seuls sys.path, sys.modules, os.environ et le répertoire courant sont
+    restaurés : les attributs modifiés sur des modules gardés, les threads ou
+    les fichiers ouverts par les tests restent dans le processus.
+    """
+    import pytest
+
+    collector = ResultCollector()
+    output = io.StringIO()
+    saved_path = list(sys.path)
+    saved_modules = set(sys.modules)
+    saved_environ = dict(os.environ)
+    saved_cwd = os.getcwd()
+    start = time.perf_counter()
+    try:
+        os.chdir(cwd)
+        with redirect_stdout(output), redirect_stderr(output):
+            exit_code = pytest.main([test_path, *PYTEST_ARGS], plugins=[collector])
+    finally:
+        # Les modules testés changent d'un upload à l'autre : ne rien garder en cache
+        for name in set(sys.modules) - saved_modules:
+            del sys.modules[name]
+        sys.path[:] = saved_path
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        os.chdir(saved_cwd)
+
+    report = build_report(
+        collector.tests, output.getvalue(), time.perf_counter() - start
+    )
+    report.update(exit_code=int(exit_code), timed_out=False)
+    return report
+
+
+def _run_pytest_forked(test_path: str, cwd: str) -> Dict:
+    """Exécute pytest dans un enfant forké : rien de son état ne revient au worker."""
+    parent_conn, child_conn = _context.Pipe(duplex=False)
+    pid = os.fork()
+    if pid == 0:
+        parent_conn.close()
+        try:
+            result = _run_pytest(test_path, cwd)
+        except BaseException as e:  # SystemExit/KeyboardInterrupt d'un test compris
+            result = _failed_run(f"Erreur du worker pytest: {e!r}")
+        try:
+            child_conn.send(result)
+        finally:
+            # Pas de atexit ni de vidage des tampons hérités du worker
+            os._exit(0)
+
+    child_conn.close()
+    try:
+        return parent_conn.recv()
+    except EOFError:
+        return _failed_run("Le processus de test s'est arrêté sans résultat")
+    finally:
+        parent_conn.close()
+        os.waitpid(pid, 0)
+
+
+def _worker_main(conn):
+    """Boucle d'un processus du pool : reçoit un chemin de test, renvoie le résultat."""
+    import pytest  # noqa: F401  (import coûteux fait une seule fois)
+
+    if CAN_FORK:
+        # Groupe de processus propre : tuer le worker tue aussi l'enfant en cours
+        os.setpgrp()
+
+    conn.send("ready")
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+
+        test_path, cwd = request
+        try:
+            if CAN_FORK:
+                result = _run_pytest_forked(test_path, cwd)
+            else:
+                result = _run_pytest(test_path, cwd)
+        except BaseException as e:  # SystemExit/KeyboardInterrupt d'un test compris
+            result = _failed_run(f"Erreur du worker pytest: {e!r}")
+        conn.send(result)
+
+
+class _Worker:
+    """Un processus pytest et l'extrémité parent de son pipe."""
+
+    def __init__(self):
+        self.conn, child_conn = _context.Pipe()
+        self.process = _context.Process(
+            target=_worker_main, args=(child_conn,), name="pytest-worker", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.runs = 0
+
+    def wait_ready(self, timeout: float) -> bool:
+        if not self.ready and self.conn.poll(timeout):
+            self.ready = self.conn.recv() == "ready"
+        return self.ready
+
+    def kill(self):
+        if CAN_FORK:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+
+class PytestPool:
+    """
+    Processus pytest démarrés à l'avance, réutilisés d'une exécution à l'autre.
+
+    Chaque worker importe pytest une seule fois, puis exécute les fichiers de
+    test reçus par pipe, chacun dans un enfant forké qui est jeté ensuite :
+    le code uploadé suivant repart de l'état du worker juste après l'import.
+    Sans fork (Windows), le worker exécute les tests lui-même et restaure
+    seulement une partie de son état (voir `_run_pytest`) ; il est alors
+    remplacé toutes les `MAX_RUNS_PER_WORKER` exécutions. Un worker qui
+    dépasse le timeout est tué et remplacé.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        """
+        Démarre les workers, sans attendre qu'ils aient importé pytest.
+
+        Args:
+            size: Nombre de workers
+            timeout: Durée maximale d'une exécution, en secondes
+        """
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(_Worker())
+
+    def run(
+        self, test_path: str, cwd: Optional[str] = None, timeout: Optional[float] = None
+    ) -> Dict:
+        """
+        Exécute un fichier de test sur un worker libre.
+
+        Args:
+            test_path: Chemin du fichier de test
+            cwd: Répertoire d'exécution (défaut : répertoire courant)
+            timeout: Durée maximale en secondes (défaut : celui du pool)
+
+        Returns:
+            Rapport de `result_collector.build_report`, avec en plus exit_code
+            et timed_out
+        """
+        if self._closed:
+            raise RuntimeError("Le pool pytest est fermé")
+
+        timeout = timeout or self.timeout
+        worker = self._idle.get()
+        try:
+            # Un worker fraîchement lancé n'est pas encore prêt : délai hors timeout
+            if not worker.wait_ready(timeout):
+                raise TimeoutError(f"worker pytest non démarré après {timeout:.0f} s")
+            worker.conn.send((os.path.abspath(test_path), cwd or os.getcwd()))
+            if not worker.conn.poll(timeout):
+                raise TimeoutError(f"tests interrompus après {timeout:.0f} s")
+            result = worker.conn.recv()
+            worker.runs += 1
+            if not CAN_FORK and worker.runs >= MAX_RUNS_PER_WORKER:
+                worker.stop()
+                worker = _Worker()
+        except TimeoutError as e:
+            # Démarrage ou exécution trop long : même signalement pour l'appelant
+            worker.kill()
+            worker = _Worker()
+            result = _failed_run(f"⏱️ Timeout : {e}", timeout, timed_out=True)
+        except (EOFError, OSError) as e:
+            # Worker mort (crash, os._exit dans un test...) : on le remplace
+            worker.kill()
+            worker = _Worker()
+            result = _failed_run(f"Erreur du worker pytest: {e!r}")
+        finally:
+            self._idle.put(worker)
+
+        return result
+
+    def close(self):
+        """Arrête tous les workers."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in range(self.size):
+            self._idle.get().stop()
+
+
+_pool: Optional[PytestPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pytest_pool(
+    size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT
+) -> PytestPool:
+    """
+    Retourne le pool pytest partagé du processus, créé au premier appel.
+
+    Args:
+        size: Nombre de workers
+        timeout: Durée maximale d'une exécution, en secondes
+
+    Returns:
+        PytestPool: Le pool partagé
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PytestPool(size, timeout)
+        return _pool
@@ -0,0 +1,211 @@
+"""Collecte structurée des résultats de tests (plugin pytest, JUnit XML)."""
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, Optional
+
+SLOWEST_COUNT = 5
+
+OUTCOME_PASSED = "passed"
+OUTCOME_FAILED = "failed"
+OUTCOME_ERROR = "error"
+OUTCOME_SKIPPED = "skipped"
+
+# Tests déclarés dans un fichier Java / JS / TS (mode démo, pas d'exécution)
+JAVA_TEST_PATTERN = re.compile(r"@Test\b[\s\S]*?\bvoid\s+(\w+)\s*\(")
+JS_TEST_PATTERN = re.compile(r"(?<![.\w])(?:it|test)\s*\(\s*(['\"`])(.*?)\1")
+
+
+def make_test(
+    nodeid: str,
+    outcome: str,
+    duration: float = 0.0,
+    message: str = "",
+) -> Dict:
+    """
+    Construit l'entrée JSON d'un test.
+
+    Args:
+        nodeid: Identifiant complet du test (fichier::classe::nom)
+        outcome: passed, failed, error ou skipped
+        duration: Durée en secondes
+        message: Message d'échec ou d'erreur
+
+    Returns:
+        Dict: L'entrée du test
+    """
+    return {
+        "nodeid": nodeid,
+        "name": nodeid.rsplit("::", 1)[-1],
+        "outcome": outcome,
+        "duration": round(duration, 6),
+        "message": message,
+    }
+
+
+class ResultCollector:
+    """
+    Plugin pytest qui relève le résultat, la durée et l'erreur de chaque test.
+
+    Un test compte une seule fois, quel que soit le nombre de ses phases : les
+    entrées sont indexées par nodeid, et une erreur au setup ou au teardown
+    remplace le résultat de l'appel (un test réussi dont le teardown échoue
+    est en erreur). Une erreur de collecte compte comme un test en erreur.
+    """
+
+    def __init__(self):
+        """Crée un collecteur vide, à passer dans `plugins` de pytest.main."""
+        self._tests: Dict[str, Dict] = {}
+
+    @property
+    def tests(self) -> List[Dict]:
+        """Entrées collectées, dans l'ordre d'exécution (voir make_test)."""
+        return list(self._tests.values())
+
+    def pytest_runtest_logreport(self, report):
+        """Enregistre le résultat d'une phase (setup, call, teardown) d'un test."""
+        if report.when == "call":
+            message = report.longreprtext if report.failed else ""
+            self._tests[report.nodeid] = make_test(
+                report.nodeid, report.outcome, report.duration, message
+            )
+        elif report.failed:
+            self._tests[report.nodeid] = make_test(
+                report.nodeid, OUTCOME_ERROR, report.duration, report.longreprtext
+            )
+        elif report.skipped and report.when == "setup":
+            self._tests[report.nodeid] = make_test(
+                report.nodeid, OUTCOME_SKIPPED, report.duration, ""
+            )
+
+    def pytest_collectreport(self, report):
+        """Enregistre une erreur de collecte comme un test en erreur."""
+        if report.failed:
+            self._tests[report.nodeid] = make_test(
+                report.nodeid, OUTCOME_ERROR, 0.0, report.longreprtext
+            )
+
+
+def parse_junit_xml(source: str) -> List[Dict]:
+    """
+    Lit un rapport JUnit XML (Maven Surefire, Gradle, jest-junit, pytest --junitxml).
+
+    Args:
+        source: Chemin du fichier, ou contenu XML
+
+    Returns:
+        List[Dict]: Une entrée par <testcase>
+    """
+    root = (
+        ET.parse(source).getroot() if os.path.exists(source) else ET.fromstring(source)
+    )
+
+    tests = []
+    for case in root.iter("testcase"):
+        classname = case.get("classname", "")
+        name = case.get("name", "")
+        nodeid = f"{classname}::{name}" if classname else name
+
+        outcome, message = OUTCOME_PASSED, ""
+        for tag, tag_outcome in (
+            ("failure", OUTCOME_FAILED),
+            ("error", OUTCOME_ERROR),
+            ("skipped", OUTCOME_SKIPPED),
+        ):
+            element = case.find(tag)
+            if element is not None:
+                outcome = tag_outcome
+                message = (element.get("message") or element.text or "").strip()
+                break
+
+        tests.append(make_test(nodeid, outcome, float(case.get("time") or 0), message))
+    return tests
+
+
+def declared_tests(
+    test_content: str, language: str, test_filename: str = ""
+) -> List[Dict]:
+    """
+    Relève les tests déclarés dans un fichier Java / JS / TS, sans exécution.
+
+    Utilisé en mode démo, où ces tests ne sont pas lancés : ils sont comptés
+    comme réussis, comme avant, mais un par un et avec leur nom.
+
+    Args:
+        test_content: Code du fichier de test
+        language: java, js ou ts
+        test_filename: Nom du fichier, préfixe des identifiants
+
+    Returns:
+        List[Dict]: Une entrée par test déclaré, de durée nulle
+    """
+    if language == "java":
+        names = JAVA_TEST_PATTERN.findall(test_content)
+    else:
+        names = [match[1] for match in JS_TEST_PATTERN.findall(test_content)]
+    prefix = f"{test_filename}::" if test_filename else ""
+    return [make_test(prefix + name, OUTCOME_PASSED) for name in names]
+
+
+def build_report(
+    tests: Iterable[Dict],
+    output: str = "",
+    duration: Optional[float] = None,
+    simulated: bool = False,
+) -> Dict:
+    """
+    Assemble le rapport JSON d'une exécution.
+
+    Args:
+        tests: Entrées des tests (voir make_test)
+        output: Sortie texte de l'outil de test
+        duration: Durée totale mesurée (défaut : somme des tests)
+        simulated: Tests non exécutés (mode démo)
+
+    Returns:
+        Dict: tests, compteurs (passed, failed, errors, skipped, total),
+        duration, slowest (tests les plus lents), output et simulated
+    """
+    tests = list(tests)
+    counts = {
+        OUTCOME_PASSED: 0,
+        OUTCOME_FAILED: 0,
+        OUTCOME_ERROR: 0,
+        OUTCOME_SKIPPED: 0,
+    }
+    for test in tests:
+        counts[test["outcome"]] = counts.get(test["outcome"], 0) + 1
+
+    return {
+        "tests": tests,
+        "passed": counts[OUTCOME_PASSED],
+        "failed": counts[OUTCOME_FAILED],
+        "errors": counts[OUTCOME_ERROR],
+        "skipped": counts[OUTCOME_SKIPPED],
+        "total": counts[OUTCOME_PASSED]
+        + counts[OUTCOME_FAILED]
+        + counts[OUTCOME_ERROR],
+        "duration": duration
+        if duration is not None
+        else sum(t["duration"] for t in tests),
+        "slowest": sorted(tests, key=lambda t: t["duration"], reverse=True)[
+            :SLOWEST_COUNT
+        ],
+        "output": output,
+        "simulated": simulated,
+    }
+
+
+def public_report(report: Dict) -> Dict:
+    """
+    Retire du rapport la sortie texte avant de l'envoyer au navigateur.
+
+    La sortie est déjà envoyée à part dans `pytest_output`.
+
+    Args:
+        report: Rapport de build_report
+
+    Returns:
+        Dict: Le rapport sans `output`
+    """
+    return {key: value for key, value in report.items() if key != "output"}
@@ -4,7 +4,7 @@ from typing import Optional
 
 # Import Ollama pour génération IA dynamique
 try:
-    from ollama_client import OllamaClient
+    from ollama_client import get_client
     OLLAMA_AVAILABLE = True
 except ImportError:
     OLLAMA_AVAILABLE = False
@@ -21,7 +21,7 @@ class SmartTestGenerator:
         self.use_ai = use_ai and OLLAMA_AVAILABLE
         # Utiliser phi (déjà installé) pour génération de code
         # Pour installer un meilleur modèle: ollama pull codellama OU ollama pull deepseek-coder
-        self.ollama_client = OllamaClient(model="phi") if self.use_ai else None
+        self.ollama_client = get_client(model="phi") if self.use_ai else None
     
     def _generate_tests_with_ai(self, language: str) -> Optional[str]:
         """Génère les tests COMPLÈTEMENT avec IA Ollama (pas de templates)"""
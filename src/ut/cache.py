@@ -0,0 +1,146 @@
+"""Content-addressed on-disk cache for LLM responses."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+from ut.constants import CACHE_DIR, CACHE_MAX_BYTES
+
+
+class ResponseCache:
+    """Store raw LLM responses on disk, keyed by a hash of the request.
+
+    Each entry is a plain text file named after its key. Reads bump the file
+    modification time, so evicting the oldest files first gives LRU behaviour
+    once the cache grows past `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        directory: str = CACHE_DIR,
+        max_bytes: int = CACHE_MAX_BYTES,
+        refresh: bool = False,
+    ):
+        """Initialize the cache.
+
+        Args:
+            directory (str, optional): Where entries are stored.
+                Defaults to CACHE_DIR.
+            max_bytes (int, optional): The size limit of the cache.
+                Defaults to CACHE_MAX_BYTES.
+            refresh (bool, optional): Ignore existing entries and overwrite them
+                with fresh responses. Defaults to False.
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str, generation_config: dict) -> str:
+        """Build the cache key for a request.
+
+        Args:
+            prompt (str): The prompt sent to the model.
+            model_name (str): The name of the model.
+            generation_config (dict): The generation parameters.
+
+        Returns:
+            str: The hex SHA-256 digest identifying the request.
+        """
+        payload = json.dumps(
+            {"prompt": prompt, "model": model_name, "config": generation_config},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.txt"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The response, or None on a miss or in refresh mode.
+        """
+        if self.refresh:
+            return None
+
+        path = self._path(key)
+        try:
+            response = path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return response
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response and evict old entries if the cache is too large.
+
+        Args:
+            key (str): The cache key.
+            response (str): The raw response to store.
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        data = response.encode("utf-8")
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                # An overwritten entry no longer takes its old size
+                self._size += len(data) - replaced
+
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+        self._size = total
@@ -1,2 +1,54 @@
 """Constants for test generation."""
+import os
+
 DEF_TEST_STRING = "def test_"
+
+# Directories never scanned when looking for source files
+SKIPPED_DIRS = {
+    ".git",
+    ".hg",
+    ".svn",
+    ".tox",
+    ".nox",
+    ".venv",
+    "venv",
+    "env",
+    "node_modules",
+    "__pycache__",
+    ".pytest_cache",
+    ".mypy_cache",
+    ".ruff_cache",
+    "build",
+    "dist",
+}
+
+# Temporary files and directories removed by `--clean`
+TEMP_FILE_NAMES = {".coverage"}
+TEMP_FILE_SUFFIXES = (".pyc",)
+TEMP_DIR_NAMES = {
+    "__pycache__",
+    "htmlcov",
+    ".pytest_cache",
+    ".mypy_cache",
+    ".ruff_cache",
+}
+TEMP_DIR_SUFFIXES = (".egg-info",)
+
+# Default number of files processed concurrently in directory mode
+DEFAULT_WORKERS = 4
+
+# Default number of LLM requests in flight per file
+DEFAULT_MAX_INFLIGHT = 1
+
+# Default number of processes parsing source files in directory mode
+DEFAULT_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
+# Parsed files buffered per generation worker before parsing pauses
+PARSE_QUEUE_FACTOR = 2
+
+# Seconds between checks for Ctrl+C while the parse queue is full
+STOP_POLL_INTERVAL = 0.1
+
+# Default LLM rate limits shared by all workers (0 means unlimited)
+DEFAULT_REQUESTS_PER_MINUTE = 0
+DEFAULT_TOKENS_PER_MINUTE = 0
@@ -0,0 +1,359 @@
+"""Directory processing for the generate command."""
+import multiprocessing
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import suppress
+from pathlib import Path
+from typing import Optional
+
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    Progress,
+    SpinnerColumn,
+    TextColumn,
+    TimeElapsedColumn,
+)
+
+from ut.cache import ResponseCache
+from ut.cli.commands.constants import (
+    DEFAULT_PARSE_WORKERS,
+    PARSE_QUEUE_FACTOR,
+    SKIPPED_DIRS,
+    STOP_POLL_INTERVAL,
+)
+from ut.cli.commands.file_processor import console, process_file
+from ut.constants import PROMPT_TOKEN_BUDGET
+from ut.journal import RunJournal
+from ut.parser import ModuleDescriptor, describe_module, describe_module_timed
+from ut.providers import LLMProvider
+from ut.telemetry import get_telemetry, span
+
+
+def is_test_file(file_path: Path) -> bool:
+    """Check whether a file looks like an existing test module.
+
+    Args:
+        file_path (Path): The path to check.
+
+    Returns:
+        bool: True if the file is named test_*.py or *_test.py.
+    """
+    return file_path.stem.startswith("test_") or file_path.stem.endswith("_test")
+
+
+def find_python_files(
+    directory: Path, recursive: bool, exclude: Optional[Path] = None
+) -> list[Path]:
+    """Find the Python source files to generate tests for.
+
+    Hidden directories, virtualenvs, caches and existing test modules are skipped.
+
+    Args:
+        directory (Path): The directory to scan.
+        recursive (bool): Whether to descend into subdirectories.
+        exclude (Optional[Path], optional): A directory to leave out, typically
+        the output directory. Defaults to None.
+
+    Returns:
+        list[Path]: The sorted list of Python files found.
+    """
+    pattern = "**/*.py" if recursive else "*.py"
+    files = []
+
+    for file_path in directory.glob(pattern):
+        rel_parts = file_path.relative_to(directory).parts[:-1]
+        if any(part in SKIPPED_DIRS or part.startswith(".") for part in rel_parts):
+            continue
+        if exclude and exclude in file_path.parents:
+            continue
+        if not file_path.is_file() or is_test_file(file_path):
+            continue
+        files.append(file_path)
+
+    return sorted(files)
+
+
+def find_stem_collisions(files: list[Path]) -> dict[str, list[Path]]:
+    """Find the files that would write the same test file in flat mode.
+
+    Args:
+        files (list[Path]): The source files.
+
+    Returns:
+        dict[str, list[Path]]: The files of each stem shared by several of them.
+    """
+    by_stem = defaultdict(list)
+    for file_path in files:
+        by_stem[file_path.stem].append(file_path)
+    return {stem: paths for stem, paths in by_stem.items() if len(paths) > 1}
+
+
+def _parse_result(file_path: Path, future: Future) -> ModuleDescriptor:
+    try:
+        descriptor, seconds = future.result()
+    except Exception as e:
+        return ModuleDescriptor(str(file_path), "", (), (), error=str(e))
+    get_telemetry().record("parse", seconds)
+    return descriptor
+
+
+def parse_files(
+    files: list[Path],
+    parse_workers: int,
+    parsed: "queue.Queue[Optional[ModuleDescriptor]]",
+    consumers: int,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """Parse files and feed their descriptors to a queue, in order.
+
+    Parsing is CPU-bound, so it runs on a process pool, started with
+    `spawn` since the caller is a thread of a multi-threaded process. At most
+    `2 * parse_workers` files are parsed ahead, and `parsed.put` blocks when
+    the queue is full, so memory stays bounded on large trees. One `None`
+    sentinel per consumer is queued once every file is parsed, or as soon as
+    `stop` is set.
+
+    Args:
+        files (list[Path]): The files to parse.
+        parse_workers (int): The number of parser processes; 0 parses in the
+            calling thread.
+        parsed (queue.Queue): The bounded queue read by the generation workers.
+        consumers (int): The number of generation workers to stop at the end.
+        stop (Optional[threading.Event], optional): Set to stop parsing early,
+        e.g. on Ctrl+C. Defaults to None.
+    """
+
+    def stopped() -> bool:
+        return stop is not None and stop.is_set()
+
+    def put(item: Optional[ModuleDescriptor]) -> bool:
+        # A full queue blocks until a worker takes an item, or the run stops
+        while not stopped():
+            try:
+                parsed.put(item, timeout=STOP_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        if parse_workers > 0:
+            # This runs on a background thread while the generation threads
+            # hold locks; a forked child could inherit one locked forever
+            with ProcessPoolExecutor(
+                max_workers=parse_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                pending: deque = deque()
+                for file_path in files:
+                    if stopped():
+                        break
+                    pending.append(
+                        (
+                            file_path,
+                            executor.submit(describe_module_timed, str(file_path)),
+                        )
+                    )
+                    if len(pending) >= 2 * parse_workers:
+                        put(_parse_result(*pending.popleft()))
+                while pending and not stopped():
+                    put(_parse_result(*pending.popleft()))
+        else:
+            for file_path in files:
+                if stopped():
+                    break
+                with span("parse"):
+                    descriptor = describe_module(str(file_path))
+                put(descriptor)
+    finally:
+        for _ in range(consumers):
+            if not put(None):
+                # Idle workers still wait for a sentinel, busy ones stop by themselves
+                with suppress(queue.Full):
+                    parsed.put_nowait(None)
+
+
+def process_directory(
+    directory: Path,
+    output_base: Path,
+    recursive: bool,
+    mirror_structure: bool,
+    verbose: bool,
+    dry_run: bool,
+    workers: int,
+    max_inflight: int,
+    cache: Optional[ResponseCache] = None,
+    incremental: bool = False,
+    provider: Optional[LLMProvider] = None,
+    parse_workers: int = DEFAULT_PARSE_WORKERS,
+    token_budget: int = PROMPT_TOKEN_BUDGET,
+    batch: bool = False,
+    journal: Optional[RunJournal] = None,
+) -> None:
+    """Generate tests for every Python file in a directory.
+
+    Files go through a two-stage pipeline. A process pool parses them, which
+    is CPU-bound, and hands compact descriptors to a bounded queue. A thread
+    pool takes them from the queue and generates the tests, which is
+    network-bound. Parsing the rest of the tree thus overlaps with the LLM
+    round trips.
+
+    Args:
+        directory (Path): The directory containing the source files.
+        output_base (Path): The base directory for output files.
+        recursive (bool): Whether to process subdirectories.
+        mirror_structure (bool): Whether to mirror the source directory structure.
+        verbose (bool): Whether to print verbose output.
+        dry_run (bool): Whether to perform a dry run (no file modifications).
+        workers (int): The maximum number of files processed concurrently.
+        max_inflight (int): The maximum number of concurrent LLM requests per file.
+        cache (Optional[ResponseCache], optional): The cache for raw LLM responses,
+        shared by all workers. Defaults to None.
+        incremental (bool, optional): Only regenerate tests for changed functions.
+        Defaults to False.
+        provider (Optional[LLMProvider], optional): The LLM provider shared by all
+        workers. Defaults to Gemini with the process-wide client.
+        parse_workers (int, optional): The number of parser processes; 0 parses
+        in a single background thread. Defaults to DEFAULT_PARSE_WORKERS.
+        token_budget (int, optional): The maximum number of tokens of a class
+        method prompt; 0 disables the budget. Defaults to PROMPT_TOKEN_BUDGET.
+        batch (bool, optional): Pack standalone functions into shared prompts.
+        Defaults to False.
+        journal (Optional[RunJournal], optional): The journal recording the
+        progress of the run. Files it records as done are skipped.
+        Defaults to None.
+
+    Raises:
+        ValueError: If several files would write the same test file because
+        the output is flat.
+    """
+    files = find_python_files(directory, recursive, exclude=output_base)
+
+    if not files:
+        console.print(f"[yellow]No Python files found in {directory}[/yellow]")
+        return
+
+    if not mirror_structure:
+        collisions = find_stem_collisions(files)
+        if collisions:
+            details = "; ".join(
+                ", ".join(str(p.relative_to(directory)) for p in paths)
+                for paths in collisions.values()
+            )
+            raise ValueError(
+                f"these files would write the same test file with --flat: {details}. "
+                "Use --mirror or rename them."
+            )
+
+    if journal is not None:
+        remaining = [f for f in files if not journal.is_file_done(f)]
+        if len(remaining) < len(files):
+            console.print(
+                f"[dim]Resuming: {len(files) - len(remaining)} file(s) already "
+                "done[/dim]"
+            )
+        files = remaining
+        if not files:
+            console.print("[green]Nothing left to generate[/green]")
+            return
+
+    console.print(
+        f"[bold blue]Processing {len(files)} files from {directory} "
+        f"with {workers} workers[/bold blue]"
+    )
+
+    workers = max(1, workers)
+    stats = {"llm_calls": 0, "failed": 0}
+    stats_lock = threading.Lock()
+    parsed: "queue.Queue[Optional[ModuleDescriptor]]" = queue.Queue(
+        maxsize=workers * PARSE_QUEUE_FACTOR
+    )
+    start = time.perf_counter()
+
+    progress = Progress(
+        SpinnerColumn(),
+        TextColumn("[bold green]Generating tests"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=console,
+    )
+
+    # Set on Ctrl+C: workers finish their current file and take no new one
+    stop = threading.Event()
+
+    def generate_parsed(task) -> None:
+        while True:
+            descriptor = parsed.get()
+            if descriptor is None or stop.is_set():
+                return
+
+            file_path = Path(descriptor.path)
+            try:
+                calls = process_file(
+                    file_path,
+                    output_base,
+                    mirror_structure,
+                    verbose,
+                    dry_run,
+                    base_path=directory,
+                    show_status=False,
+                    max_inflight=max_inflight,
+                    cache=cache,
+                    incremental=incremental,
+                    provider=provider,
+                    descriptor=descriptor,
+                    token_budget=token_budget,
+                    batch=batch,
+                    journal=journal,
+                )
+                with stats_lock:
+                    stats["llm_calls"] += calls
+            except Exception as e:
+                if journal is not None:
+                    journal.record_file(file_path, error=e)
+                with stats_lock:
+                    stats["failed"] += 1
+                console.print(f"[red]Failed to process {file_path.name}: {e}[/red]")
+            progress.advance(task)
+
+    # Not a `with` block: its exit would wait for every remaining file on Ctrl+C
+    executor = ThreadPoolExecutor(max_workers=workers)
+    with progress:
+        task = progress.add_task("files", total=len(files))
+        parser_thread = threading.Thread(
+            target=parse_files,
+            args=(files, parse_workers, parsed, workers, stop),
+            daemon=True,
+        )
+        parser_thread.start()
+
+        try:
+            for future in [
+                executor.submit(generate_parsed, task) for _ in range(workers)
+            ]:
+                future.result()
+        except KeyboardInterrupt:
+            stop.set()
+            console.print(
+                "[yellow]Interrupted, finishing the files in progress[/yellow]"
+            )
+            raise
+        finally:
+            executor.shutdown(wait=not stop.is_set(), cancel_futures=True)
+        parser_thread.join()
+
+    llm_calls = stats["llm_calls"]
+    failed = stats["failed"]
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    console.print("\n[bold cyan]Summary:[/bold cyan]")
+    console.print(f"  Files processed: {len(files) - failed}/{len(files)}")
+    console.print(f"  LLM calls: {llm_calls}")
+    console.print(f"  Elapsed: {elapsed:.1f}s")
+    console.print(f"  Throughput: {len(files) / elapsed:.2f} files/s")
+    console.print(f"  LLM throughput: {llm_calls / elapsed:.2f} calls/s")
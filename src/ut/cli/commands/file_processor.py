@@ -1,26 +1,266 @@
 """Automated Unit Test Generation CLI with AI."""
+import asyncio
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Union
 
 from rich.console import Console
 
-from ut.cli.commands.constants import DEF_TEST_STRING
+from ut.cache import ResponseCache
+from ut.cli.commands.constants import DEFAULT_MAX_INFLIGHT
 from ut.cli.commands.helper import verbose_log, verbose_print
-from ut.llm_client import generate_test_code
-from ut.parser import calculate_import_path_simple, source_code_analysis
+from ut.constants import PROMPT_TOKEN_BUDGET
+from ut.journal import RunJournal
+from ut.manifest import (
+    function_fingerprint,
+    function_key,
+    load_manifest,
+    manifest_path,
+    save_manifest,
+)
+from ut.parser import (
+    ModuleDescriptor,
+    calculate_import_path_simple,
+    expand_functions,
+    source_code_analysis,
+)
+from ut.prompts.batch import plan_batches, split_batch_response
+from ut.prompts.context import estimate_tokens
 from ut.prompts.prompt_builder import (
+    generate_batch_prompt,
     generate_class_method_prompt,
     generate_standalone_prompt,
 )
+from ut.providers import LLMProvider, get_default_provider
+from ut.telemetry import increment, span, timed
 from ut.test_writer import (
-    combine_test_code,
+    StreamingTestWriter,
+    count_tests,
     extract_imports_and_functions,
+    get_test_name,
+    is_test_block,
+    merge_test_file,
     postprocess_test_code_enhanced,
 )
 
 console = Console()
 
 
+async def _run_jobs(
+    jobs: list[list[dict]],
+    functions: list[dict],
+    imports_code: str,
+    token_budget: int,
+    max_inflight: int,
+    provider: LLMProvider,
+    cache: Optional[ResponseCache],
+    on_result: Callable[[dict, Union[str, Exception], str], None],
+    verbose: bool,
+    on_token: Optional[Callable[[str], None]] = None,
+    resumed: Optional[dict[str, tuple[str, str]]] = None,
+) -> int:
+    semaphore = asyncio.Semaphore(max(1, max_inflight))
+    llm_calls = 0
+
+    async def generate(prompt: str) -> tuple[str, str]:
+        nonlocal llm_calls
+        key = ResponseCache.make_key(
+            prompt, provider.model_name, provider.generation_config
+        )
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                increment("cache_hits")
+                return cached, key
+            increment("cache_misses")
+
+        async with semaphore:
+            with span("llm"):
+                try:
+                    if on_token is None:
+                        response = await provider.generate(prompt)
+                    else:
+                        chunks = []
+                        async for chunk in provider.stream(prompt):
+                            if chunk:
+                                on_token(chunk)
+                                chunks.append(chunk)
+                        on_token("")
+                        response = "".join(chunks)
+                except Exception:
+                    increment("llm_errors")
+                    raise
+        llm_calls += 1
+        increment("llm_calls")
+        increment("tokens_in", estimate_tokens(prompt))
+        increment("tokens_out", estimate_tokens(response))
+
+        if cache is not None:
+            cache.put(key, response)
+        return response, key
+
+    async def run_job(job: list[dict]) -> list[tuple[dict, str, str]]:
+        if len(job) == 1:
+            prompt = _function_prompt(job[0], imports_code, token_budget, verbose)
+            return [(job[0], *await generate(prompt))]
+
+        # Split the batch response back into per-function tests; functions
+        # whose section is missing are retried with their own prompt
+        names = [f["qualname"] for f in job]
+        with span("prompt"):
+            prompt = generate_batch_prompt(imports_code, job)
+        response, key = await generate(prompt)
+        sections = {
+            name: (section, key)
+            for name, section in split_batch_response(response, names).items()
+        }
+
+        missing = [f for f in job if f["qualname"] not in sections]
+        if missing:
+            verbose_log(
+                f"    Retrying {len(missing)} function(s) missing from a batch...",
+                verbose,
+            )
+        retried = await asyncio.gather(
+            *(
+                generate(_function_prompt(f, imports_code, token_budget, verbose))
+                for f in missing
+            )
+        )
+        sections.update((f["qualname"], r) for f, r in zip(missing, retried))
+
+        return [(f, *sections[f["qualname"]]) for f in job]
+
+    tasks = {asyncio.ensure_future(run_job(job)): job for job in jobs}
+    results: dict[int, tuple[Union[str, Exception], str]] = {}
+    position = 0
+    pending = set(tasks)
+
+    # Responses recovered from the journal need no job
+    for func_data in functions:
+        if resumed and function_key(func_data) in resumed:
+            results[id(func_data)] = resumed[function_key(func_data)]
+
+    def hand_over() -> None:
+        # Hand the results over in source order as soon as they are available
+        nonlocal position
+        while position < len(functions) and id(functions[position]) in results:
+            on_result(functions[position], *results.pop(id(functions[position])))
+            position += 1
+
+    hand_over()
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            try:
+                for func_data, response, key in task.result():
+                    results[id(func_data)] = (response, key)
+            except Exception as e:
+                for func_data in tasks[task]:
+                    results[id(func_data)] = (e, "")
+        hand_over()
+
+    return llm_calls
+
+
+def generate_tests(
+    jobs: list[list[dict]],
+    functions: list[dict],
+    imports_code: str,
+    on_result: Callable[[dict, Union[str, Exception], str], None],
+    max_inflight: int,
+    provider: LLMProvider,
+    cache: Optional[ResponseCache] = None,
+    token_budget: int = PROMPT_TOKEN_BUDGET,
+    verbose: bool = False,
+    on_token: Optional[Callable[[str], None]] = None,
+    resumed: Optional[dict[str, tuple[str, str]]] = None,
+) -> int:
+    """Generate the raw tests of every function, keeping `max_inflight` requests open.
+
+    Jobs run concurrently on a single event loop. Each raw response is passed
+    to `on_result` as soon as it and the responses of all the functions before
+    it are available, so results arrive in source order without waiting for
+    the whole file. A failed job is reported with its exception instead of a
+    response and does not stop the other jobs.
+
+    Args:
+        jobs (list[list[dict]]): The functions to send together, one prompt per
+            job; a job of several functions uses the batch prompt.
+        functions (list[dict]): Every function of the jobs, in source order.
+        imports_code (str): The imports of the module.
+        on_result (Callable[[dict, Union[str, Exception], str], None]): Called
+            with each function, its raw response or error, and the key of the
+            request (empty if the request failed before it was built).
+        max_inflight (int): The maximum number of concurrent requests.
+        provider (LLMProvider): The LLM provider shared by all requests.
+        cache (Optional[ResponseCache], optional): The response cache.
+            Defaults to None.
+        token_budget (int, optional): The maximum number of tokens of a class
+            method prompt. Defaults to PROMPT_TOKEN_BUDGET.
+        verbose (bool, optional): Whether to print verbose output.
+            Defaults to False.
+        on_token (Optional[Callable[[str], None]], optional): Called with each
+            chunk of a response as it arrives, then with an empty string once
+            it is complete; requests then go through `provider.stream`. Cached
+            responses are not replayed.
+            Defaults to None.
+        resumed (Optional[dict[str, tuple[str, str]]], optional): The raw
+            response and request key of functions already completed, by
+            function key; they are handed to `on_result` without a job.
+            Defaults to None.
+
+    Returns:
+        int: The number of LLM calls actually made.
+    """
+    return asyncio.run(
+        _run_jobs(
+            jobs,
+            functions,
+            imports_code,
+            token_budget,
+            max_inflight,
+            provider,
+            cache,
+            on_result,
+            verbose,
+            on_token,
+            resumed,
+        )
+    )
+
+
+def _print_token(chunk: str) -> None:
+    # An empty chunk ends the response
+    console.print(
+        chunk, end="" if chunk else "\n", markup=False, highlight=False, soft_wrap=True
+    )
+
+
+@timed("prompt")
+def _function_prompt(
+    func_data: dict, imports_code: str, token_budget: int, verbose: bool
+) -> str:
+    function_name = func_data["function_name"]
+    verbose_log(f"\n  → Processing function: [cyan]{function_name}[/cyan]", verbose)
+
+    # Generate prompt based on whether it's a class method
+    # or standalone function
+    if func_data["parent_class_code"]:
+        verbose_log("    Class method detected", verbose)
+
+        return generate_class_method_prompt(
+            imports_code,
+            function_name,
+            func_data["parent_class_code"],
+            token_budget,
+        )
+
+    verbose_log("    Standalone function detected", verbose)
+
+    return generate_standalone_prompt(imports_code, func_data["function_code"])
+
+
 def process_file(
     file_path: Path,
     output_base: Path,
@@ -28,7 +268,17 @@ def process_file(
     verbose: bool,
     dry_run: bool,
     base_path: Optional[Path] = None,
-):
+    show_status: bool = True,
+    max_inflight: int = DEFAULT_MAX_INFLIGHT,
+    cache: Optional[ResponseCache] = None,
+    incremental: bool = False,
+    provider: Optional[LLMProvider] = None,
+    descriptor: Optional[ModuleDescriptor] = None,
+    token_budget: int = PROMPT_TOKEN_BUDGET,
+    batch: bool = False,
+    journal: Optional[RunJournal] = None,
+    stream: bool = False,
+) -> int:
     """Process a single Python file to generate tests.
 
     Args:
@@ -39,24 +289,77 @@ def process_file(
         dry_run (bool): Whether to perform a dry run (no file modifications).
         base_path (Optional[Path], optional): The base directory for the source files.
         Defaults to None.
+        show_status (bool, optional): Whether to show a spinner while processing.
+        Must be disabled when files are processed concurrently. Defaults to True.
+        max_inflight (int, optional): The maximum number of LLM requests sent
+        concurrently for this file. Defaults to DEFAULT_MAX_INFLIGHT.
+        cache (Optional[ResponseCache], optional): The cache for raw LLM responses.
+        Defaults to None (no caching).
+        incremental (bool, optional): Only regenerate tests for functions whose
+        code changed since the last run, splicing them into the existing test
+        file. Defaults to False.
+        provider (Optional[LLMProvider], optional): The LLM provider to use.
+        Defaults to Gemini with the process-wide client.
+        descriptor (Optional[ModuleDescriptor], optional): The file already parsed
+        by the parse stage of directory mode. Defaults to None (parse here).
+        token_budget (int, optional): The maximum number of tokens of a class
+        method prompt; 0 disables the budget. Defaults to PROMPT_TOKEN_BUDGET.
+        batch (bool, optional): Pack standalone functions into shared prompts,
+        up to `token_budget` tokens each. Defaults to False.
+        journal (Optional[RunJournal], optional): The journal recording the
+        progress of the run. Files it records as done are skipped, and the
+        functions it records as done reuse their response. Defaults to None.
+        stream (bool, optional): Print the LLM responses token by token as they
+        arrive. Use with a `max_inflight` of 1, or the responses interleave.
+        Defaults to False.
+
+    Returns:
+        int: The number of LLM calls made for this file.
     """
+    llm_calls = 0
+
+    if journal is not None and journal.is_file_done(file_path):
+        verbose_print(
+            f"[dim]Already done in a previous run, skipping {file_path.name}[/dim]",
+            verbose,
+        )
+        return llm_calls
+
     verbose_log(f"Extracting imports and functions from {file_path.name}", verbose)
 
-    with console.status(
-        f"[bold green]Generating tests for {file_path.name}...[/bold green]",
-        spinner="dots",
-    ):
+    status = (
+        console.status(
+            f"[bold green]Generating tests for {file_path.name}...[/bold green]",
+            spinner="dots",
+        )
+        # The spinner would redraw over the streamed tokens
+        if show_status and not stream
+        else nullcontext()
+    )
+
+    with status:
         try:
-            imports_code, functions_data = source_code_analysis(str(file_path))
+            if descriptor is None:
+                with span("parse"):
+                    imports_code, functions_data = source_code_analysis(str(file_path))
+            elif descriptor.error is not None:
+                raise ValueError(descriptor.error)
+            else:
+                imports_code = descriptor.imports
+                functions_data = expand_functions(descriptor)
         except Exception as e:
             console.print(f"[red]Failed to analyze {file_path.name}: {e}[/red]")
-            return
+            if journal is not None and not dry_run:
+                journal.record_file(file_path, error=e)
+            return llm_calls
 
         if not functions_data:
             verbose_print(
                 f"[yellow]No functions found in {file_path.name}[/yellow]", verbose
             )
-            return
+            if journal is not None and not dry_run:
+                journal.record_file(file_path)
+            return llm_calls
 
         # Determine output directory
         if mirror_structure and base_path:
@@ -74,80 +377,261 @@ def process_file(
 
         module_import_path = calculate_import_path_simple(file_path)
 
+        test_file_path = test_dir / f"test_{file_path.stem}.py"
+        manifest_file = manifest_path(test_file_path)
+
+        # In incremental mode, only new or changed functions are regenerated
+        previous_manifest = {}
+        if incremental and test_file_path.exists():
+            previous_manifest = load_manifest(manifest_file)
+
+        fingerprints = {
+            function_key(func_data): function_fingerprint(func_data["function_code"])
+            for func_data in functions_data
+        }
+
+        selected_functions = []
+        for func_data in functions_data:
+            key = function_key(func_data)
+            previous = previous_manifest.get(key)
+            if previous and previous["fingerprint"] == fingerprints[key]:
+                verbose_log(f"  = Unchanged: [dim]{key}[/dim]", verbose)
+                continue
+            selected_functions.append(func_data)
+
+        removed_keys = set(previous_manifest) - set(fingerprints)
+
+        if previous_manifest and not selected_functions and not removed_keys:
+            console.print(f"  [dim]No changes in {file_path.name}, skipping[/dim]")
+            if journal is not None and not dry_run:
+                journal.record_file(file_path, test_file_path)
+            return llm_calls
+
         all_test_functions = []
         all_imports = set()
+        new_manifest = {
+            key: entry
+            for key, entry in previous_manifest.items()
+            if key in fingerprints
+        }
 
-        # Process each function in the file
-        for i, func_data in enumerate(functions_data):
-            function_name = func_data["function_name"]
-
-            verbose_log(
-                f"\n  → Processing function {i + 1}/{len(functions_data)}: \
-                            [cyan]{function_name}[/cyan]",
+        # Functions completed by an interrupted run reuse their response
+        resumed = {}
+        if journal is not None:
+            for func_data in selected_functions:
+                key = function_key(func_data)
+                done = journal.completed_function(file_path, key, fingerprints[key])
+                if done is not None:
+                    resumed[key] = done
+        if resumed:
+            verbose_print(
+                f"[dim]Reusing {len(resumed)} response(s) from the journal[/dim]",
                 verbose,
             )
+        pending_functions = [
+            f for f in selected_functions if function_key(f) not in resumed
+        ]
 
-            # Generate prompt based on whether it's a class method
-            # or standalone function
-            if func_data["parent_class_code"]:
-                verbose_log("    Class method detected", verbose)
+        # Pack small standalone functions together when batching, every other
+        # function gets a prompt of its own
+        if batch:
+            standalone = [f for f in pending_functions if not f["parent_class_code"]]
+            overhead = estimate_tokens(generate_batch_prompt(imports_code, []))
+            jobs = plan_batches(standalone, overhead, token_budget)
+            jobs += [[f] for f in pending_functions if f["parent_class_code"]]
+        else:
+            jobs = [[f] for f in pending_functions]
 
-                prompt = generate_class_method_prompt(
-                    imports_code, function_name, func_data["parent_class_code"]
+        for job in jobs:
+            if len(job) > 1:
+                verbose_log(
+                    f"\n  → Batching {len(job)} functions: [cyan]"
+                    f"{', '.join(f['function_name'] for f in job)}[/cyan]",
+                    verbose,
                 )
-            else:
-                verbose_log("    Standalone function detected", verbose)
 
-                prompt = generate_standalone_prompt(
-                    imports_code, func_data["function_code"]
-                )
+            if dry_run:
+                for func_data in job:
+                    console.print(
+                        f"    [dim]Would generate test for "
+                        f"{func_data['function_name']}[/dim]"
+                    )
+
+        if dry_run:
+            return llm_calls
 
-            verbose_log("    Sending to LLM...", verbose)
+        # A fresh test file is streamed to disk as the tests arrive; in
+        # incremental mode they are spliced into the existing file at the end
+        writer = (
+            None
+            if previous_manifest
+            else StreamingTestWriter(test_file_path, file_path.stem, module_import_path)
+        )
+        errors = []
+        regenerated_keys = set()
+        written_fixtures: set[str] = set()
+        test_counts: list[int] = []
 
-            if not dry_run:
-                raw_response = generate_test_code(prompt)
+        def handle_result(
+            func_data: dict, raw_response: Union[str, Exception], prompt_hash: str
+        ):
+            function_name = func_data["function_name"]
+            key = function_key(func_data)
 
-                clean_code = postprocess_test_code_enhanced(
-                    raw_response, function_name, module_import_path, file_path.stem
+            if isinstance(raw_response, Exception):
+                if journal is not None:
+                    journal.record_function(
+                        file_path, key, prompt_hash, error=raw_response
+                    )
+                errors.append(raw_response)
+                increment("functions_failed")
+                console.print(
+                    f"    [red]✗ Failed to generate tests for {function_name}: "
+                    f"{raw_response}[/red]"
                 )
+                return
 
-                test_imports, test_functions = extract_imports_and_functions(clean_code)
+            if journal is not None:
+                journal.record_function(
+                    file_path,
+                    key,
+                    prompt_hash,
+                    raw_response,
+                    fingerprint=fingerprints[key],
+                )
 
-                valid_functions = [
-                    f for f in test_functions if f.strip() and DEF_TEST_STRING in f
-                ]
+            clean_code = postprocess_test_code_enhanced(
+                raw_response, function_name, module_import_path, file_path.stem
+            )
 
-                if valid_functions:
+            test_imports, test_functions = extract_imports_and_functions(clean_code)
+
+            # Fixtures and test classes are kept along with the tests; a
+            # fixture already written for another function is not repeated,
+            # but stays listed for every function that uses it
+            valid_functions = []
+            block_names = []
+            for block in test_functions:
+                if not block.strip():
+                    continue
+                name = get_test_name(block)
+                block_names.append(name)
+                if not is_test_block(block):
+                    if name in written_fixtures:
+                        continue
+                    written_fixtures.add(name)
+                valid_functions.append(block)
+
+            tests_count = count_tests(valid_functions)
+            if tests_count:
+                test_counts.append(tests_count)
+                increment("functions_generated")
+                increment("tests_generated", tests_count)
+                if writer is not None:
+                    with span("write"):
+                        writer.add(test_imports, valid_functions)
+                else:
                     all_imports.update(test_imports)
                     all_test_functions.extend(valid_functions)
-                    console.print(
-                        f"    ✓ Generated {len(valid_functions)} \
-                            test(s) for [green]{function_name}[/green]"
-                    )
-                else:
-                    console.print(
-                        f"    ⚠️ No valid tests generated for \
-                                  [yellow]{function_name}[/yellow]"
-                    )
+                new_manifest[key] = {
+                    "fingerprint": fingerprints[key],
+                    "tests": block_names,
+                }
+                regenerated_keys.add(key)
+                console.print(
+                    f"    ✓ Generated {tests_count} \
+                        test(s) for [green]{function_name}[/green]"
+                )
             else:
-                console.print(f"    [dim]Would generate test for {function_name}[/dim]")
+                console.print(
+                    f"    ⚠️ No valid tests generated for \
+                              [yellow]{function_name}[/yellow]"
+                )
+
+        verbose_log(
+            f"    Sending {len(jobs)} prompt(s) to LLM \
+                (max in flight: {max_inflight})...",
+            verbose,
+        )
 
-        if not dry_run and all_test_functions:
-            # Combine all tests into a single file
-            combined_test_code = combine_test_code(
-                all_imports, all_test_functions, file_path.stem, module_import_path
+        with writer or nullcontext():
+            llm_calls = generate_tests(
+                jobs,
+                selected_functions,
+                imports_code,
+                handle_result,
+                max_inflight,
+                provider or get_default_provider(),
+                cache,
+                token_budget,
+                verbose,
+                _print_token if stream else None,
+                resumed,
+            )
+
+        if journal is not None:
+            # A file with failed functions is retried when resuming
+            journal.record_file(
+                file_path, test_file_path, errors[0] if errors else None
             )
 
-            # Write the combined test file
-            test_file_name = f"test_{file_path.stem}.py"
-            test_file_path = test_dir / test_file_name
+        # Nothing could be generated at all, e.g. the provider is unreachable
+        if errors and len(errors) == len(selected_functions):
+            raise errors[0]
+
+        if previous_manifest:
+            # Drop the old tests of removed and successfully regenerated
+            # functions; failed ones keep theirs until a later run succeeds
+            stale_keys = removed_keys | regenerated_keys
+            removed_tests = {
+                name
+                for key in stale_keys
+                for name in previous_manifest.get(key, {}).get("tests", [])
+            }
+
+            # No fingerprint for failed functions, so the next run retries them
+            for func_data in selected_functions:
+                key = function_key(func_data)
+                if key not in regenerated_keys and key in new_manifest:
+                    new_manifest[key] = {
+                        "fingerprint": None,
+                        "tests": new_manifest[key]["tests"],
+                    }
 
-            with open(test_file_path, "w", encoding="utf-8") as f:
-                f.write(combined_test_code)
+            # A fixture shared with a function that is kept must stay
+            removed_tests -= {
+                name for entry in new_manifest.values() for name in entry["tests"]
+            }
+
+            with span("write"):
+                merge_test_file(
+                    test_file_path,
+                    all_imports,
+                    all_test_functions,
+                    file_path.stem,
+                    module_import_path,
+                    removed_tests,
+                )
+            save_manifest(manifest_file, new_manifest)
+
+            rel_test_path = test_file_path.relative_to(output_base)
+            console.print(
+                f"\n  📄 Test file updated: [bold green]\
+                {output_base}/{rel_test_path}[/bold green]"
+            )
+            console.print(
+                f"     {len(selected_functions)} function(s) regenerated, "
+                f"{len(removed_keys)} removed"
+            )
+
+        elif writer is not None and writer.count:
+            save_manifest(manifest_file, new_manifest)
 
             rel_test_path = test_file_path.relative_to(output_base)
             console.print(
                 f"\n  📄 Test file created: [bold green]\
                 {output_base}/{rel_test_path}[/bold green]"
             )
-            console.print(f"     Contains {len(all_test_functions)} test functions")
+            console.print(f"     Contains {sum(test_counts)} test functions")
+
+    return llm_calls
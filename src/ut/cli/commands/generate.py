@@ -4,9 +4,31 @@ from typing import Optional
 
 import typer
 from rich.console import Console
+from typing_extensions import Annotated
 
+from ut.cache import ResponseCache
+from ut.cli.commands.constants import (
+    DEFAULT_MAX_INFLIGHT,
+    DEFAULT_PARSE_WORKERS,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    DEFAULT_WORKERS,
+)
+from ut.cli.commands.directory_processor import process_directory
 from ut.cli.commands.file_processor import process_file
 from ut.cli.commands.helper import clean_temp_files
+from ut.constants import PROMPT_TOKEN_BUDGET
+from ut.journal import RunJournal
+from ut.prompts.templates import PromptTemplateError, set_template_dir
+from ut.providers import (
+    DEFAULT_MAX_RETRIES,
+    PROVIDER_NAMES,
+    AdaptiveConcurrency,
+    ResilientProvider,
+    TokenBucketLimiter,
+    get_provider,
+)
+from ut.telemetry import get_telemetry
 
 console = Console()
 
@@ -36,6 +58,153 @@ def generate(
         "--mirror/--flat",
         help="Mirror source directory structure in output (default: mirror)",
     ),
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            min=1,
+            help="Number of files processed concurrently in directory mode",
+        ),
+    ] = DEFAULT_WORKERS,
+    parse_workers: Annotated[
+        int,
+        typer.Option(
+            "--parse-workers",
+            min=0,
+            help="Number of processes parsing files in directory mode "
+            "(0 parses in a single thread)",
+        ),
+    ] = DEFAULT_PARSE_WORKERS,
+    max_inflight: Annotated[
+        int,
+        typer.Option(
+            "--max-inflight",
+            min=1,
+            help="Maximum number of concurrent LLM requests per file",
+        ),
+    ] = DEFAULT_MAX_INFLIGHT,
+    rpm: Annotated[
+        int,
+        typer.Option(
+            "--rpm",
+            min=0,
+            help="Maximum LLM requests per minute across all workers "
+            "(0 for no limit)",
+        ),
+    ] = DEFAULT_REQUESTS_PER_MINUTE,
+    tpm: Annotated[
+        int,
+        typer.Option(
+            "--tpm",
+            min=0,
+            help="Maximum estimated LLM tokens per minute across all workers "
+            "(0 for no limit)",
+        ),
+    ] = DEFAULT_TOKENS_PER_MINUTE,
+    max_retries: Annotated[
+        int,
+        typer.Option(
+            "--max-retries",
+            min=0,
+            help="Retries of an LLM request failing with a rate limit, timeout "
+            "or server error",
+        ),
+    ] = DEFAULT_MAX_RETRIES,
+    no_cache: Annotated[
+        bool,
+        typer.Option("--no-cache", help="Do not read or write the response cache"),
+    ] = False,
+    refresh_cache: Annotated[
+        bool,
+        typer.Option(
+            "--refresh-cache",
+            help="Ignore cached responses and overwrite them with fresh ones",
+        ),
+    ] = False,
+    incremental: Annotated[
+        bool,
+        typer.Option(
+            "--incremental",
+            help="Only regenerate tests for functions changed since the last run",
+        ),
+    ] = False,
+    token_budget: Annotated[
+        int,
+        typer.Option(
+            "--token-budget",
+            min=0,
+            help="Maximum tokens per class method prompt; larger classes are "
+            "pruned to fit (0 disables the budget)",
+        ),
+    ] = PROMPT_TOKEN_BUDGET,
+    batch: Annotated[
+        bool,
+        typer.Option(
+            "--batch",
+            help="Test several standalone functions per LLM request, "
+            "up to the token budget",
+        ),
+    ] = False,
+    clean: Annotated[
+        bool,
+        typer.Option(
+            "--clean",
+            help="Remove caches and bytecode (__pycache__, .pytest_cache, *.pyc, "
+            "...) from the output directory after generation",
+        ),
+    ] = False,
+    template_dir: Annotated[
+        Optional[str],
+        typer.Option(
+            "--template-dir",
+            help="Directory with custom prompt templates overriding the built-in "
+            "ones",
+        ),
+    ] = None,
+    resume: Annotated[
+        bool,
+        typer.Option(
+            "--resume",
+            help="Resume an interrupted run: skip the files it completed and "
+            "retry the rest",
+        ),
+    ] = False,
+    metrics_json: Annotated[
+        Optional[str],
+        typer.Option(
+            "--metrics-json",
+            help="Write stage timings (p50/p95) and counters to this JSON file",
+        ),
+    ] = None,
+    metrics_prom: Annotated[
+        Optional[str],
+        typer.Option(
+            "--metrics-prom",
+            help="Write the same metrics in the Prometheus text format to this file",
+        ),
+    ] = None,
+    stream: Annotated[
+        bool,
+        typer.Option(
+            "--stream",
+            help="Print the LLM responses token by token as they arrive "
+            "(single file only, one request at a time)",
+        ),
+    ] = False,
+    provider_name: Annotated[
+        str,
+        typer.Option(
+            "--provider",
+            help=f"LLM backend used for generation ({', '.join(PROVIDER_NAMES)})",
+        ),
+    ] = "gemini",
+    model: Annotated[
+        Optional[str],
+        typer.Option(
+            "--model", "-m", help="Model used for generation (provider default)"
+        ),
+    ] = None,
 ) -> None:
     """
     Generate unit tests for Python files in any Python project.
@@ -50,14 +219,25 @@ def generate(
         ut generate src/  # All files in src/ -> ut_output/src/...
         ut generate . --output tests/  # Custom output directory
         ut generate src/ --flat  # All tests in ut_output/ without subdirs
+        ut generate src/ --workers 8  # Process 8 files concurrently
+        ut generate src/ --parse-workers 8  # Parse with 8 processes
+        ut generate my_module.py --max-inflight 5  # 5 concurrent LLM calls
+        ut generate src/ --rpm 15 --tpm 250000  # Stay under the API quotas
+        ut generate src/ --refresh-cache  # Ignore cached LLM responses
+        ut generate src/ --incremental  # Only re-test changed functions
+        ut generate src/ --resume  # Continue an interrupted run
+        ut generate src/ --provider ollama  # Use a local Ollama model
+        ut generate utils.py --provider ollama --stream  # Watch the model write
+        ut generate src/ --token-budget 2000  # Smaller prompts for large classes
+        ut generate src/ --template-dir prompts/  # Use custom prompt templates
+        ut generate utils.py --batch  # Fewer requests for small functions
+        ut generate src/ --clean  # Remove caches from the output directory
+        ut generate src/ --metrics-json metrics.json  # Where the time goes
 
     After generation, review the tests in ut_output/ and move them to your
     project's test directory as needed.
     """
 
-    # Clean up temporary files
-    clean_temp_files(verbose=False)
-
     if not file_path:
         console.print("[bold red]Error: The file path cannot be empty.[/bold red]")
         raise typer.Exit(code=1)
@@ -68,41 +248,130 @@ def generate(
         )
         raise typer.Exit(code=1)
 
+    try:
+        set_template_dir(template_dir)
+    except PromptTemplateError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        raise typer.Exit(1)
+
     path = Path(file_path).resolve()
     output_base = Path(output_dir).resolve()
 
     if not dry_run:
         console.print(f"[bold cyan]📁 Output directory: {output_base}/[/bold cyan]")
-        if output_base.exists() and any(output_base.iterdir()):
+        if (
+            not incremental
+            and not resume
+            and output_base.exists()
+            and any(output_base.iterdir())
+        ):
             console.print(
                 "[yellow]⚠️  Output directory exists and contains files[/yellow]"
             )
             if not typer.confirm("Continue and potentially overwrite existing files?"):
                 raise typer.Exit(0)
 
+    cache = None if no_cache else ResponseCache(refresh=refresh_cache)
+
+    try:
+        provider = get_provider(provider_name, model)
+    except ValueError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        raise typer.Exit(1)
+
+    if stream and path.is_dir():
+        console.print(
+            "[yellow]⚠️  --stream only applies to single files, ignoring it[/yellow]"
+        )
+        stream = False
+    if stream:
+        # Concurrent responses would interleave on the terminal
+        max_inflight = 1
+
+    # One wrapper shared by every worker, so they draw from the same limits
+    max_concurrency = max_inflight * (workers if path.is_dir() else 1)
+    provider = ResilientProvider(
+        provider,
+        limiter=TokenBucketLimiter(rpm, tpm) if rpm or tpm else None,
+        concurrency=AdaptiveConcurrency(max_concurrency),
+        max_retries=max_retries,
+    )
+
     is_not_python_file = path.is_file() and path.suffix != ".py"
 
     if is_not_python_file:
         console.print(f"[bold red]Error: {path} is not a Python file[/bold red]")
         raise typer.Exit(1)
 
-    if path.is_file():
-        console.print(f"[bold blue]Processing single file: {path.name}[/bold blue]")
-        process_file(path, output_base, mirror_structure, verbose, dry_run)
+    telemetry = get_telemetry()
+    telemetry.reset()
+    telemetry.enabled = bool(metrics_json or metrics_prom)
 
-    elif path.is_dir():
-        console.print(
-            "[bold red]Warning: Directory processing is not implemented yet.[/bold red]"
-        )
-        raise typer.Exit(1)
+    # The journal is written on every run so an interrupted run can be resumed
+    journal = None
+    if not dry_run and path.exists():
+        journal = RunJournal(output_base, resume=resume)
 
-    else:
-        msg_sufix = "is neither a file nor a directory"
-        console.print(f"[bold red]Error: '{file_path}' {msg_sufix}[/bold red]")
-        raise typer.Exit(1)
+    try:
+        if path.is_file():
+            console.print(f"[bold blue]Processing single file: {path.name}[/bold blue]")
+            process_file(
+                path,
+                output_base,
+                mirror_structure,
+                verbose,
+                dry_run,
+                max_inflight=max_inflight,
+                cache=cache,
+                incremental=incremental,
+                provider=provider,
+                token_budget=token_budget,
+                batch=batch,
+                journal=journal,
+                stream=stream,
+            )
+
+        elif path.is_dir():
+            try:
+                process_directory(
+                    path,
+                    output_base,
+                    recursive,
+                    mirror_structure,
+                    verbose,
+                    dry_run,
+                    workers,
+                    max_inflight,
+                    cache,
+                    incremental,
+                    provider,
+                    parse_workers,
+                    token_budget,
+                    batch,
+                    journal,
+                )
+            except ValueError as e:
+                console.print(f"[bold red]Error: {e}[/bold red]")
+                raise typer.Exit(1)
+
+        else:
+            msg_sufix = "is neither a file nor a directory"
+            console.print(f"[bold red]Error: '{file_path}' {msg_sufix}[/bold red]")
+            raise typer.Exit(1)
+    finally:
+        if journal is not None:
+            journal.close()
+
+        # Metrics are written even when the run is interrupted
+        if metrics_json:
+            telemetry.write_json(metrics_json)
+        if metrics_prom:
+            telemetry.write_prometheus(metrics_prom)
+        telemetry.enabled = False
 
-    # Clean up temporary files
-    clean_temp_files()
+    # Clean up temporary files left in the output directory
+    if clean and not dry_run:
+        clean_temp_files(output_base, verbose)
 
     if not dry_run:
         console.print(
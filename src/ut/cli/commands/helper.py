@@ -1,6 +1,18 @@
 """Helper functions for CLI commands."""
+import os
+import shutil
+from pathlib import Path
+
 from rich.console import Console
 
+from ut.cli.commands.constants import (
+    SKIPPED_DIRS,
+    TEMP_DIR_NAMES,
+    TEMP_DIR_SUFFIXES,
+    TEMP_FILE_NAMES,
+    TEMP_FILE_SUFFIXES,
+)
+
 
 def verbose_message(message: str, verbose: bool, print_func: Console) -> None:
     """Print a message if verbose is enabled.
@@ -35,33 +47,50 @@ def verbose_log(message: str, verbose: bool):
     verbose_message(message, verbose, Console().log)
 
 
-def clean_temp_files(verbose: bool = True):
+def _is_virtualenv(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, "pyvenv.cfg"))
+
+
+def clean_temp_files(root: Path, verbose: bool = True) -> int:
     """Remove temporary files and directories created during test generation.
 
+    The tree is walked once with `os.scandir`; version control directories,
+    `node_modules` and virtualenvs are not descended into.
+
     Args:
+        root (Path): The directory to clean, typically the output directory.
         verbose (bool, optional): Flag indicating if verbose mode is enabled.
             Defaults to True.
-    """
-    import subprocess
 
+    Returns:
+        int: The number of files and directories removed.
+    """
     verbose_print("\n[dim]Cleaning up temporary files...[/dim]", verbose)
 
-    # Commands to clean up common Python temporary files and directories
-    commands = [
-        "find . -type f -name '*.pyc' -delete",
-        "find . -type d -name '__pycache__' -exec rm -rf {} +",
-        "find . -type d -name '*.egg-info' -exec rm -rf {} +",
-        "find . -type f -name '.coverage' -delete",
-        "find . -type d -name 'htmlcov' -exec rm -rf {} +",
-        "find . -type d -name '.pytest_cache' -exec rm -rf {} +",
-        "find . -type d -name '.mypy_cache' -exec rm -rf {} +",
-        "find . -type d -name '.ruff_cache' -exec rm -rf {} +",
-    ]
-
-    for command in commands:
+    pruned_dirs = SKIPPED_DIRS - TEMP_DIR_NAMES
+    removed = 0
+    pending = [str(root)]
+
+    while pending:
         try:
-            subprocess.run(
-                command, shell=True, check=True, capture_output=True, text=True
-            )
-        except subprocess.CalledProcessError:
-            pass
+            entries = list(os.scandir(pending.pop()))
+        except OSError:
+            continue
+
+        for entry in entries:
+            name = entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if name in TEMP_DIR_NAMES or name.endswith(TEMP_DIR_SUFFIXES):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                        removed += 1
+                    elif name not in pruned_dirs and not _is_virtualenv(entry.path):
+                        pending.append(entry.path)
+                elif name in TEMP_FILE_NAMES or name.endswith(TEMP_FILE_SUFFIXES):
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                continue
+
+    verbose_print(f"[dim]Removed {removed} temporary item(s)[/dim]", verbose)
+    return removed
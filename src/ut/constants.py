@@ -7,3 +7,10 @@ FILE_PATH_SAMPLE_FUNCTION = os.path.join(
 )
 FILE_PATH_PROMPT = os.path.join(BASE_DIR, "prompts")
 TEST_DIR_PATH = os.path.join(BASE_DIR, "example", "tests")
+CACHE_DIR = os.getenv(
+    "UT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ut")
+)
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CHARS_PER_TOKEN = 4
+PROMPT_TOKEN_BUDGET = 8000
+BATCH_MAX_FUNCTIONS = 8
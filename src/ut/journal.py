@@ -0,0 +1,220 @@
+"""Append-only journal of a generation run, used to resume interrupted runs."""
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+JOURNAL_FILE_NAME = ".ut_journal.jsonl"
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def text_hash(text: str) -> str:
+    """Hash a text, such as an LLM response.
+
+    Args:
+        text (str): The text to hash.
+
+    Returns:
+        str: The hex SHA-256 digest of the text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    """Hash the content of a file.
+
+    Args:
+        path (Path): The file to hash.
+
+    Returns:
+        str: The hex SHA-256 digest of the file.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RunJournal:
+    """Record the progress of a run as JSON lines in the output directory.
+
+    One line is appended and flushed per finished function and per finished
+    file, so the journal survives crashes and interruptions. When resuming,
+    the previous lines are replayed: files recorded as done, whose source is
+    unchanged and whose test file still exists, are skipped. In the other
+    files, functions recorded as done whose code is unchanged get their
+    response back from the journal, which stores it, so they are not sent
+    again even without the response cache.
+    """
+
+    def __init__(self, output_base: Path, resume: bool = False):
+        """Open the journal of an output directory.
+
+        Args:
+            output_base (Path): The output directory of the run.
+            resume (bool, optional): Keep and replay the previous journal.
+                Defaults to False (start a new journal).
+        """
+        self.path = output_base / JOURNAL_FILE_NAME
+        self.files: dict[str, dict] = {}
+        self.functions: dict[tuple[str, str], dict] = {}
+        self._lock = threading.Lock()
+
+        if resume:
+            self._replay()
+
+        output_base.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    def _replay(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # The last line may be truncated by a crash
+                continue
+            if entry.get("type") == "file":
+                self.files[entry["file"]] = entry
+            elif entry.get("type") == "function":
+                self.functions[(entry["file"], entry["function"])] = entry
+
+    def _append(self, entry: dict) -> None:
+        entry["time"] = time.time()
+        line = json.dumps(entry, sort_keys=True)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def is_file_done(self, source_path: Path) -> bool:
+        """Check whether a file was completed by a previous run.
+
+        Args:
+            source_path (Path): The source file.
+
+        Returns:
+            bool: True if the file is recorded as done, its source did not
+            change since, and its test file still exists.
+        """
+        entry = self.files.get(str(source_path))
+        if not entry or entry["status"] != STATUS_DONE:
+            return False
+        if entry.get("output") and not Path(entry["output"]).exists():
+            return False
+        try:
+            return entry["source_hash"] == file_hash(source_path)
+        except OSError:
+            return False
+
+    def completed_function(
+        self, source_path: Path, function: str, fingerprint: str
+    ) -> Optional[tuple[str, str]]:
+        """Return the response of a function completed by a previous run.
+
+        Args:
+            source_path (Path): The source file of the function.
+            function (str): The function key, e.g. `Class.method`.
+            fingerprint (str): The fingerprint of the current function code.
+
+        Returns:
+            Optional[tuple[str, str]]: The raw response and the prompt hash, if
+            the function is recorded as done for the same code and its stored
+            response is intact; None otherwise.
+        """
+        entry = self.functions.get((str(source_path), function))
+        if not entry or entry["status"] != STATUS_DONE:
+            return None
+        response = entry.get("response")
+        if entry.get("fingerprint") != fingerprint or response is None:
+            return None
+        if text_hash(response) != entry.get("response_hash"):
+            return None
+        return response, entry["prompt_hash"]
+
+    def record_function(
+        self,
+        source_path: Path,
+        function: str,
+        prompt_hash: str,
+        response: Optional[str] = None,
+        error: Optional[BaseException] = None,
+        fingerprint: Optional[str] = None,
+    ) -> None:
+        """Record the outcome of the request for a function.
+
+        Args:
+            source_path (Path): The source file of the function.
+            function (str): The function key, e.g. `Class.method`.
+            prompt_hash (str): The key of the request in the response cache.
+            response (Optional[str], optional): The raw response, on success.
+                Stored with its hash so a resumed run can reuse it.
+                Defaults to None.
+            error (Optional[BaseException], optional): The error, on failure.
+                Defaults to None.
+            fingerprint (Optional[str], optional): The fingerprint of the
+                function code the response was generated for. Defaults to None.
+        """
+        key = (str(source_path), function)
+        entry = {
+            "type": "function",
+            "file": key[0],
+            "function": function,
+            "prompt_hash": prompt_hash,
+            "fingerprint": fingerprint,
+            "status": STATUS_FAILED if error is not None else STATUS_DONE,
+        }
+        if response is not None:
+            entry["response"] = response
+            entry["response_hash"] = text_hash(response)
+        if error is not None:
+            entry["error"] = str(error)
+        self.functions[key] = entry
+        self._append(entry)
+
+    def record_file(
+        self,
+        source_path: Path,
+        output_path: Optional[Path] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Record the outcome of a file.
+
+        Args:
+            source_path (Path): The source file.
+            output_path (Optional[Path], optional): The test file written.
+                Defaults to None.
+            error (Optional[BaseException], optional): Why the file failed, even
+                partially. Defaults to None.
+        """
+        try:
+            source_hash = file_hash(source_path)
+        except OSError:
+            source_hash = None
+
+        key = str(source_path)
+        entry = {
+            "type": "file",
+            "file": key,
+            "output": str(output_path) if output_path else None,
+            "source_hash": source_hash,
+            "status": STATUS_FAILED if error is not None else STATUS_DONE,
+        }
+        if error is not None:
+            entry["error"] = str(error)
+        self.files[key] = entry
+        self._append(entry)
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            self._file.close()
@@ -1,10 +1,21 @@
 """Automated Unit Test Generation CLI with AI."""
 import os
+import threading
+from typing import Iterator, Optional
+
 from dotenv import load_dotenv
-from typing import Optional
+
+from ut.telemetry import increment, span
 
 load_dotenv()
 
+MODEL_NAME = "gemini-flash-lite-latest"
+GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "max_output_tokens": 2048,
+}
+
+
 def _get_genai() -> Optional[object]:
     """Attempt to import the google.generativeai module lazily.
 
@@ -12,38 +23,128 @@ def _get_genai() -> Optional[object]:
     """
     try:
         import google.generativeai as genai
+
         return genai
     except ModuleNotFoundError:
         return None
 
-def generate_test_code(prompt: str) -> str:
-    """Generate test code for a given function.
 
-    Args:
-        prompt (str): The prompt containing the function code and context.
+class GeminiClient:
+    """Long-lived Gemini client holding a configured model.
+
+    The SDK is imported and configured, and the model object built, on the
+    first call only; later calls reuse the same model and its transport.
+    """
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        generation_config: Optional[dict] = None,
+        api_key: Optional[str] = None,
+    ):
+        """Initialize the client.
+
+        Args:
+            model_name (str, optional): The Gemini model to use.
+                Defaults to MODEL_NAME.
+            generation_config (Optional[dict], optional): The generation
+                parameters. Defaults to GENERATION_CONFIG.
+            api_key (Optional[str], optional): The API key. Defaults to the
+                GEMINI_API_KEY environment variable.
+        """
+        self.model_name = model_name
+        self.generation_config = dict(generation_config or GENERATION_CONFIG)
+        self._api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The configured `GenerativeModel`, built on first access."""
+        if self._model is not None:
+            return self._model
+
+        with self._lock:
+            if self._model is None:
+                genai = _get_genai()
+                if genai is None:
+                    raise RuntimeError(
+                        "google-generative-ai is not installed. Install it with: "
+                        "`poetry add google-generative-ai` or "
+                        "`pip install google-generative-ai` to enable generation "
+                        "features."
+                    )
+
+                genai.configure(api_key=self._api_key or os.getenv("GEMINI_API_KEY"))
+                self._model = genai.GenerativeModel(
+                    self.model_name,
+                    generation_config=genai.types.GenerationConfig(
+                        **self.generation_config
+                    ),
+                )
+
+        return self._model
+
+    def generate(self, prompt: str) -> str:
+        """Generate test code for a given prompt.
+
+        Args:
+            prompt (str): The prompt containing the function code and context.
+
+        Returns:
+            str: The generated test code.
+        """
+        with span("gemini.request"):
+            response = self.model.generate_content(prompt)
+
+        # Exact token counts, when the SDK reports them
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            increment("gemini.prompt_tokens", usage.prompt_token_count or 0)
+            increment("gemini.output_tokens", usage.candidates_token_count or 0)
+
+        return response.text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Generate test code, yielding text chunks as they arrive.
+
+        Args:
+            prompt (str): The prompt containing the function code and context.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        for chunk in self.model.generate_content(prompt, stream=True):
+            yield chunk.text
+
+
+_default_client: Optional[GeminiClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> GeminiClient:
+    """Return the process-wide Gemini client, creating it on first use.
 
     Returns:
-        str: The generated test code.
+        GeminiClient: The shared client.
     """
+    global _default_client
 
-    genai = _get_genai()
-    if genai is None:
-        raise RuntimeError(
-            "google-generative-ai is not installed. Install it with: `poetry add google-generative-ai` "
-            "or `pip install google-generative-ai` to enable generation features."
-        )
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = GeminiClient()
 
-    api_key = os.getenv("GEMINI_API_KEY")
-    genai.configure(api_key=api_key)
+    return _default_client
 
-    model = genai.GenerativeModel('gemini-flash-lite-latest')
 
-    response = model.generate_content(
-        prompt,
-        generation_config=genai.types.GenerationConfig(
-            temperature=0.3,
-            max_output_tokens=2048,
-        )
-    )
+def generate_test_code(prompt: str) -> str:
+    """Generate test code for a given function.
 
-    return response.text
\ No newline at end of file
+    Args:
+        prompt (str): The prompt containing the function code and context.
+
+    Returns:
+        str: The generated test code.
+    """
+    return get_default_client().generate(prompt)
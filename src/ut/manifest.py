@@ -0,0 +1,88 @@
+"""Per-function fingerprints used for incremental test regeneration."""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+
+
+def function_key(func_data: dict) -> str:
+    """Return the key identifying a function within its module.
+
+    Args:
+        func_data (dict): A function entry from `source_code_analysis`.
+
+    Returns:
+        str: The qualified name, e.g. `Class.method`, or the function name.
+    """
+    if func_data.get("qualname"):
+        return func_data["qualname"]
+    if func_data.get("class_name"):
+        return f"{func_data['class_name']}.{func_data['function_name']}"
+    return func_data["function_name"]
+
+
+def function_fingerprint(function_code: str) -> str:
+    """Hash the normalized source of a function.
+
+    The code comes from `ast.unparse`, so formatting and comments do not
+    change the fingerprint.
+
+    Args:
+        function_code (str): The unparsed function source.
+
+    Returns:
+        str: The hex SHA-256 digest of the code.
+    """
+    return hashlib.sha256(function_code.encode("utf-8")).hexdigest()
+
+
+def manifest_path(test_file_path: Path) -> Path:
+    """Return the manifest path stored next to a generated test file.
+
+    Args:
+        test_file_path (Path): The generated test file.
+
+    Returns:
+        Path: The hidden manifest file, e.g. `.test_module.py.manifest.json`.
+    """
+    return test_file_path.with_name(f".{test_file_path.name}.manifest.json")
+
+
+def load_manifest(path: Path) -> dict:
+    """Load the function entries of a manifest.
+
+    Args:
+        path (Path): The manifest file.
+
+    Returns:
+        dict: Mapping of function key to `{"fingerprint", "tests"}`. Empty if the
+        manifest is missing, unreadable or from another version.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+
+    return data.get("functions", {})
+
+
+def save_manifest(path: Path, functions: dict) -> None:
+    """Atomically write the function entries of a manifest.
+
+    Args:
+        path (Path): The manifest file.
+        functions (dict): Mapping of function key to `{"fingerprint", "tests"}`.
+    """
+    data = {"version": MANIFEST_VERSION, "functions": functions}
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
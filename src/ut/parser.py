@@ -1,12 +1,199 @@
 """Automated Unit Test Generation CLI with AI."""
 import ast
+import time
 from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+Scope = Union[ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef]
+
+
+class FunctionDescriptor(NamedTuple):
+    """Compact, picklable description of a function found in a module.
+
+    The parent class is referenced by its index in `ModuleDescriptor.classes`
+    so its code is stored once per module rather than once per method.
+    """
+
+    name: str
+    qualname: str
+    code: str
+    span: tuple[int, int]
+    class_id: Optional[int]
+    is_async: bool
+
+
+class ModuleDescriptor(NamedTuple):
+    """Compact, picklable result of parsing a module.
+
+    Produced by `describe_module`, typically in a worker process, and
+    expanded with `expand_functions` by the generation stage.
+    """
+
+    path: str
+    imports: str
+    classes: tuple[tuple[str, str], ...]
+    functions: tuple[FunctionDescriptor, ...]
+    error: Optional[str] = None
+
+
+class _ModuleVisitor(ast.NodeVisitor):
+    """Collect imports and functions of a module in a single tree walk.
+
+    The enclosing scopes are tracked on a stack, so the parent class of a
+    method is known without a parent map, and each class is unparsed once
+    no matter how many methods it has.
+    """
+
+    def __init__(self):
+        self.imports: list[str] = []
+        self.classes: list[tuple[str, str]] = []
+        self.functions: list[FunctionDescriptor] = []
+        self._scopes: list[Scope] = []
+        self._class_ids: dict[ast.ClassDef, int] = {}
+
+    def _class_id(self, node: ast.ClassDef) -> int:
+        if node not in self._class_ids:
+            self._class_ids[node] = len(self.classes)
+            self.classes.append((node.name, ast.unparse(node)))
+        return self._class_ids[node]
+
+    def _visit_scope(self, node: Scope) -> None:
+        self._scopes.append(node)
+        self.generic_visit(node)
+        self._scopes.pop()
+
+    def visit_Import(self, node: ast.AST) -> None:
+        # ast.unparse converts a node back to source code.
+        # This is much more robust than handling line numbers.
+        self.imports.append(ast.unparse(node))
+
+    visit_ImportFrom = visit_Import
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._visit_scope(node)
+
+    def visit_FunctionDef(
+        self, node: Union[ast.FunctionDef, ast.AsyncFunctionDef]
+    ) -> None:
+        # Nested functions cannot be imported by the tests; their code is
+        # already part of the enclosing function, which is the target.
+        if any(not isinstance(scope, ast.ClassDef) for scope in self._scopes):
+            self._visit_scope(node)
+            return
+
+        # ast.unparse(node) gives us the COMPLETE code of the function,
+        # including the `def` signature, the arguments with their type hints,
+        # the return type hint, and the docstring.
+        parent = self._scopes[-1] if self._scopes else None
+        class_id = self._class_id(parent) if isinstance(parent, ast.ClassDef) else None
+
+        self.functions.append(
+            FunctionDescriptor(
+                name=node.name,
+                qualname=".".join(scope.name for scope in [*self._scopes, node]),
+                code=ast.unparse(node),
+                span=(node.lineno, node.end_lineno or node.lineno),
+                class_id=class_id,
+                is_async=isinstance(node, ast.AsyncFunctionDef),
+            )
+        )
+
+        self._visit_scope(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+def _describe(file_path: str) -> ModuleDescriptor:
+    with open(file_path, "r", encoding="utf-8") as f:
+        source_code = f.read()
+
+    visitor = _ModuleVisitor()
+    visitor.visit(ast.parse(source_code))
+
+    return ModuleDescriptor(
+        path=file_path,
+        imports="\n".join(visitor.imports),
+        classes=tuple(visitor.classes),
+        functions=tuple(visitor.functions),
+    )
+
+
+def describe_module(file_path: str) -> ModuleDescriptor:
+    """Parse a module into a picklable descriptor.
+
+    Meant to run in a worker process: errors are returned in the descriptor
+    instead of raised, so one broken file does not abort the whole scan.
+
+    Args:
+        file_path (str): The path to the .py file to analyze.
+
+    Returns:
+        ModuleDescriptor: The imports, classes and functions of the module, or
+        the error message if it could not be read or parsed.
+    """
+    try:
+        return _describe(file_path)
+    except Exception as e:
+        return ModuleDescriptor(file_path, "", (), (), error=str(e))
+
+
+def describe_module_timed(file_path: str) -> tuple[ModuleDescriptor, float]:
+    """Parse a module like `describe_module` and time it.
+
+    Kept in this lightweight module so the parser processes only need to
+    import `ast` to run it.
+
+    Args:
+        file_path (str): The path to the .py file to analyze.
+
+    Returns:
+        tuple[ModuleDescriptor, float]: The descriptor and the parse time in
+        seconds, recorded by the parent process.
+    """
+    start = time.perf_counter()
+    descriptor = describe_module(file_path)
+    return descriptor, time.perf_counter() - start
+
+
+def expand_functions(descriptor: ModuleDescriptor) -> list[dict]:
+    """Expand a module descriptor into the function entries used for prompts.
+
+    Args:
+        descriptor (ModuleDescriptor): The descriptor from `describe_module`.
+
+    Returns:
+        list[dict]: The same entries as returned by `source_code_analysis`.
+    """
+    functions = []
+    for function in descriptor.functions:
+        class_name = None
+        parent_class_code = None
+        if function.class_id is not None:
+            class_name, parent_class_code = descriptor.classes[function.class_id]
+
+        functions.append(
+            {
+                "function_name": function.name,
+                "qualname": function.qualname,
+                "function_code": function.code,
+                "class_name": class_name,
+                "parent_class_code": parent_class_code,
+                "is_async": function.is_async,
+            }
+        )
+
+    return functions
 
 
 def source_code_analysis(file_path: str) -> tuple[str, list[dict]]:
     """Analyze a Python source file and extract import statements \
     and detailed information about each function.
 
+    Functions are returned in source order, including async functions and
+    methods of nested classes. Functions defined inside other functions are
+    left out: they are not importable and stay in their enclosing function's
+    code.
+
     Args:
         file_path: The path to the .py file to analyze.
 
@@ -14,56 +201,12 @@ def source_code_analysis(file_path: str) -> tuple[str, list[dict]]:
         A tuple containing:
         - A string with all the import statements found.
         - A list of dictionaries, where each dictionary represents a function
-        and contains its name, full source code,
-        and the code of its parent class (if it exists).
+        and contains its name, qualified name, full source code, whether it is
+        async, and the name and code of its parent class (if it exists).
     """
+    descriptor = _describe(file_path)
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        source_code = f.read()
-
-    tree = ast.parse(source_code)
-
-    # --- Step 1: Extract all imports ---
-    imports = []
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.Import, ast.ImportFrom)):
-            # ast.unparse converts a node back to source code.
-            # This is much more robust than handling line numbers.
-            imports.append(ast.unparse(node))
-
-    imports_code = "\n".join(imports)
-
-    # --- Preparation for finding parent classes ---
-    # ast does not keep references to parent nodes, so we create them ourselves
-    # to be able to look up the tree from a function.
-    parent_map = {
-        child: parent
-        for parent in ast.walk(tree)
-        for child in ast.iter_child_nodes(parent)
-    }
-
-    # --- Step 2 and 3: Extract functions, docstrings, type hints and parent classes ---
-    functions_analysis = []
-    for node in ast.walk(tree):
-        if isinstance(node, ast.FunctionDef):
-            # ast.unparse(node) gives us the COMPLETE code of the function,
-            # including the `def` signature, the arguments with their type hints,
-            # the return type hint, and the docstring.
-            function_code = ast.unparse(node)
-
-            parent_class_code = None
-            parent = parent_map.get(node)
-            if parent and isinstance(parent, ast.ClassDef):
-                parent_class_code = ast.unparse(parent)
-
-            analysis = {
-                "function_name": node.name,
-                "function_code": function_code,
-                "parent_class_code": parent_class_code,
-            }
-            functions_analysis.append(analysis)
-
-    return imports_code, functions_analysis
+    return descriptor.imports, expand_functions(descriptor)
 
 
 def calculate_import_path_simple(file_path: Path) -> str:
@@ -0,0 +1,98 @@
+"""Packing of small functions into a single prompt and splitting of the answer."""
+import re
+
+from ut.constants import BATCH_MAX_FUNCTIONS
+from ut.prompts.context import estimate_tokens
+
+SECTION_MARKER = "# === TESTS FOR: {name} ==="
+SECTION_PATTERN = re.compile(r"^[ \t]*#\s*=+\s*TESTS FOR:\s*([\w.]+)\s*=+[ \t]*$", re.M)
+IMPORT_PATTERN = re.compile(r"^(?:import|from)\s.*$", re.M)
+
+
+def section_marker(name: str) -> str:
+    """Return the marker line opening the tests of a function.
+
+    Args:
+        name (str): The qualified name of the function.
+
+    Returns:
+        str: The marker line.
+    """
+    return SECTION_MARKER.format(name=name)
+
+
+def plan_batches(
+    functions: list[dict],
+    overhead_tokens: int,
+    token_budget: int,
+    max_size: int = BATCH_MAX_FUNCTIONS,
+) -> list[list[dict]]:
+    """Group functions, in order, into batches fitting one prompt each.
+
+    Args:
+        functions (list[dict]): The function entries to group.
+        overhead_tokens (int): The tokens of the batch prompt without any function.
+        token_budget (int): The maximum tokens of a prompt; 0 disables the budget.
+        max_size (int, optional): The maximum number of functions per batch.
+            Defaults to BATCH_MAX_FUNCTIONS.
+
+    Returns:
+        list[list[dict]]: The batches. A function too large for the budget gets
+        a batch of its own.
+    """
+    batches: list[list[dict]] = []
+    current: list[dict] = []
+    current_tokens = overhead_tokens
+
+    for func_data in functions:
+        tokens = estimate_tokens(func_data["function_code"]) + estimate_tokens(
+            section_marker(func_data["qualname"])
+        )
+        fits = not token_budget or current_tokens + tokens <= token_budget
+        duplicate = any(f["qualname"] == func_data["qualname"] for f in current)
+
+        if current and (len(current) >= max_size or not fits or duplicate):
+            batches.append(current)
+            current = []
+            current_tokens = overhead_tokens
+
+        current.append(func_data)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def split_batch_response(response: str, names: list[str]) -> dict[str, str]:
+    """Split a batch response into the tests of each function.
+
+    Imports written before the first marker are shared by every section.
+
+    Args:
+        response (str): The raw LLM response.
+        names (list[str]): The qualified names of the functions in the batch.
+
+    Returns:
+        dict[str, str]: The test code of each function whose section was found.
+        Functions without a section are left out, so they can be retried alone.
+    """
+    matches = list(SECTION_PATTERN.finditer(response))
+    if not matches:
+        return {}
+
+    preamble = "\n".join(IMPORT_PATTERN.findall(response[: matches[0].start()]))
+
+    sections: dict[str, list[str]] = {}
+    for i, match in enumerate(matches):
+        name = match.group(1)
+        if name not in names:
+            continue
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(response)
+        sections.setdefault(name, []).append(response[match.end() : end].strip())
+
+    return {
+        name: "\n\n".join([preamble, *parts]).strip()
+        for name, parts in sections.items()
+    }
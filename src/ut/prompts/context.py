@@ -0,0 +1,150 @@
+"""Class context pruning for token-budgeted prompts."""
+import ast
+import copy
+from functools import lru_cache
+from typing import Optional, Union
+
+from ut.constants import CHARS_PER_TOKEN
+
+FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+
+# Methods kept in full whenever the budget allows, since tests build the instance
+ALWAYS_KEPT_METHODS = {"__init__"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens of a text.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+@lru_cache(maxsize=32)
+def _parse_class(class_code: str) -> Optional[ast.ClassDef]:
+    # Every method of a class shares the same class code, so it is parsed once.
+    # The cached tree is never mutated: pruned classes are built from copies.
+    try:
+        tree = ast.parse(class_code)
+    except SyntaxError:
+        return None
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            return node
+    return None
+
+
+def _referenced_names(node: FunctionNode, class_name: str) -> set[str]:
+    names = set()
+    for child in ast.walk(node):
+        if (
+            isinstance(child, ast.Attribute)
+            and isinstance(child.value, ast.Name)
+            and child.value.id in ("self", "cls", class_name)
+        ):
+            names.add(child.attr)
+    return names
+
+
+def _referenced_methods(
+    methods: dict[str, list[FunctionNode]], target: str, class_name: str
+) -> set[str]:
+    """Return the sibling methods reachable from the target method."""
+    seen = set()
+    pending = [target]
+    while pending:
+        name = pending.pop()
+        for node in methods.get(name, []):
+            for ref in _referenced_names(node, class_name):
+                if ref in methods and ref != target and ref not in seen:
+                    seen.add(ref)
+                    pending.append(ref)
+    return seen
+
+
+def _stub(node: FunctionNode, keep_docstring: bool) -> FunctionNode:
+    stub = copy.copy(node)
+    body: list[ast.stmt] = []
+    if keep_docstring and ast.get_docstring(node) is not None:
+        body.append(node.body[0])
+    body.append(ast.Expr(ast.Constant(...)))
+    stub.body = body
+    return stub
+
+
+def _render(
+    class_node: ast.ClassDef,
+    full: set[str],
+    keep_docstrings: bool,
+    keep_stubs: bool,
+) -> str:
+    body = []
+    for node in class_node.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            body.append(node)
+        elif node.name in full:
+            body.append(node)
+        elif keep_stubs:
+            body.append(_stub(node, keep_docstrings))
+
+    pruned = copy.copy(class_node)
+    pruned.body = body or [ast.Pass()]
+    return ast.unparse(pruned)
+
+
+def prune_class_context(
+    class_code: str, method_name: str, token_budget: Optional[int] = None
+) -> str:
+    """Reduce a class to the context needed to test one of its methods.
+
+    The target method is always kept in full, together with `__init__` and
+    the sibling methods it references, directly or transitively, through
+    `self`, `cls` or the class name. Other methods are reduced to their
+    signature and docstring. When a budget is given, the context is
+    shrunk further until it fits: referenced siblings are stubbed, then
+    docstrings are dropped, then the stubs themselves.
+
+    Args:
+        class_code (str): The source code of the class.
+        method_name (str): The name of the method under test.
+        token_budget (Optional[int], optional): The maximum number of tokens
+            for the returned code. Defaults to None (no budget).
+
+    Returns:
+        str: The pruned class code. It only exceeds the budget if the target
+        method alone does not fit.
+    """
+    class_node = _parse_class(class_code)
+    if class_node is None:
+        return class_code
+
+    methods: dict[str, list[FunctionNode]] = {}
+    for node in class_node.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            methods.setdefault(node.name, []).append(node)
+
+    if method_name not in methods:
+        return class_code
+
+    referenced = _referenced_methods(methods, method_name, class_node.name)
+    kept = (referenced | ALWAYS_KEPT_METHODS) & set(methods)
+
+    # Candidates from the most to the least complete context
+    levels = [
+        ({method_name} | kept, True, True),
+        ({method_name}, True, True),
+        ({method_name}, False, True),
+        ({method_name}, False, False),
+    ]
+
+    context = class_code
+    for full, keep_docstrings, keep_stubs in levels:
+        context = _render(class_node, full, keep_docstrings, keep_stubs)
+        if token_budget is None or estimate_tokens(context) <= token_budget:
+            break
+
+    return context
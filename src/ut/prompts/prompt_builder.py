@@ -1,34 +1,63 @@
 """Automated Unit Test Generation CLI with AI."""
-from ut.constants import FILE_PATH_PROMPT
+from typing import Optional
 
-
-def _load_prompt(prompt_file):
-    try:
-        full_path = f"{FILE_PATH_PROMPT}/{prompt_file}"
-        with open(full_path, "r", encoding="utf-8") as f:
-            return f.read()
-    except FileNotFoundError:
-        exit(1)
+from ut.prompts.batch import section_marker
+from ut.prompts.context import estimate_tokens, prune_class_context
+from ut.prompts.templates import (
+    BATCH_TEMPLATE,
+    CLASS_TEMPLATE,
+    STANDALONE_TEMPLATE,
+    get_registry,
+)
 
 
 def generate_class_method_prompt(
     imports_code: str,
     function_name: str,
     parent_class_code: str,
+    token_budget: Optional[int] = None,
 ) -> str:
-    """Generate prompt for class method testing."""
+    """Generate prompt for class method testing.
+
+    Only the context the method needs is sent: sibling methods it does not
+    reference are reduced to their signature and docstring, and the class is
+    pruned further if the prompt would exceed `token_budget` tokens.
+    """
+
+    template = get_registry().get(CLASS_TEMPLATE)
+
+    class_budget = None
+    if token_budget:
+        rest = template.render(
+            imports_code=imports_code, function_name=function_name, parent_class_code=""
+        )
+        class_budget = max(0, token_budget - estimate_tokens(rest))
 
-    prompt_template = _load_prompt("generate_unittest_class.txt")
-    prompt = prompt_template.replace("{{imports_code}}", imports_code)
-    prompt = prompt.replace("{{function_name}}", function_name)
-    prompt = prompt.replace("{{parent_class_code}}", parent_class_code)
-    return prompt
+    class_context = prune_class_context(parent_class_code, function_name, class_budget)
+    return template.render(
+        imports_code=imports_code,
+        function_name=function_name,
+        parent_class_code=class_context,
+    )
 
 
 def generate_standalone_prompt(imports_code: str, function_code: str) -> str:
     """Generate prompt for standalone function testing."""
 
-    prompt_template = _load_prompt("generate_unittest_standalone.txt")
-    prompt = prompt_template.replace("{{imports_code}}", imports_code)
-    prompt = prompt.replace("{{function_code}}", function_code)
-    return prompt
+    template = get_registry().get(STANDALONE_TEMPLATE)
+    return template.render(imports_code=imports_code, function_code=function_code)
+
+
+def generate_batch_prompt(imports_code: str, functions: list[dict]) -> str:
+    """Generate one prompt testing several standalone functions.
+
+    The model is asked to open the tests of each function with its section
+    marker, so the response can be split with `split_batch_response`.
+    """
+
+    template = get_registry().get(BATCH_TEMPLATE)
+    return template.render(
+        imports_code=imports_code,
+        functions_code="\n\n\n".join(f["function_code"] for f in functions),
+        section_markers="\n".join(section_marker(f["qualname"]) for f in functions),
+    )
@@ -0,0 +1,190 @@
+"""Prompt templates loaded and compiled once per process."""
+import os
+import re
+import threading
+from typing import Optional
+
+from ut.constants import FILE_PATH_PROMPT
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+CLASS_TEMPLATE = "generate_unittest_class.txt"
+STANDALONE_TEMPLATE = "generate_unittest_standalone.txt"
+BATCH_TEMPLATE = "generate_unittest_batch.txt"
+
+# Placeholders each template may use, and the ones it must use
+TEMPLATE_PLACEHOLDERS = {
+    CLASS_TEMPLATE: {"imports_code", "function_name", "parent_class_code"},
+    STANDALONE_TEMPLATE: {"imports_code", "function_code"},
+    BATCH_TEMPLATE: {"imports_code", "functions_code", "section_markers"},
+}
+REQUIRED_PLACEHOLDERS = {
+    CLASS_TEMPLATE: {"parent_class_code"},
+    STANDALONE_TEMPLATE: {"function_code"},
+    BATCH_TEMPLATE: {"functions_code", "section_markers"},
+}
+
+
+class PromptTemplateError(Exception):
+    """Raised when a prompt template is missing, invalid or badly rendered."""
+
+
+class PromptTemplate:
+    """A template split once into literal text and `{{name}}` placeholders."""
+
+    def __init__(self, name: str, text: str):
+        """Compile a template.
+
+        Args:
+            name (str): The template name, used in error messages.
+            text (str): The template text.
+        """
+        self.name = name
+        # Even indexes are literal text, odd indexes are placeholder names
+        self._parts = PLACEHOLDER_PATTERN.split(text)
+        self.placeholders = set(self._parts[1::2])
+
+    def render(self, **values: str) -> str:
+        """Fill every placeholder in a single pass.
+
+        Values are inserted verbatim, so code containing `{{...}}` is never
+        substituted again.
+
+        Args:
+            **values (str): The value of each placeholder.
+
+        Raises:
+            PromptTemplateError: If a placeholder has no value.
+
+        Returns:
+            str: The rendered prompt.
+        """
+        missing = self.placeholders - values.keys()
+        if missing:
+            raise PromptTemplateError(
+                f"Missing values for {', '.join(sorted(missing))} "
+                f"in template '{self.name}'"
+            )
+
+        parts = self._parts[:]
+        parts[1::2] = [values[name] for name in self._parts[1::2]]
+        return "".join(parts)
+
+
+class TemplateRegistry:
+    """Thread-safe cache of the compiled prompt templates.
+
+    Templates are read from `directory` when given, falling back to the
+    built-in templates for the files it does not provide.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """Initialize the registry.
+
+        Args:
+            directory (Optional[str], optional): A directory of user templates.
+                Defaults to None (built-in templates only).
+        """
+        self.directory = directory
+        self._templates: dict[str, PromptTemplate] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        if self.directory:
+            user_path = os.path.join(self.directory, name)
+            if os.path.isfile(user_path):
+                return user_path
+        return os.path.join(FILE_PATH_PROMPT, name)
+
+    def _load(self, name: str) -> PromptTemplate:
+        path = self._path(name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                template = PromptTemplate(name, f.read())
+        except OSError as e:
+            raise PromptTemplateError(f"Cannot read template '{path}': {e}") from e
+
+        allowed = TEMPLATE_PLACEHOLDERS.get(name)
+        if allowed is not None:
+            unknown = template.placeholders - allowed
+            missing = REQUIRED_PLACEHOLDERS[name] - template.placeholders
+            if unknown:
+                raise PromptTemplateError(
+                    f"Unknown placeholders {', '.join(sorted(unknown))} in '{path}'"
+                )
+            if missing:
+                raise PromptTemplateError(
+                    f"Template '{path}' must use {', '.join(sorted(missing))}"
+                )
+
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        """Return a compiled template, loading it on first use.
+
+        Args:
+            name (str): The template file name.
+
+        Raises:
+            PromptTemplateError: If the template cannot be read or is invalid.
+
+        Returns:
+            PromptTemplate: The compiled template.
+        """
+        template = self._templates.get(name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(name)
+                if template is None:
+                    template = self._load(name)
+                    self._templates[name] = template
+        return template
+
+    def preload(self) -> None:
+        """Load and validate every known template.
+
+        Raises:
+            PromptTemplateError: If the directory does not exist or a template
+                is unreadable or invalid.
+        """
+        if self.directory and not os.path.isdir(self.directory):
+            raise PromptTemplateError(
+                f"Template directory '{self.directory}' does not exist"
+            )
+        for name in TEMPLATE_PLACEHOLDERS:
+            self.get(name)
+
+
+_registry = TemplateRegistry()
+
+
+def get_registry() -> TemplateRegistry:
+    """Return the process-wide template registry.
+
+    Returns:
+        TemplateRegistry: The registry used by the prompt builders.
+    """
+    return _registry
+
+
+def set_template_dir(directory: Optional[str]) -> TemplateRegistry:
+    """Validate a template directory and make it the process-wide registry.
+
+    The current registry is kept if validation fails.
+
+    Args:
+        directory (Optional[str]): A directory of user templates, or None for
+            the built-in templates.
+
+    Raises:
+        PromptTemplateError: If the directory or one of its templates is invalid.
+
+    Returns:
+        TemplateRegistry: The new registry.
+    """
+    global _registry
+
+    registry = TemplateRegistry(directory)
+    registry.preload()
+    _registry = registry
+    return registry
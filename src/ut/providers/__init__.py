@@ -0,0 +1,82 @@
+"""Async LLM providers used to generate tests."""
+from typing import Optional
+
+from ut.llm_client import GeminiClient, get_default_client
+from ut.providers.base import DEFAULT_MAX_CONCURRENCY, BaseProvider, LLMProvider
+from ut.providers.fake import FakeProvider
+from ut.providers.gemini import GeminiProvider
+from ut.providers.ollama import OllamaProvider
+from ut.providers.resilience import (
+    DEFAULT_MAX_RETRIES,
+    AdaptiveConcurrency,
+    ProviderError,
+    ResilientProvider,
+    TokenBucketLimiter,
+    classify_error,
+)
+
+PROVIDER_NAMES = ("gemini", "ollama", "fake")
+
+__all__ = [
+    "DEFAULT_MAX_CONCURRENCY",
+    "DEFAULT_MAX_RETRIES",
+    "PROVIDER_NAMES",
+    "AdaptiveConcurrency",
+    "BaseProvider",
+    "FakeProvider",
+    "GeminiProvider",
+    "LLMProvider",
+    "OllamaProvider",
+    "ProviderError",
+    "ResilientProvider",
+    "TokenBucketLimiter",
+    "classify_error",
+    "get_default_provider",
+    "get_provider",
+]
+
+
+def get_provider(name: str = "gemini", model_name: Optional[str] = None) -> LLMProvider:
+    """Build a provider by name.
+
+    Args:
+        name (str, optional): One of PROVIDER_NAMES. Defaults to "gemini".
+        model_name (Optional[str], optional): The model to use. Defaults to the
+            provider's default model.
+
+    Raises:
+        ValueError: If the provider name is unknown.
+
+    Returns:
+        LLMProvider: The provider.
+    """
+    if name == "gemini":
+        client = GeminiClient(model_name=model_name) if model_name else None
+        return GeminiProvider(client)
+    if name == "ollama":
+        return OllamaProvider(model_name=model_name) if model_name else OllamaProvider()
+    if name == "fake":
+        return FakeProvider()
+
+    raise ValueError(
+        f"Unknown provider '{name}', expected one of: {', '.join(PROVIDER_NAMES)}"
+    )
+
+
+_default_provider: Optional[LLMProvider] = None
+
+
+def get_default_provider() -> LLMProvider:
+    """Return the process-wide Gemini provider, with retries on transient errors.
+
+    The provider is shared so every caller draws from the same retry and
+    concurrency state.
+
+    Returns:
+        LLMProvider: The provider.
+    """
+    global _default_provider
+
+    if _default_provider is None:
+        _default_provider = ResilientProvider(GeminiProvider(get_default_client()))
+    return _default_provider
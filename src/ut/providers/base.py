@@ -0,0 +1,119 @@
+"""Common async interface for LLM backends."""
+import asyncio
+from abc import ABC, abstractmethod
+from typing import (
+    AsyncIterator,
+    Iterator,
+    Protocol,
+    TypeVar,
+    Union,
+    cast,
+    runtime_checkable,
+)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+@runtime_checkable
+class LLMProvider(Protocol):
+    """Protocol implemented by every LLM backend."""
+
+    name: str
+    model_name: str
+    generation_config: dict
+
+    async def generate(self, prompt: str) -> str:
+        """Generate a complete response for a prompt."""
+        ...
+
+    async def generate_many(
+        self, prompts: list[str], max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ) -> list[str]:
+        """Generate responses for several prompts, in the order of the prompts."""
+        ...
+
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the response to a prompt chunk by chunk."""
+        ...
+
+
+class BaseProvider(ABC):
+    """Shared implementation of `generate_many` and a non-streaming `stream`.
+
+    Subclasses must implement `generate`, and may override `stream` when the
+    backend can send partial responses.
+    """
+
+    name = "base"
+
+    def __init__(self, model_name: str, generation_config: dict):
+        """Initialize the provider.
+
+        Args:
+            model_name (str): The model used by the backend.
+            generation_config (dict): The generation parameters.
+        """
+        self.model_name = model_name
+        self.generation_config = dict(generation_config)
+
+    @abstractmethod
+    async def generate(self, prompt: str) -> str:
+        """Generate a complete response for a prompt.
+
+        Args:
+            prompt (str): The prompt to send.
+
+        Returns:
+            str: The generated text.
+        """
+
+    async def generate_many(
+        self, prompts: list[str], max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ) -> list[str]:
+        """Generate responses for several prompts concurrently.
+
+        Args:
+            prompts (list[str]): The prompts to send.
+            max_concurrency (int, optional): The maximum number of requests in
+                flight. Defaults to DEFAULT_MAX_CONCURRENCY.
+
+        Returns:
+            list[str]: The responses, in the same order as the prompts.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _generate(prompt: str) -> str:
+            async with semaphore:
+                return await self.generate(prompt)
+
+        return list(await asyncio.gather(*(_generate(p) for p in prompts)))
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the response to a prompt chunk by chunk.
+
+        Args:
+            prompt (str): The prompt to send.
+
+        Yields:
+            str: The next chunk of text. This default yields a single chunk.
+        """
+        yield await self.generate(prompt)
+
+
+async def iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """Consume a blocking iterator from a worker thread.
+
+    Args:
+        iterator (Iterator[T]): The blocking iterator, e.g. a streaming response.
+
+    Yields:
+        T: The items of the iterator, without blocking the event loop.
+    """
+    sentinel = object()
+    while True:
+        item: Union[T, object] = await asyncio.to_thread(next, iterator, sentinel)
+        if item is sentinel:
+            return
+        yield cast(T, item)
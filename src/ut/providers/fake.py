@@ -0,0 +1,75 @@
+"""Offline provider used for tests and throughput benchmarks."""
+import asyncio
+import re
+from typing import AsyncIterator
+
+from ut.providers.base import BaseProvider
+
+FUNCTION_NAME_PATTERN = re.compile(r"def (\w+)\(")
+
+
+class FakeProvider(BaseProvider):
+    """Provider answering with a trivial test after a fixed simulated latency.
+
+    No network is involved, so the concurrency of the pipeline can be measured
+    on its own.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.05, chunks: int = 4):
+        """Initialize the provider.
+
+        Args:
+            latency (float, optional): Seconds spent on each request.
+                Defaults to 0.05.
+            chunks (int, optional): Number of chunks yielded by `stream`.
+                Defaults to 4.
+        """
+        super().__init__("fake", {})
+        self.latency = latency
+        self.chunks = max(1, chunks)
+        self.calls = 0
+
+    @staticmethod
+    def make_response(prompt: str) -> str:
+        """Build the test returned for a prompt.
+
+        Args:
+            prompt (str): The prompt sent to the provider.
+
+        Returns:
+            str: A pytest function checking the first function of the prompt.
+        """
+        match = FUNCTION_NAME_PATTERN.search(prompt)
+        name = match.group(1) if match else "function"
+        return f"def test_{name}():\n    assert {name} is not None\n"
+
+    async def generate(self, prompt: str) -> str:
+        """Return a trivial test after the simulated latency.
+
+        Args:
+            prompt (str): The prompt to answer.
+
+        Returns:
+            str: The generated test.
+        """
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self.make_response(prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the trivial test in chunks spread over the simulated latency.
+
+        Args:
+            prompt (str): The prompt to answer.
+
+        Yields:
+            str: The next chunk of the generated test.
+        """
+        self.calls += 1
+        response = self.make_response(prompt)
+        size = -(-len(response) // self.chunks)
+        for start in range(0, len(response), size):
+            await asyncio.sleep(self.latency / self.chunks)
+            yield response[start : start + size]
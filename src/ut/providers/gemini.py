@@ -0,0 +1,50 @@
+"""Gemini implementation of the LLM provider interface."""
+import asyncio
+from typing import AsyncIterator, Optional
+
+from ut.llm_client import GeminiClient
+from ut.providers.base import BaseProvider, iterate_in_thread
+
+
+class GeminiProvider(BaseProvider):
+    """Async wrapper around a shared `GeminiClient`.
+
+    The SDK's async transport is bound to the event loop that created it, so
+    calls go through the synchronous client on worker threads instead. This
+    keeps one configured model usable from any loop or thread.
+    """
+
+    name = "gemini"
+
+    def __init__(self, client: Optional[GeminiClient] = None):
+        """Initialize the provider.
+
+        Args:
+            client (Optional[GeminiClient], optional): The client to use.
+                Defaults to a new client with the default model.
+        """
+        self.client = client or GeminiClient()
+        super().__init__(self.client.model_name, self.client.generation_config)
+
+    async def generate(self, prompt: str) -> str:
+        """Generate a complete response for a prompt.
+
+        Args:
+            prompt (str): The prompt to send.
+
+        Returns:
+            str: The generated text.
+        """
+        return await asyncio.to_thread(self.client.generate, prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the response to a prompt chunk by chunk.
+
+        Args:
+            prompt (str): The prompt to send.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        async for chunk in iterate_in_thread(self.client.stream(prompt)):
+            yield chunk
@@ -0,0 +1,105 @@
+"""Ollama implementation of the LLM provider interface."""
+import asyncio
+import json
+import os
+import urllib.request
+from typing import AsyncIterator, Iterator, Optional
+
+from ut.llm_client import GENERATION_CONFIG
+from ut.providers.base import BaseProvider, iterate_in_thread
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL_NAME = "llama3"
+OLLAMA_TIMEOUT = 120
+
+
+class OllamaProvider(BaseProvider):
+    """Provider talking to a local Ollama server over its HTTP API.
+
+    This is separate from the root-level `ollama_client` module on purpose:
+    that module belongs to the web demo, is not part of the installed `ut`
+    package and needs `requests`, which `ut` does not depend on. Only the
+    standard library is used here. Both default to the same model,
+    OLLAMA_MODEL_NAME, and the demo picks its own model explicitly.
+    """
+
+    name = "ollama"
+
+    def __init__(
+        self,
+        model_name: str = OLLAMA_MODEL_NAME,
+        generation_config: Optional[dict] = None,
+        base_url: str = OLLAMA_BASE_URL,
+        timeout: float = OLLAMA_TIMEOUT,
+    ):
+        """Initialize the provider.
+
+        Args:
+            model_name (str, optional): The Ollama model. Defaults to
+                OLLAMA_MODEL_NAME.
+            generation_config (Optional[dict], optional): The generation
+                parameters. Defaults to GENERATION_CONFIG.
+            base_url (str, optional): The Ollama server URL. Defaults to the
+                OLLAMA_HOST environment variable or localhost.
+            timeout (float, optional): The request timeout in seconds.
+                Defaults to OLLAMA_TIMEOUT.
+        """
+        super().__init__(model_name, generation_config or GENERATION_CONFIG)
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, prompt: str, stream: bool):
+        options = {"temperature": self.generation_config.get("temperature")}
+        if "max_output_tokens" in self.generation_config:
+            options["num_predict"] = self.generation_config["max_output_tokens"]
+
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "options": options,
+        }
+        request = urllib.request.Request(
+            f"{self.base_url}/api/generate",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _generate_sync(self, prompt: str) -> str:
+        with self._request(prompt, stream=False) as response:
+            return json.loads(response.read())["response"]
+
+    def _stream_sync(self, prompt: str) -> Iterator[str]:
+        with self._request(prompt, stream=True) as response:
+            for line in response:
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    return
+
+    async def generate(self, prompt: str) -> str:
+        """Generate a complete response for a prompt.
+
+        Args:
+            prompt (str): The prompt to send.
+
+        Returns:
+            str: The generated text.
+        """
+        return await asyncio.to_thread(self._generate_sync, prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the response to a prompt token by token.
+
+        Args:
+            prompt (str): The prompt to send.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        async for chunk in iterate_in_thread(self._stream_sync(prompt)):
+            yield chunk
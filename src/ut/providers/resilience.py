@@ -0,0 +1,417 @@
+"""Rate limiting, retries and adaptive concurrency around any provider."""
+import asyncio
+import random
+import re
+import threading
+import time
+import urllib.error
+from typing import AsyncIterator, Optional
+
+from ut.prompts.context import estimate_tokens
+from ut.providers.base import BaseProvider, LLMProvider
+from ut.telemetry import increment
+
+DEFAULT_MAX_RETRIES = 4
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+
+# Adaptive concurrency: additive increase, multiplicative decrease
+CONCURRENCY_DECREASE = 0.5
+LATENCY_DECREASE = 0.9
+LATENCY_TOLERANCE = 2.0
+LATENCY_SMOOTHING = 0.2
+SLOT_POLL_INTERVAL = 0.02
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+THROTTLING_STATUS_CODES = {429, 503}
+# Exception names of the Gemini SDK, matched by name so it stays optional
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted": True,
+    "TooManyRequests": True,
+    "ServiceUnavailable": True,
+    "DeadlineExceeded": False,
+    "InternalServerError": False,
+}
+RETRY_DELAY_PATTERN = re.compile(
+    r"(?:retry[_ ]delay\s*\{\s*seconds:\s*|retry in\s+)(\d+(?:\.\d+)?)", re.I
+)
+
+
+class ProviderError(Exception):
+    """Raised by providers with a hint on whether the request can be retried."""
+
+    def __init__(
+        self,
+        message: str,
+        retryable: bool = False,
+        retry_after: Optional[float] = None,
+        throttled: bool = False,
+    ):
+        """Initialize the error.
+
+        Args:
+            message (str): The error message.
+            retryable (bool, optional): Whether sending the request again may
+                succeed. Defaults to False.
+            retry_after (Optional[float], optional): Seconds the backend asked
+                to wait before retrying. Defaults to None.
+            throttled (bool, optional): Whether the backend rejected the request
+                because of its rate limits. Defaults to False.
+        """
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def classify_error(error: BaseException) -> ProviderError:
+    """Describe an error raised by a backend in terms of retries.
+
+    Args:
+        error (BaseException): The error raised by the backend.
+
+    Returns:
+        ProviderError: The error itself if it is one, otherwise a ProviderError
+        telling whether it is retryable, throttling, and how long to wait.
+    """
+    if isinstance(error, ProviderError):
+        return error
+
+    if isinstance(error, urllib.error.HTTPError):
+        return ProviderError(
+            str(error),
+            retryable=error.code in RETRYABLE_STATUS_CODES,
+            retry_after=_parse_retry_after(error.headers.get("Retry-After")),
+            throttled=error.code in THROTTLING_STATUS_CODES,
+        )
+
+    if isinstance(error, (TimeoutError, ConnectionError, urllib.error.URLError)):
+        return ProviderError(str(error), retryable=True)
+
+    name = type(error).__name__
+    if name in RETRYABLE_ERROR_NAMES:
+        match = RETRY_DELAY_PATTERN.search(str(error))
+        return ProviderError(
+            str(error),
+            retryable=True,
+            retry_after=float(match.group(1)) if match else None,
+            throttled=RETRYABLE_ERROR_NAMES[name],
+        )
+
+    return ProviderError(str(error))
+
+
+class TokenBucketLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared by all workers.
+
+    Each bucket refills continuously and may go into debt: a caller takes its
+    share right away and sleeps until the debt is paid back, so concurrent
+    callers are spaced out instead of all retrying at once. The state is
+    guarded by a thread lock, so one limiter can serve several event loops.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        """Initialize the limiter.
+
+        Args:
+            requests_per_minute (float, optional): The request rate; 0 disables
+                the limit. Defaults to 0.
+            tokens_per_minute (float, optional): The token rate; 0 disables the
+                limit. Defaults to 0.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(
+            self.requests_per_minute,
+            self._requests + elapsed * self.requests_per_minute / 60,
+        )
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + elapsed * self.tokens_per_minute / 60,
+        )
+
+    def reserve(self, tokens: int = 0, requests: int = 1) -> float:
+        """Take a request and tokens from the buckets.
+
+        Args:
+            tokens (int, optional): The tokens to take. Defaults to 0.
+            requests (int, optional): The requests to take. Defaults to 1.
+
+        Returns:
+            float: The seconds to wait before sending the request.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = 0.0
+            if self.requests_per_minute:
+                self._requests -= requests
+                wait = max(wait, -self._requests * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                # A request larger than the bucket waits for a full bucket only
+                self._tokens -= min(tokens, self.tokens_per_minute)
+                wait = max(wait, -self._tokens * 60 / self.tokens_per_minute)
+            return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until a request of `tokens` tokens may be sent.
+
+        Args:
+            tokens (int, optional): The estimated tokens of the request.
+                Defaults to 0.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit tuned from the observed latency and errors.
+
+    The limit grows by one slot per limit-worth of fast successes, shrinks a
+    little when the latency drifts above LATENCY_TOLERANCE times the best
+    latency seen, and is halved when the backend throttles or times out.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, initial: Optional[int] = None):
+        """Initialize the limit.
+
+        Args:
+            maximum (int): The highest concurrency allowed.
+            minimum (int, optional): The lowest concurrency allowed. Defaults to 1.
+            initial (Optional[int], optional): The starting concurrency.
+                Defaults to `maximum`.
+        """
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = float(initial or self.maximum)
+        self.inflight = 0
+        self._best_latency: Optional[float] = None
+        self._latency: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free.
+
+        Returns:
+            bool: True if the slot was taken.
+        """
+        with self._lock:
+            if self.inflight < int(self.limit):
+                self.inflight += 1
+                return True
+            return False
+
+    async def acquire(self) -> None:
+        """Wait for a free slot."""
+        while not self.try_acquire():
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False):
+        """Free a slot and adapt the limit to the outcome of the request.
+
+        Args:
+            latency (Optional[float], optional): The latency of a successful
+                request, in seconds. Defaults to None (the request failed).
+            throttled (bool, optional): Whether the request failed because of
+                rate limits or timeouts. Defaults to False.
+        """
+        with self._lock:
+            self.inflight -= 1
+
+            if throttled:
+                self.limit = max(self.minimum, self.limit * CONCURRENCY_DECREASE)
+                return
+            if latency is None:
+                return
+
+            if self._best_latency is None or latency < self._best_latency:
+                self._best_latency = latency
+            self._latency = (
+                latency
+                if self._latency is None
+                else LATENCY_SMOOTHING * latency
+                + (1 - LATENCY_SMOOTHING) * self._latency
+            )
+
+            if self._latency > LATENCY_TOLERANCE * self._best_latency:
+                self.limit = max(self.minimum, self.limit * LATENCY_DECREASE)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+
+class ResilientProvider(BaseProvider):
+    """Provider wrapper adding rate limits, retries and adaptive concurrency.
+
+    The wrapper keeps the name, model and generation config of the wrapped
+    provider, so cache keys do not change. Share one instance between all
+    workers so they draw from the same limits.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        limiter: Optional[TokenBucketLimiter] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+    ):
+        """Initialize the wrapper.
+
+        Args:
+            provider (LLMProvider): The provider to wrap.
+            limiter (Optional[TokenBucketLimiter], optional): The rate limits.
+                Defaults to None (no limits).
+            concurrency (Optional[AdaptiveConcurrency], optional): The adaptive
+                concurrency limit. Defaults to None (no limit).
+            max_retries (int, optional): The retries per request after the first
+                attempt. Defaults to DEFAULT_MAX_RETRIES.
+            base_delay (float, optional): The base of the exponential backoff,
+                in seconds. Defaults to RETRY_BASE_DELAY.
+            max_delay (float, optional): The longest wait between attempts, in
+                seconds. Defaults to RETRY_MAX_DELAY.
+        """
+        super().__init__(provider.model_name, provider.generation_config)
+        self.name = provider.name
+        self.provider = provider
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.max_attempts = max(0, max_retries) + 1
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def retry_delay(self, attempt: int, error: ProviderError) -> float:
+        """Return how long to wait before the next attempt.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 0.
+            error (ProviderError): The classified error.
+
+        Returns:
+            float: The backend's retry-after hint if any, otherwise a full
+            jitter exponential backoff.
+        """
+        if error.retry_after is not None:
+            return min(error.retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def _acquire(self, prompt: str) -> None:
+        if self.limiter is not None:
+            await self.limiter.acquire(estimate_tokens(prompt))
+        if self.concurrency is not None:
+            await self.concurrency.acquire()
+
+    def _release(self, latency: Optional[float] = None, throttled: bool = False):
+        if throttled:
+            increment("llm_throttled")
+        if self.concurrency is not None:
+            self.concurrency.release(latency, throttled)
+
+    def _charge(self, response: str) -> None:
+        # Output tokens also count against the limit, but are only known now
+        if self.limiter is not None:
+            self.limiter.reserve(estimate_tokens(response), requests=0)
+
+    async def generate(self, prompt: str) -> str:
+        """Generate a response, retrying transient failures.
+
+        Args:
+            prompt (str): The prompt to send.
+
+        Raises:
+            ProviderError: If the error is not retryable or every attempt failed.
+
+        Returns:
+            str: The generated text.
+        """
+        for attempt in range(self.max_attempts):
+            await self._acquire(prompt)
+            start = time.monotonic()
+            latency: Optional[float] = None
+            error: Optional[ProviderError] = None
+            throttled = False
+            # The slot is freed whatever happens, including cancellation
+            try:
+                response = await self.provider.generate(prompt)
+                latency = time.monotonic() - start
+            except Exception as e:
+                error = classify_error(e)
+                throttled = error.throttled or isinstance(e, TimeoutError)
+                if not error.retryable or attempt == self.max_attempts - 1:
+                    if error is e:
+                        raise
+                    raise error from e
+            finally:
+                self._release(latency=latency, throttled=throttled)
+
+            if error is not None:
+                increment("llm_retries")
+                await asyncio.sleep(self.retry_delay(attempt, error))
+                continue
+
+            self._charge(response)
+            return response
+
+        raise ProviderError("No attempt was made")
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the response chunk by chunk, retrying until the first chunk.
+
+        Once a chunk was yielded the request is not retried, since the caller
+        already consumed part of the response.
+
+        Args:
+            prompt (str): The prompt to send.
+
+        Raises:
+            ProviderError: If the error is not retryable or every attempt failed.
+
+        Yields:
+            str: The next chunk of generated text.
+        """
+        for attempt in range(self.max_attempts):
+            await self._acquire(prompt)
+            start = time.monotonic()
+            chunks: list[str] = []
+            latency: Optional[float] = None
+            error: Optional[ProviderError] = None
+            throttled = False
+            # The slot is freed whatever happens, including cancellation and the
+            # caller closing the generator early
+            try:
+                async for chunk in self.provider.stream(prompt):
+                    chunks.append(chunk)
+                    yield chunk
+                latency = time.monotonic() - start
+            except Exception as e:
+                error = classify_error(e)
+                throttled = error.throttled or isinstance(e, TimeoutError)
+                if chunks or not error.retryable or attempt == self.max_attempts - 1:
+                    if error is e:
+                        raise
+                    raise error from e
+            finally:
+                self._release(latency=latency, throttled=throttled)
+
+            if error is not None:
+                increment("llm_retries")
+                await asyncio.sleep(self.retry_delay(attempt, error))
+                continue
+
+            self._charge("".join(chunks))
+            return
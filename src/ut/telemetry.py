@@ -0,0 +1,237 @@
+"""Timing spans and counters of the generation pipeline."""
+import functools
+import json
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, TypeVar, Union
+
+T = TypeVar("T")
+
+QUANTILES = (0.5, 0.95)
+METRIC_PREFIX = "ut"
+METRIC_NAME_PATTERN = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def percentile(values: list[float], quantile: float) -> float:
+    """Return a percentile of values with the nearest-rank method.
+
+    Args:
+        values (list[float]): The values, in any order.
+        quantile (float): The quantile, between 0 and 1.
+
+    Returns:
+        float: The percentile, or 0.0 when there are no values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(quantile * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Telemetry:
+    """Thread-safe collection of stage durations and counters.
+
+    Spans record how long each run of a stage took, e.g. `parse` or `llm`, so
+    the summary can report p50 and p95 latencies; counters add up events such
+    as cache hits or estimated tokens. While disabled, nothing is recorded.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """Initialize an empty collection.
+
+        Args:
+            enabled (bool, optional): Record spans and counters. Defaults to
+                True.
+        """
+        self.enabled = enabled
+        self.spans: dict[str, list[float]] = {}
+        self.counters: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record one run of a stage.
+
+        Args:
+            name (str): The stage name.
+            seconds (float): How long the run took.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.spans.setdefault(name, []).append(seconds)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as one run of a stage.
+
+        The run is recorded even if the block raises.
+
+        Args:
+            name (str): The stage name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add to a counter.
+
+        Args:
+            name (str): The counter name.
+            value (float, optional): The amount to add. Defaults to 1.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self) -> None:
+        """Forget every span and counter."""
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+    def summary(self) -> dict:
+        """Summarize the spans and counters.
+
+        Returns:
+            dict: `spans` maps each stage to its count, total, mean, p50, p95
+            and max in seconds; `counters` maps each counter to its value.
+        """
+        with self._lock:
+            spans = {name: list(values) for name, values in self.spans.items()}
+            counters = dict(self.counters)
+
+        return {
+            "spans": {
+                name: {
+                    "count": len(values),
+                    "total": sum(values),
+                    "mean": sum(values) / len(values),
+                    "p50": percentile(values, 0.5),
+                    "p95": percentile(values, 0.95),
+                    "max": max(values),
+                }
+                for name, values in sorted(spans.items())
+            },
+            "counters": dict(sorted(counters.items())),
+        }
+
+    def write_json(self, path: Union[str, Path]) -> None:
+        """Write the summary as JSON.
+
+        Args:
+            path (Union[str, Path]): The file to write.
+        """
+        Path(path).write_text(
+            json.dumps(self.summary(), indent=2) + "\n", encoding="utf-8"
+        )
+
+    def to_prometheus(self) -> str:
+        """Render the summary in the Prometheus text exposition format.
+
+        Stages become the `stage` label of a `ut_stage_duration_seconds`
+        summary and counters become `ut_<name>_total` counters, so the file can
+        be served as is or pushed by the node exporter textfile collector.
+
+        Returns:
+            str: The metrics text.
+        """
+        with self._lock:
+            spans = {name: list(values) for name, values in self.spans.items()}
+            counters = dict(self.counters)
+
+        metric = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {metric} Duration of the stages of the generation pipeline.",
+            f"# TYPE {metric} summary",
+        ]
+        for name, values in sorted(spans.items()):
+            for quantile in QUANTILES:
+                lines.append(
+                    f'{metric}{{stage="{name}",quantile="{quantile}"}} '
+                    f"{percentile(values, quantile)}"
+                )
+            lines.append(f'{metric}_sum{{stage="{name}"}} {sum(values)}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {len(values)}')
+
+        for name, value in sorted(counters.items()):
+            counter = METRIC_NAME_PATTERN.sub("_", f"{METRIC_PREFIX}_{name}_total")
+            lines.append(f"# TYPE {counter} counter")
+            lines.append(f"{counter} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Union[str, Path]) -> None:
+        """Write the summary in the Prometheus text exposition format.
+
+        Args:
+            path (Union[str, Path]): The file to write.
+        """
+        Path(path).write_text(self.to_prometheus(), encoding="utf-8")
+
+
+# Disabled until a run asks for metrics, so that long-lived processes such as
+# the web server do not accumulate spans forever
+_telemetry = Telemetry(enabled=False)
+
+
+def get_telemetry() -> Telemetry:
+    """Return the process-wide telemetry.
+
+    It records nothing until `enabled` is set, e.g. by a run exporting metrics.
+
+    Returns:
+        Telemetry: The telemetry recorded by the pipeline.
+    """
+    return _telemetry
+
+
+def span(name: str):
+    """Time a block as one run of a stage of the process-wide telemetry.
+
+    Args:
+        name (str): The stage name.
+
+    Returns:
+        ContextManager[None]: The timing context manager.
+    """
+    return _telemetry.span(name)
+
+
+def increment(name: str, value: float = 1) -> None:
+    """Add to a counter of the process-wide telemetry.
+
+    Args:
+        name (str): The counter name.
+        value (float, optional): The amount to add. Defaults to 1.
+    """
+    _telemetry.increment(name, value)
+
+
+def timed(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorate a function so each call is recorded as one run of a stage.
+
+    Args:
+        name (str): The stage name.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> T:
+            with _telemetry.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,9 +1,16 @@
 """Automated Unit Test Generation CLI with AI."""
+import ast
 import os
 import re
+import shutil
+import tempfile
 from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional, Union
 
 from ut.cli.commands.constants import DEF_TEST_STRING
+from ut.telemetry import timed
+
+BLOCK_NAME_PATTERN = re.compile(r"^(?:async\s+def|def|class)\s+(\w+)", re.M)
 
 
 def write_test_file(function_name, test_code, output_dir):
@@ -65,10 +72,156 @@ def postprocess_test_code(
     return test_code.strip()
 
 
+class CodeBlock(NamedTuple):
+    """A top-level statement of a test file and its 1-based line span."""
+
+    name: str
+    code: str
+    span: tuple[int, int]
+
+
+def _is_skipped_import(import_code: str) -> bool:
+    return "from test_" in import_code or "TODO:" in import_code
+
+
+def _is_fixture(node: Union[ast.FunctionDef, ast.AsyncFunctionDef]) -> bool:
+    return any("fixture" in ast.unparse(d) for d in node.decorator_list)
+
+
+def parse_test_code(test_code: str) -> tuple[list[CodeBlock], list[CodeBlock]]:
+    """Find the imports and test blocks of test code in a single AST pass.
+
+    Test blocks are top-level `test_*` functions, `Test*` classes and pytest
+    fixtures, each with its decorators. Their code is sliced from the source,
+    so comments and formatting are preserved. Imports are normalized with
+    `ast.unparse`, which also joins multi-line imports.
+
+    Args:
+        test_code (str): The test code.
+
+    Raises:
+        SyntaxError: If the code does not parse.
+
+    Returns:
+        tuple[list[CodeBlock], list[CodeBlock]]: The import blocks and the test
+        blocks, in source order.
+    """
+    tree = ast.parse(test_code)
+    lines = test_code.splitlines()
+
+    imports = []
+    blocks = []
+    for node in tree.body:
+        start = node.lineno
+        end = node.end_lineno or node.lineno
+
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.append(CodeBlock("", ast.unparse(node), (start, end)))
+            continue
+
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if not (node.name.startswith("test_") or _is_fixture(node)):
+                continue
+        elif isinstance(node, ast.ClassDef):
+            if not node.name.startswith("Test"):
+                continue
+        else:
+            continue
+
+        if node.decorator_list:
+            start = min(d.lineno for d in node.decorator_list)
+        code = "\n".join(lines[start - 1 : end])
+        blocks.append(CodeBlock(node.name, code, (start, end)))
+
+    return imports, blocks
+
+
 def extract_imports_and_functions(test_code: str) -> tuple[set, list]:
     """
     Extract imports and test functions from generated test code.
 
+    The code is parsed with `parse_test_code`; the line-based scanner is
+    only used when it is not valid Python.
+
+    Args:
+        test_code (str): The generated test code.
+
+    Returns:
+        tuple: (set of import statements, list of test function code blocks)
+    """
+    try:
+        import_blocks, test_blocks = parse_test_code(test_code)
+    except SyntaxError:
+        return _extract_imports_and_functions_tolerant(test_code)
+
+    imports = {
+        block.code for block in import_blocks if not _is_skipped_import(block.code)
+    }
+
+    # Remove duplicate blocks (same name), keeping the first definition
+    seen_names = set()
+    functions = []
+    for block in test_blocks:
+        if block.name not in seen_names:
+            seen_names.add(block.name)
+            functions.append(block.code)
+
+    return imports, functions
+
+
+def count_tests(test_functions: list) -> int:
+    """Count the tests in test code blocks.
+
+    Only `test_*` functions and the `test_*` methods of `Test*` classes are
+    counted, as pytest collects them; fixtures are not tests.
+
+    Args:
+        test_functions (list): The code blocks from `extract_imports_and_functions`.
+
+    Returns:
+        int: The number of tests.
+    """
+    count = 0
+    for block in test_functions:
+        try:
+            nodes = ast.parse(block).body
+        except SyntaxError:
+            # Blocks of the line-based scanner are single test functions
+            count += get_test_name(block).startswith("test_")
+            continue
+
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                count += node.name.startswith("test_")
+            elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+                count += sum(
+                    isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+                    and item.name.startswith("test_")
+                    for item in node.body
+                )
+    return count
+
+
+def is_test_block(test_function: str) -> bool:
+    """Check whether a code block is a test function or a test class.
+
+    Args:
+        test_function (str): The code block, possibly starting with decorators.
+
+    Returns:
+        bool: False for fixtures and other helpers.
+    """
+    name = get_test_name(test_function)
+    return name.startswith(("test_", "Test"))
+
+
+def _extract_imports_and_functions_tolerant(test_code: str) -> tuple[set, list]:
+    """
+    Extract imports and test functions from test code that does not parse.
+
+    Line-based scanner splitting on `def test_` and indentation, used as a
+    fallback for truncated or otherwise invalid LLM output.
+
     Args:
         test_code (str): The generated test code.
 
@@ -156,21 +309,7 @@ def extract_imports_and_functions(test_code: str) -> tuple[set, list]:
     return imports, unique_functions
 
 
-def combine_test_code(
-    imports: set, test_functions: list, module_name: str, module_import_path: str
-) -> str:
-    """
-    Combine imports and test functions into a single, well-formatted test file.
-
-    Args:
-        imports: Set of import statements
-        test_functions: List of test function code blocks
-        module_name: Name of the module being tested
-        module_import_path: Import path for the module
-
-    Returns:
-        str: Complete test file content
-    """
+def _format_header(imports: set, module_name: str, module_import_path: str) -> list:
     # Organize imports
     stdlib_imports = []
     third_party_imports = []
@@ -254,6 +393,27 @@ def combine_test_code(
     # Add two blank lines before test functions (PEP 8)
     content_parts.append("")
 
+    return content_parts
+
+
+@timed("combine")
+def combine_test_code(
+    imports: set, test_functions: list, module_name: str, module_import_path: str
+) -> str:
+    """
+    Combine imports and test functions into a single, well-formatted test file.
+
+    Args:
+        imports: Set of import statements
+        test_functions: List of test function code blocks
+        module_name: Name of the module being tested
+        module_import_path: Import path for the module
+
+    Returns:
+        str: Complete test file content
+    """
+    content_parts = _format_header(imports, module_name, module_import_path)
+
     # Add test functions with proper spacing
     for i, func in enumerate(test_functions):
         if i > 0:
@@ -348,6 +508,7 @@ def refine_local_imports(
     return sorted(list(refined))
 
 
+@timed("postprocess")
 def postprocess_test_code_enhanced(
     test_code: str,
     function_name: str,
@@ -420,48 +581,231 @@ def postprocess_test_code_enhanced(
     return "\n".join(cleaned_lines).strip()
 
 
+def _recombine_test_file(
+    test_file_path: Path, existing_content: str, new_imports: set, new_functions: list
+):
+    existing_imports, existing_functions = extract_imports_and_functions(
+        existing_content
+    )
+
+    all_imports = existing_imports.union(new_imports)
+    all_functions = existing_functions + new_functions
+
+    # Get module info from the existing imports
+    module_import_path = None
+    for imp in existing_imports:
+        if "from " in imp and " import " in imp and "pytest" not in imp:
+            module_import_path = imp.split(" import ")[0].replace("from ", "").strip()
+            break
+
+    if not module_import_path:
+        module_import_path = "your_module"  # Fallback
+
+    combined_code = combine_test_code(
+        all_imports,
+        all_functions,
+        test_file_path.stem.replace("test_", ""),
+        module_import_path,
+    )
+
+    with open(test_file_path, "w", encoding="utf-8") as f:
+        f.write(combined_code)
+
+
 def append_test_to_file(test_file_path: Path, test_code: str, function_name: str):
     """Append a test function to an existing test file or create a new one.
 
+    The existing file is parsed once and left as is: missing imports are
+    inserted after its last import and new tests are appended at the end.
+    Tests already defined in the file are not added again. The file is only
+    rebuilt when it does not parse or has no imports.
+
     Args:
         test_file_path (Path): The path to the test file.
         test_code (str): The code of the test function.
         function_name (str): The name of the function being tested.
     """
 
-    if test_file_path.exists():
-        with open(test_file_path, "r", encoding="utf-8") as f:
-            existing_content = f.read()
+    if not test_file_path.exists():
+        with open(test_file_path, "w", encoding="utf-8") as f:
+            f.write(test_code)
+        return
+
+    with open(test_file_path, "r", encoding="utf-8") as f:
+        existing_content = f.read()
+
+    new_imports, new_functions = extract_imports_and_functions(test_code)
 
-        new_imports, new_functions = extract_imports_and_functions(test_code)
-        existing_imports, existing_functions = extract_imports_and_functions(
-            existing_content
+    try:
+        import_blocks, test_blocks = parse_test_code(existing_content)
+    except SyntaxError:
+        import_blocks = []
+
+    if not import_blocks:
+        _recombine_test_file(
+            test_file_path, existing_content, new_imports, new_functions
         )
+        return
 
-        all_imports = existing_imports.union(new_imports)
-        all_functions = existing_functions + new_functions
+    existing_names = {block.name for block in test_blocks}
+    added_imports = sorted(new_imports - {block.code for block in import_blocks})
+    added_functions = [
+        func for func in new_functions if get_test_name(func) not in existing_names
+    ]
 
-        # Get module info from the existing imports
-        module_import_path = None
-        for imp in existing_imports:
-            if "from " in imp and " import " in imp and "pytest" not in imp:
-                module_import_path = (
-                    imp.split(" import ")[0].replace("from ", "").strip()
-                )
-                break
+    appended = "".join(f"\n\n{func.strip()}\n" for func in added_functions)
 
-        if not module_import_path:
-            module_import_path = "your_module"  # Fallback
+    if not added_imports:
+        with open(test_file_path, "a", encoding="utf-8") as f:
+            if not existing_content.endswith("\n"):
+                f.write("\n")
+            f.write(appended)
+        return
 
-        combined_code = combine_test_code(
-            all_imports,
-            all_functions,
-            test_file_path.stem.replace("test_", ""),
-            module_import_path,
-        )
+    lines = existing_content.rstrip("\n").split("\n")
+    insert_at = import_blocks[-1].span[1]
+    lines[insert_at:insert_at] = added_imports
 
-        with open(test_file_path, "w", encoding="utf-8") as f:
-            f.write(combined_code)
-    else:
-        with open(test_file_path, "w", encoding="utf-8") as f:
-            f.write(test_code)
+    with open(test_file_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n" + appended)
+
+
+def get_test_name(test_function: str) -> str:
+    """Return the name of a test function, test class or fixture code block.
+
+    Args:
+        test_function (str): The code block, possibly starting with decorators.
+
+    Returns:
+        str: The block name, or an empty string if none is found.
+    """
+    match = BLOCK_NAME_PATTERN.search(test_function)
+    return match.group(1) if match else ""
+
+
+def merge_test_file(
+    test_file_path: Path,
+    imports: set,
+    test_functions: list,
+    module_name: str,
+    module_import_path: str,
+    removed_tests: set,
+):
+    """Splice test functions into an existing test file.
+
+    Tests listed in `removed_tests` and tests redefined in `test_functions`
+    are dropped from the existing file; every other test is kept as is.
+
+    Args:
+        test_file_path (Path): The path to the existing test file.
+        imports (set): The import statements needed by the new tests.
+        test_functions (list): The new test function code blocks.
+        module_name (str): The name of the module being tested.
+        module_import_path (str): The import path of the module being tested.
+        removed_tests (set): The names of tests to drop from the existing file.
+    """
+    with open(test_file_path, "r", encoding="utf-8") as f:
+        existing_content = f.read()
+
+    existing_imports, existing_functions = extract_imports_and_functions(
+        existing_content
+    )
+
+    new_names = {get_test_name(func) for func in test_functions}
+    dropped = removed_tests | new_names
+    kept_functions = [
+        func for func in existing_functions if get_test_name(func) not in dropped
+    ]
+
+    combined_code = combine_test_code(
+        existing_imports.union(imports),
+        kept_functions + test_functions,
+        module_name,
+        module_import_path,
+    )
+
+    with open(test_file_path, "w", encoding="utf-8") as f:
+        f.write(combined_code)
+
+
+class StreamingTestWriter:
+    """Write a test file incrementally, one block of tests at a time.
+
+    The file is opened on the first `add`, with the header and the imports
+    known so far, and every later block is appended and flushed right away,
+    so the tests survive a crash later in the run. `close` writes the final
+    newline. If later blocks needed imports the header lacks, which is the
+    common case, the import block cannot grow in place: `close` then writes
+    a new header to a temporary file, streams the whole body of tests behind
+    it and replaces the file, i.e. one full sequential copy. The output is
+    the same as `combine_test_code` with all the blocks.
+    """
+
+    def __init__(self, test_file_path: Path, module_name: str, module_import_path: str):
+        """Initialize the writer; nothing is written until the first block.
+
+        Args:
+            test_file_path (Path): The test file to write.
+            module_name (str): The name of the module being tested.
+            module_import_path (str): The import path of the module being tested.
+        """
+        self.test_file_path = test_file_path
+        self.module_name = module_name
+        self.module_import_path = module_import_path
+        self.count = 0
+        self._file: Optional[BinaryIO] = None
+        self._imports: set = set()
+        self._header_imports: set = set()
+        self._body_offset = 0
+
+    def _header(self, imports: set) -> bytes:
+        parts = _format_header(imports, self.module_name, self.module_import_path)
+        return ("\n".join(parts) + "\n").encode("utf-8")
+
+    def add(self, imports: set, test_functions: list) -> None:
+        """Append test functions to the file.
+
+        Args:
+            imports (set): The import statements the functions need.
+            test_functions (list): The test function code blocks.
+        """
+        if self._file is None:
+            self._file = open(self.test_file_path, "wb")
+            self._file.write(self._header(imports))
+            self._header_imports = set(imports)
+            self._body_offset = self._file.tell()
+
+        self._imports.update(imports)
+
+        for func in test_functions:
+            separator = "\n\n\n" if self.count else ""
+            self._file.write(f"{separator}{func}".encode("utf-8"))
+            self.count += 1
+        self._file.flush()
+
+    def close(self) -> None:
+        """Finish the file, rewriting it once if the import block changed."""
+        if self._file is None:
+            return
+
+        self._file.write(b"\n")
+        self._file.close()
+        self._file = None
+
+        if self._imports == self._header_imports:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.test_file_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as dst, open(self.test_file_path, "rb") as src:
+            dst.write(self._header(self._imports))
+            src.seek(self._body_offset)
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, self.test_file_path)
+
+    def __enter__(self) -> "StreamingTestWriter":
+        """Return the writer."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the writer, keeping the tests written so far on errors."""
+        self.close()
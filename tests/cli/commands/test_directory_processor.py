@@ -0,0 +1,151 @@
+"""Tests for directory_processor module."""
+import queue
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from ut.cli.commands.directory_processor import (
+    find_python_files,
+    find_stem_collisions,
+    parse_files,
+    process_directory,
+)
+
+
+def test_find_python_files_skips_tests_and_hidden_dirs(tmp_path):
+    """Test that only source modules are collected."""
+
+    # Arrange
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / ".venv").mkdir()
+    (tmp_path / "module.py").write_text("def a(): pass")
+    (tmp_path / "pkg" / "nested.py").write_text("def b(): pass")
+    (tmp_path / "pkg" / "test_nested.py").write_text("def test_b(): pass")
+    (tmp_path / ".venv" / "lib.py").write_text("def c(): pass")
+
+    # Act
+    recursive = find_python_files(tmp_path, recursive=True)
+    flat = find_python_files(tmp_path, recursive=False)
+
+    # Assert
+    assert recursive == [tmp_path / "module.py", tmp_path / "pkg" / "nested.py"]
+    assert flat == [tmp_path / "module.py"]
+
+
+def test_process_directory_processes_every_file(tmp_path):
+    """Test that every file goes through process_file."""
+
+    # Arrange
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    for name in ("a.py", "b.py", "c.py"):
+        (source_dir / name).write_text("def f(): pass")
+
+    # Act
+    with patch(
+        "ut.cli.commands.directory_processor.process_file", return_value=2
+    ) as mock_process:
+        process_directory(
+            source_dir,
+            tmp_path / "out",
+            recursive=True,
+            mirror_structure=True,
+            verbose=False,
+            dry_run=False,
+            workers=2,
+            max_inflight=1,
+            parse_workers=2,
+        )
+
+    # Assert
+    assert mock_process.call_count == 3
+    processed = {call.args[0].name for call in mock_process.call_args_list}
+    assert processed == {"a.py", "b.py", "c.py"}
+    descriptor = mock_process.call_args_list[0].kwargs["descriptor"]
+    assert descriptor.functions[0].name == "f"
+
+
+def test_parse_files_feeds_descriptors_in_order(tmp_path):
+    """Test that the process pool parses every file and stops each consumer."""
+
+    # Arrange
+    files = []
+    for i in range(5):
+        file_path = tmp_path / f"m{i}.py"
+        file_path.write_text(f"class C{i}:\n    def f{i}(self): pass\n")
+        files.append(file_path)
+    broken = tmp_path / "broken.py"
+    broken.write_text("def broken(:\n")
+    files.append(broken)
+    parsed = queue.Queue(maxsize=2)
+    results = []
+
+    # Act
+    thread = threading.Thread(target=parse_files, args=(files, 2, parsed, 2))
+    thread.start()
+    while True:
+        item = parsed.get()
+        results.append(item)
+        if results.count(None) == 2:
+            break
+    thread.join()
+
+    # Assert
+    descriptors = results[:-2]
+    assert [d.path for d in descriptors] == [str(f) for f in files]
+    assert [d.functions[0].qualname for d in descriptors[:-1]] == [
+        f"C{i}.f{i}" for i in range(5)
+    ]
+    assert descriptors[0].classes[0][0] == "C0"
+    assert descriptors[-1].error
+
+
+def test_process_directory_rejects_stem_collisions_when_flat(tmp_path):
+    """Test that two sources with the same stem cannot share a flat output."""
+
+    # Arrange
+    source_dir = tmp_path / "src"
+    for package in ("a", "b"):
+        (source_dir / package).mkdir(parents=True)
+        (source_dir / package / "utils.py").write_text("def f(): pass")
+
+    # Act
+    with patch("ut.cli.commands.directory_processor.process_file") as mock_process:
+        with pytest.raises(ValueError, match="utils.py"):
+            process_directory(
+                source_dir,
+                tmp_path / "out",
+                recursive=True,
+                mirror_structure=False,
+                verbose=False,
+                dry_run=False,
+                workers=2,
+                max_inflight=1,
+                parse_workers=0,
+            )
+
+    # Assert
+    mock_process.assert_not_called()
+    assert find_stem_collisions([source_dir / "a" / "utils.py"]) == {}
+
+
+def test_parse_files_stops_early(tmp_path):
+    """Test that a stopped run parses nothing more and wakes the workers."""
+
+    # Arrange
+    files = []
+    for i in range(5):
+        file_path = tmp_path / f"m{i}.py"
+        file_path.write_text(f"def f{i}(): pass\n")
+        files.append(file_path)
+    parsed = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    stop.set()
+
+    # Act
+    parse_files(files, 0, parsed, 2, stop)
+
+    # Assert
+    assert parsed.get_nowait() is None
+    assert parsed.empty()
@@ -0,0 +1,422 @@
+"""Tests for file_processor module."""
+import asyncio
+import random
+import re
+
+from ut.cache import ResponseCache
+from ut.cli.commands.file_processor import process_file
+from ut.journal import RunJournal
+from ut.providers import BaseProvider
+
+SOURCE = "\n\n".join(f"def func_{i}(x):\n    return x + {i}" for i in range(8))
+
+
+class _RecordingProvider(BaseProvider):
+    """Provider answering with a test named after the prompted function."""
+
+    def __init__(self):
+        super().__init__("recording", {})
+        self.prompted = []
+
+    async def generate(self, prompt):
+        name = re.search(r"def (func_\d+)", prompt).group(1)
+        self.prompted.append(name)
+        await asyncio.sleep(random.uniform(0, 0.02))
+        return f"def test_{name}():\n    assert {name}(0) is not None\n"
+
+
+def test_process_file_concurrent_matches_serial(tmp_path):
+    """Test that concurrent generation writes the same file as serial mode."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    source_file.write_text(SOURCE)
+    outputs = {}
+
+    # Act
+    for max_inflight in (1, 4):
+        output_dir = tmp_path / f"out_{max_inflight}"
+        calls = process_file(
+            source_file,
+            output_dir,
+            mirror_structure=False,
+            verbose=False,
+            dry_run=False,
+            show_status=False,
+            max_inflight=max_inflight,
+            provider=_RecordingProvider(),
+        )
+        outputs[max_inflight] = (output_dir / "test_module.py").read_text()
+
+        # Assert
+        assert calls == 8
+
+    assert outputs[1] == outputs[4]
+    assert outputs[1].index("test_func_0") < outputs[1].index("test_func_7")
+
+
+def test_process_file_incremental_regenerates_changed_functions(tmp_path):
+    """Test that incremental mode only sends new or changed functions."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    output_dir = tmp_path / "out"
+    source_file.write_text(SOURCE)
+
+    process_file(
+        source_file,
+        output_dir,
+        False,
+        False,
+        False,
+        show_status=False,
+        provider=_RecordingProvider(),
+    )
+
+    changed = SOURCE.replace("return x + 3", "return x - 3").replace(
+        "def func_7(x):\n    return x + 7", "def func_8(x):\n    return x + 8"
+    )
+    source_file.write_text(changed)
+
+    # Act
+    provider = _RecordingProvider()
+    calls = process_file(
+        source_file,
+        output_dir,
+        False,
+        False,
+        False,
+        show_status=False,
+        incremental=True,
+        provider=provider,
+    )
+
+    # Assert
+    test_code = (output_dir / "test_module.py").read_text()
+    prompted = sorted(provider.prompted)
+    assert calls == 2
+    assert prompted == ["func_3", "func_8"]
+    assert "def test_func_0(" in test_code
+    assert "def test_func_3(" in test_code
+    assert "def test_func_8(" in test_code
+    assert "def test_func_7(" not in test_code
+
+
+class _BatchProvider(_RecordingProvider):
+    """Provider answering batch prompts, leaving out the last section."""
+
+    async def generate(self, prompt):
+        names = re.findall(r"# === TESTS FOR: (\w+) ===", prompt)
+        if not names:
+            return await super().generate(prompt)
+
+        self.prompted.append(tuple(names))
+        sections = [
+            f"# === TESTS FOR: {name} ===\n"
+            f"def test_{name}():\n    assert {name}(0) is not None\n"
+            for name in names[:-1]
+        ]
+        return "import pytest\n\n" + "\n".join(sections)
+
+
+def test_process_file_batch_packs_functions(tmp_path):
+    """Test that batching sends fewer requests and keeps every test."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    source_file.write_text(SOURCE)
+    provider = _BatchProvider()
+
+    # Act
+    calls = process_file(
+        source_file,
+        tmp_path / "out",
+        False,
+        False,
+        False,
+        show_status=False,
+        provider=provider,
+        batch=True,
+    )
+
+    # Assert
+    test_code = (tmp_path / "out" / "test_module.py").read_text()
+    assert provider.prompted == [tuple(f"func_{i}" for i in range(8)), "func_7"]
+    assert calls == 2
+    assert "import pytest" in test_code
+    for i in range(8):
+        assert f"def test_func_{i}(" in test_code
+
+
+class _FailingProvider(_RecordingProvider):
+    """Provider failing on one function."""
+
+    async def generate(self, prompt):
+        if "def func_5" in prompt:
+            raise ConnectionError("boom")
+        return await super().generate(prompt)
+
+
+def test_process_file_keeps_tests_when_a_request_fails(tmp_path):
+    """Test that one failed request does not lose the other tests."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    source_file.write_text(SOURCE)
+
+    # Act
+    calls = process_file(
+        source_file,
+        tmp_path / "out",
+        False,
+        False,
+        False,
+        show_status=False,
+        max_inflight=4,
+        provider=_FailingProvider(),
+    )
+
+    # Assert
+    test_code = (tmp_path / "out" / "test_module.py").read_text()
+    assert calls == 7
+    assert "def test_func_5(" not in test_code
+    for i in (0, 4, 6, 7):
+        assert f"def test_func_{i}(" in test_code
+
+
+def test_process_file_resume_retries_only_failed_functions(tmp_path):
+    """Test that resuming serves finished functions from the cache."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    output_dir = tmp_path / "out"
+    source_file.write_text(SOURCE)
+    cache = ResponseCache(str(tmp_path / "cache"))
+
+    journal = RunJournal(output_dir)
+    process_file(
+        source_file,
+        output_dir,
+        False,
+        False,
+        False,
+        show_status=False,
+        cache=cache,
+        provider=_FailingProvider(),
+        journal=journal,
+    )
+    journal.close()
+
+    # Act
+    provider = _RecordingProvider()
+    journal = RunJournal(output_dir, resume=True)
+    calls = process_file(
+        source_file,
+        output_dir,
+        False,
+        False,
+        False,
+        show_status=False,
+        cache=cache,
+        provider=provider,
+        journal=journal,
+    )
+    skipped_calls = process_file(
+        source_file,
+        output_dir,
+        False,
+        False,
+        False,
+        show_status=False,
+        cache=cache,
+        provider=provider,
+        journal=journal,
+    )
+    journal.close()
+
+    # Assert
+    assert calls == 1
+    assert provider.prompted == ["func_5"]
+    assert skipped_calls == 0
+    assert "def test_func_5(" in (output_dir / "test_module.py").read_text()
+
+
+def test_process_file_resume_without_cache_reuses_journal_responses(tmp_path):
+    """Test that resuming without the cache only sends unfinished functions."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    output_dir = tmp_path / "out"
+    source_file.write_text(SOURCE)
+
+    journal = RunJournal(output_dir)
+    process_file(
+        source_file,
+        output_dir,
+        False,
+        False,
+        False,
+        show_status=False,
+        provider=_FailingProvider(),
+        journal=journal,
+    )
+    journal.close()
+    source_file.write_text(SOURCE.replace("return x + 2", "return x * 2"))
+
+    # Act
+    provider = _RecordingProvider()
+    journal = RunJournal(output_dir, resume=True)
+    calls = process_file(
+        source_file,
+        output_dir,
+        False,
+        False,
+        False,
+        show_status=False,
+        provider=provider,
+        journal=journal,
+    )
+    journal.close()
+
+    # Assert
+    test_code = (output_dir / "test_module.py").read_text()
+    assert calls == 2
+    assert sorted(provider.prompted) == ["func_2", "func_5"]
+    assert test_code.count("def test_func_") == 8
+
+
+def test_process_file_incremental_keeps_tests_of_failed_functions(tmp_path):
+    """Test that a failed regeneration keeps the old tests and is retried."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    output_dir = tmp_path / "out"
+    source_file.write_text(SOURCE)
+    process_file(
+        source_file, output_dir, False, False, False, provider=_RecordingProvider()
+    )
+    source_file.write_text(
+        SOURCE.replace("return x + 3", "return x - 3").replace(
+            "return x + 5", "return x - 5"
+        )
+    )
+
+    # Act
+    process_file(
+        source_file,
+        output_dir,
+        False,
+        False,
+        False,
+        incremental=True,
+        provider=_FailingProvider(),
+    )
+    kept_code = (output_dir / "test_module.py").read_text()
+    provider = _RecordingProvider()
+    process_file(
+        source_file,
+        output_dir,
+        False,
+        False,
+        False,
+        incremental=True,
+        provider=provider,
+    )
+
+    # Assert
+    test_code = (output_dir / "test_module.py").read_text()
+    assert "def test_func_5(" in kept_code
+    assert provider.prompted == ["func_5"]
+    assert test_code.count("def test_func_3(") == 1
+    assert test_code.count("def test_func_5(") == 1
+
+
+class _StreamingProvider(_RecordingProvider):
+    """Provider streaming its responses a few characters at a time."""
+
+    async def stream(self, prompt):
+        response = await self.generate(prompt)
+        for i in range(0, len(response), 4):
+            yield response[i : i + 4]
+
+
+def test_process_file_stream_prints_tokens(tmp_path, capsys):
+    """Test that streamed responses are printed live and still written."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    source_file.write_text("def func_0(x):\n    return x\n")
+
+    # Act
+    calls = process_file(
+        source_file,
+        tmp_path / "out",
+        False,
+        False,
+        False,
+        provider=_StreamingProvider(),
+        stream=True,
+    )
+
+    # Assert
+    output = capsys.readouterr().out
+    assert calls == 1
+    assert "assert func_0(0) is not None" in output
+    assert "def test_func_0(" in (tmp_path / "out" / "test_module.py").read_text()
+
+
+class _FixtureProvider(_RecordingProvider):
+    """Provider answering with the same fixture for every function."""
+
+    async def generate(self, prompt):
+        test = await super().generate(prompt)
+        fixture = "@pytest.fixture\ndef value():\n    return 0\n"
+        return f"import pytest\n\n\n{fixture}\n\n{test}"
+
+
+def test_process_file_writes_shared_fixtures_once(tmp_path):
+    """Test that a fixture repeated across responses is written once."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    source_file.write_text(SOURCE)
+
+    # Act
+    process_file(
+        source_file, tmp_path / "out", False, False, False, provider=_FixtureProvider()
+    )
+
+    # Assert
+    test_code = (tmp_path / "out" / "test_module.py").read_text()
+    assert test_code.count("def value(") == 1
+    assert test_code.count("def test_func_") == 8
+
+
+def test_process_file_incremental_keeps_fixtures_still_in_use(tmp_path):
+    """Test that removing a function keeps a fixture its siblings share."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    output_dir = tmp_path / "out"
+    source_file.write_text(SOURCE)
+    process_file(
+        source_file, output_dir, False, False, False, provider=_FixtureProvider()
+    )
+    source_file.write_text(SOURCE.replace("def func_0(x):\n    return x + 0", ""))
+
+    # Act
+    process_file(
+        source_file,
+        output_dir,
+        False,
+        False,
+        False,
+        incremental=True,
+        provider=_FixtureProvider(),
+    )
+
+    # Assert
+    test_code = (output_dir / "test_module.py").read_text()
+    assert "def test_func_0(" not in test_code
+    assert test_code.count("def value(") == 1
+    assert test_code.count("def test_func_") == 7
@@ -1,7 +1,9 @@
 """Tests for generate module."""
+import json
 from unittest.mock import patch
 
 from ut.cli.commands.generate import generate
+from ut.telemetry import get_telemetry, increment, span
 
 
 def test_generate_happy_path_file(tmp_path):
@@ -26,8 +28,92 @@ def test_generate_happy_path_file(tmp_path):
             verbose=True,
             dry_run=False,
             mirror_structure=True,
+            clean=True,
         )
 
     # Assert
     mock_process.assert_called_once()
-    mock_clean.assert_called()
+    mock_clean.assert_called_once_with(tmp_path.resolve(), True)
+
+
+def _generate_file(source_file, output_dir, process=None, **options):
+    # The typer.Option defaults are truthy OptionInfo objects when the command
+    # is called directly, so every one of them is passed explicitly.
+    with patch("ut.cli.commands.generate.typer.confirm", return_value=True), patch(
+        "ut.cli.commands.generate.process_file", side_effect=process
+    ), patch("ut.cli.commands.generate.console"), patch(
+        "ut.cli.commands.generate.clean_temp_files"
+    ) as mock_clean:
+        generate(
+            file_path=source_file,
+            output_dir=str(output_dir),
+            recursive=True,
+            verbose=False,
+            dry_run=False,
+            mirror_structure=True,
+            **options,
+        )
+    return mock_clean
+
+
+def test_generate_does_not_clean_by_default(tmp_path):
+    """Test that temporary files are only cleaned with --clean."""
+
+    # Arrange
+    source_file = tmp_path / "my_test_module.py"
+    source_file.write_text("def hello(): pass")
+
+    # Act
+    mock_clean = _generate_file(source_file, tmp_path)
+
+    # Assert
+    mock_clean.assert_not_called()
+
+
+def test_generate_cleans_with_clean_option(tmp_path):
+    """Test that --clean removes the temporary files of the output directory."""
+
+    # Arrange
+    source_file = tmp_path / "my_test_module.py"
+    source_file.write_text("def hello(): pass")
+
+    # Act
+    mock_clean = _generate_file(source_file, tmp_path, clean=True)
+
+    # Assert
+    mock_clean.assert_called_once_with(tmp_path.resolve(), False)
+
+
+def _process_with_telemetry(*args, **kwargs):
+    with span("llm"):
+        increment("cache_hits", 2)
+
+
+def test_generate_writes_metrics(tmp_path):
+    """Test that --metrics-json and --metrics-prom dump the run telemetry."""
+
+    # Arrange
+    source_file = tmp_path / "my_test_module.py"
+    source_file.write_text("def hello(): pass")
+    metrics_json = tmp_path / "metrics.json"
+    metrics_prom = tmp_path / "metrics.prom"
+
+    # Act
+    _generate_file(
+        source_file,
+        tmp_path / "out",
+        process=_process_with_telemetry,
+        metrics_json=str(metrics_json),
+        metrics_prom=str(metrics_prom),
+    )
+    _process_with_telemetry()
+
+    # Assert
+    metrics = json.loads(metrics_json.read_text())
+    prom = metrics_prom.read_text()
+    assert metrics["spans"]["llm"]["count"] == 1
+    assert metrics["counters"] == {"cache_hits": 2}
+    assert 'ut_stage_duration_seconds_count{stage="llm"} 1' in prom
+    assert "ut_cache_hits_total 2" in prom
+    assert not get_telemetry().enabled
+    assert get_telemetry().summary()["counters"] == {"cache_hits": 2}
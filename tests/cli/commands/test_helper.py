@@ -0,0 +1,37 @@
+"""Tests for helper module."""
+from ut.cli.commands.helper import clean_temp_files
+
+
+def test_clean_temp_files_single_walk(tmp_path):
+    """Test that caches are removed and protected directories are skipped."""
+
+    # Arrange
+    (tmp_path / "pkg" / "__pycache__").mkdir(parents=True)
+    (tmp_path / "pkg" / "__pycache__" / "m.cpython-311.pyc").write_text("")
+    (tmp_path / "pkg" / "stray.pyc").write_text("")
+    (tmp_path / "pkg" / "test_m.py").write_text("")
+    (tmp_path / ".pytest_cache").mkdir()
+    (tmp_path / "ut.egg-info").mkdir()
+    (tmp_path / ".coverage").write_text("")
+    (tmp_path / ".git" / "objects").mkdir(parents=True)
+    (tmp_path / ".git" / "objects" / "x.pyc").write_text("")
+    (tmp_path / "env" / "lib").mkdir(parents=True)
+    (tmp_path / "env" / "pyvenv.cfg").write_text("")
+    (tmp_path / "env" / "lib" / "y.pyc").write_text("")
+
+    # Act
+    removed = clean_temp_files(tmp_path, verbose=False)
+
+    # Assert
+    assert removed == 5
+    assert sorted(p.name for p in tmp_path.rglob("*")) == [
+        ".git",
+        "env",
+        "lib",
+        "objects",
+        "pkg",
+        "pyvenv.cfg",
+        "test_m.py",
+        "x.pyc",
+        "y.pyc",
+    ]
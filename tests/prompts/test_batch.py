@@ -0,0 +1,45 @@
+"""Tests for batch module."""
+from ut.prompts.batch import plan_batches, section_marker, split_batch_response
+
+
+def test_plan_batches_respects_size_and_budget():
+    """Test that batches are cut by size, budget and duplicate names."""
+
+    # Arrange
+    functions = [{"qualname": f"f{i}", "function_code": "x" * 40} for i in range(5)] + [
+        {"qualname": "f4", "function_code": "x" * 40}
+    ]
+
+    # Act
+    by_size = plan_batches(functions, overhead_tokens=0, token_budget=0, max_size=2)
+    by_budget = plan_batches(functions, overhead_tokens=10, token_budget=60)
+
+    # Assert
+    assert [len(batch) for batch in by_size] == [2, 2, 1, 1]
+    assert [len(batch) for batch in by_budget] == [3, 2, 1]
+
+
+def test_split_batch_response_shares_preamble_imports():
+    """Test that each section gets the imports written before the markers."""
+
+    # Arrange
+    response = "\n".join(
+        [
+            "import pytest",
+            section_marker("add"),
+            "def test_add():\n    assert add(1, 1) == 2",
+            section_marker("other"),
+            "def test_other(): pass",
+            section_marker("sub"),
+            "def test_sub():\n    assert sub(1, 1) == 0",
+        ]
+    )
+
+    # Act
+    sections = split_batch_response(response, ["add", "sub", "mul"])
+
+    # Assert
+    assert set(sections) == {"add", "sub"}
+    assert sections["add"].startswith("import pytest")
+    assert "test_add" in sections["add"] and "test_sub" not in sections["add"]
+    assert split_batch_response("def test_x(): pass", ["x"]) == {}
@@ -0,0 +1,63 @@
+"""Tests for context module."""
+from ut.prompts.context import estimate_tokens, prune_class_context
+
+CLASS_CODE = '''class Account:
+    """A bank account."""
+
+    rate = 0.01
+
+    def __init__(self, balance):
+        self.balance = balance
+
+    def deposit(self, amount):
+        """Add money."""
+        self._check(amount)
+        return self.balance + amount
+
+    def _check(self, amount):
+        """Validate an amount."""
+        if amount < 0:
+            raise ValueError("negative")
+
+    def report(self):
+        """Build a long report."""
+        lines = []
+        for i in range(100):
+            lines.append(str(i))
+        return lines
+'''
+
+
+def test_prune_class_context_keeps_target_and_references():
+    """Test that unreferenced siblings are reduced to signature and docstring."""
+
+    # Act
+    context = prune_class_context(CLASS_CODE, "deposit")
+
+    # Assert
+    assert "return self.balance + amount" in context
+    assert "raise ValueError('negative')" in context
+    assert "self.balance = balance" in context
+    assert "rate = 0.01" in context
+    assert "def report(self):" in context
+    assert "Build a long report." in context
+    assert "lines.append" not in context
+
+
+def test_prune_class_context_fits_budget():
+    """Test that the context shrinks to the budget but keeps the target method."""
+
+    # Act
+    context = prune_class_context(CLASS_CODE, "deposit", token_budget=60)
+
+    # Assert
+    assert estimate_tokens(context) <= 60
+    assert "return self.balance + amount" in context
+    assert "raise ValueError" not in context
+
+
+def test_prune_class_context_returns_unknown_method_unchanged():
+    """Test that the class is left untouched if the method is not found."""
+
+    # Act / Assert
+    assert prune_class_context(CLASS_CODE, "missing") == CLASS_CODE
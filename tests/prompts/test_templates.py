@@ -0,0 +1,46 @@
+"""Tests for templates module."""
+import pytest
+
+from ut.prompts.templates import (
+    CLASS_TEMPLATE,
+    STANDALONE_TEMPLATE,
+    PromptTemplate,
+    PromptTemplateError,
+    TemplateRegistry,
+)
+
+
+def test_render_substitutes_in_a_single_pass():
+    """Test that inserted values are never substituted again."""
+
+    # Arrange
+    template = PromptTemplate("t", "A {{a}} B {{b}} C {{a}}")
+
+    # Act
+    rendered = template.render(a="{{b}}", b="x")
+
+    # Assert
+    assert rendered == "A {{b}} B x C {{b}}"
+    with pytest.raises(PromptTemplateError):
+        template.render(a="1")
+
+
+def test_registry_prefers_user_templates_and_validates_them(tmp_path):
+    """Test the user override, the built-in fallback and the validation."""
+
+    # Arrange
+    (tmp_path / STANDALONE_TEMPLATE).write_text("Test {{function_code}}")
+    registry = TemplateRegistry(str(tmp_path))
+
+    # Act
+    registry.preload()
+
+    # Assert
+    assert registry.get(STANDALONE_TEMPLATE).render(function_code="f") == "Test f"
+    assert "parent_class_code" in registry.get(CLASS_TEMPLATE).placeholders
+
+    (tmp_path / STANDALONE_TEMPLATE).write_text("Test {{unknown}}")
+    with pytest.raises(PromptTemplateError):
+        TemplateRegistry(str(tmp_path)).preload()
+    with pytest.raises(PromptTemplateError):
+        TemplateRegistry(str(tmp_path / "missing")).preload()
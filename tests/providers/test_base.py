@@ -0,0 +1,49 @@
+"""Tests for the provider base implementation."""
+import asyncio
+
+from ut.providers import FakeProvider, LLMProvider
+
+
+def test_generate_many_keeps_order_and_bounds_concurrency():
+    """Test that responses follow prompt order with at most N requests open."""
+
+    # Arrange
+    provider = FakeProvider(latency=0.01)
+    prompts = [f"def func_{i}(x): pass" for i in range(12)]
+    inflight = {"current": 0, "peak": 0}
+    generate = provider.generate
+
+    async def tracked(prompt):
+        inflight["current"] += 1
+        inflight["peak"] = max(inflight["peak"], inflight["current"])
+        try:
+            return await generate(prompt)
+        finally:
+            inflight["current"] -= 1
+
+    provider.generate = tracked
+
+    # Act
+    responses = asyncio.run(provider.generate_many(prompts, max_concurrency=3))
+
+    # Assert
+    assert isinstance(provider, LLMProvider)
+    assert inflight["peak"] == 3
+    assert responses == [FakeProvider.make_response(p) for p in prompts]
+
+
+def test_stream_yields_the_full_response():
+    """Test that joining the streamed chunks gives the complete response."""
+
+    # Arrange
+    provider = FakeProvider(latency=0, chunks=5)
+
+    async def collect():
+        return [chunk async for chunk in provider.stream("def convert(x): pass")]
+
+    # Act
+    chunks = asyncio.run(collect())
+
+    # Assert
+    assert len(chunks) > 1
+    assert "".join(chunks) == FakeProvider.make_response("def convert(x): pass")
@@ -0,0 +1,179 @@
+"""Tests for resilience module."""
+import asyncio
+import io
+import time
+import urllib.error
+
+import pytest
+
+from ut.providers import (
+    AdaptiveConcurrency,
+    BaseProvider,
+    ProviderError,
+    ResilientProvider,
+    TokenBucketLimiter,
+    classify_error,
+)
+
+
+class _FlakyProvider(BaseProvider):
+    """Provider failing with the given errors before answering."""
+
+    name = "flaky"
+
+    def __init__(self, errors):
+        super().__init__("flaky-model", {"temperature": 0})
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"answer to {prompt}"
+
+
+def _http_error(code, retry_after=None):
+    headers = {"Retry-After": retry_after} if retry_after else {}
+    return urllib.error.HTTPError("http://llm", code, "error", headers, io.BytesIO())
+
+
+def test_classify_error_reads_status_and_retry_after():
+    """Test that throttling and server errors are retryable, client errors not."""
+
+    # Arrange
+    throttled = _http_error(429, retry_after="7")
+    bad_request = _http_error(400)
+
+    # Act
+    throttled_error = classify_error(throttled)
+    bad_request_error = classify_error(bad_request)
+    timeout_error = classify_error(TimeoutError("timed out"))
+
+    # Assert
+    assert throttled_error.retryable and throttled_error.throttled
+    assert throttled_error.retry_after == 7
+    assert not bad_request_error.retryable
+    assert timeout_error.retryable and timeout_error.retry_after is None
+
+
+def test_resilient_provider_retries_transient_errors():
+    """Test that transient errors are retried and others raised at once."""
+
+    # Arrange
+    flaky = _FlakyProvider([_http_error(429, retry_after="0"), TimeoutError()])
+    broken = _FlakyProvider([_http_error(400)])
+    concurrency = AdaptiveConcurrency(4)
+
+    # Act
+    response = asyncio.run(
+        ResilientProvider(flaky, concurrency=concurrency, base_delay=0).generate("x")
+    )
+    with pytest.raises(ProviderError) as error:
+        asyncio.run(ResilientProvider(broken, base_delay=0).generate("x"))
+
+    # Assert
+    assert response == "answer to x"
+    assert flaky.calls == 3
+    assert broken.calls == 1
+    assert not error.value.retryable
+    assert concurrency.inflight == 0
+    assert concurrency.limit < 4
+
+
+def test_resilient_provider_gives_up_after_max_retries():
+    """Test that the last error is raised once every retry failed."""
+
+    # Arrange
+    provider = _FlakyProvider([TimeoutError()] * 5)
+    resilient = ResilientProvider(provider, max_retries=2, base_delay=0)
+
+    # Act
+    with pytest.raises(ProviderError) as error:
+        asyncio.run(resilient.generate("x"))
+
+    # Assert
+    assert isinstance(error.value.__cause__, TimeoutError)
+    assert provider.calls == 3
+    assert resilient.name == "flaky"
+    assert resilient.model_name == "flaky-model"
+
+
+class _SlowProvider(BaseProvider):
+    """Provider that never finishes its response."""
+
+    name = "slow"
+
+    def __init__(self):
+        super().__init__("slow-model", {})
+
+    async def generate(self, prompt):
+        await asyncio.sleep(60)
+        return prompt
+
+    async def stream(self, prompt):
+        yield "first"
+        await asyncio.sleep(60)
+        yield "never"
+
+
+def test_resilient_provider_releases_slot_when_interrupted():
+    """Test that cancelled requests and closed streams free their slot."""
+
+    # Arrange
+    concurrency = AdaptiveConcurrency(2)
+    resilient = ResilientProvider(_SlowProvider(), concurrency=concurrency)
+
+    async def read_first_chunk():
+        chunks = resilient.stream("x")
+        first = await chunks.__anext__()
+        await chunks.aclose()
+        return first
+
+    # Act
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(resilient.generate("x"), timeout=0.01))
+    first = asyncio.run(read_first_chunk())
+
+    # Assert
+    assert first == "first"
+    assert concurrency.inflight == 0
+    assert concurrency.limit == 2
+
+
+def test_token_bucket_limiter_spaces_requests():
+    """Test that requests beyond the bucket wait for it to refill."""
+
+    # Arrange
+    limiter = TokenBucketLimiter(requests_per_minute=600)  # one every 0.1 s
+    limiter.reserve(requests=600)
+
+    # Act
+    start = time.monotonic()
+    asyncio.run(limiter.acquire())
+    elapsed = time.monotonic() - start
+
+    # Assert
+    assert elapsed >= 0.09
+    assert TokenBucketLimiter().reserve(tokens=10**6) == 0
+
+
+def test_adaptive_concurrency_grows_and_shrinks():
+    """Test that fast successes raise the limit and slow ones lower it."""
+
+    # Arrange
+    concurrency = AdaptiveConcurrency(8, initial=2)
+
+    # Act
+    for _ in range(4):
+        assert concurrency.try_acquire()
+        concurrency.release(latency=0.1)
+    grown = concurrency.limit
+    for _ in range(20):
+        assert concurrency.try_acquire()
+        concurrency.release(latency=10)
+
+    # Assert
+    assert grown > 2
+    assert concurrency.limit < grown
+    assert concurrency.limit >= concurrency.minimum
@@ -0,0 +1,69 @@
+"""Tests for cache module."""
+import os
+
+from ut.cache import ResponseCache
+
+
+def test_make_key_depends_on_model_and_config():
+    """Test that the key changes with any part of the request."""
+
+    # Arrange
+    config = {"temperature": 0.3}
+
+    # Act
+    key = ResponseCache.make_key("prompt", "model-a", config)
+
+    # Assert
+    assert key == ResponseCache.make_key("prompt", "model-a", dict(config))
+    assert key != ResponseCache.make_key("prompt", "model-b", config)
+    assert key != ResponseCache.make_key("prompt", "model-a", {"temperature": 0.5})
+    assert key != ResponseCache.make_key("other", "model-a", config)
+
+
+def test_get_returns_stored_response_unless_refreshing(tmp_path):
+    """Test the hit, miss and refresh paths."""
+
+    # Arrange
+    cache = ResponseCache(str(tmp_path))
+    cache.put("ab12", "def test_x(): pass")
+
+    # Act / Assert
+    assert cache.get("ab12") == "def test_x(): pass"
+    assert cache.get("cd34") is None
+    assert ResponseCache(str(tmp_path), refresh=True).get("ab12") is None
+
+
+def test_put_evicts_least_recently_used_entries(tmp_path):
+    """Test that the size limit evicts the oldest entries first."""
+
+    # Arrange
+    cache = ResponseCache(str(tmp_path), max_bytes=25)
+    cache.put("aa01", "x" * 10)
+    cache.put("bb02", "y" * 10)
+    os.utime(cache._path("aa01"), (0, 0))
+    os.utime(cache._path("bb02"), (1, 1))
+    cache.get("aa01")
+
+    # Act
+    cache.put("cc03", "z" * 10)
+
+    # Assert
+    assert cache.get("aa01") == "x" * 10
+    assert cache.get("bb02") is None
+    assert cache.get("cc03") == "z" * 10
+
+
+def test_put_overwriting_an_entry_keeps_the_size_exact(tmp_path):
+    """Test that refreshing an entry does not count its old size twice."""
+
+    # Arrange
+    cache = ResponseCache(str(tmp_path), max_bytes=100)
+    cache.put("aa01", "x" * 10)
+    cache.put("bb02", "y" * 10)
+
+    # Act
+    cache.put("bb02", "z" * 20)
+
+    # Assert
+    assert cache._size == 30
+    assert cache._size == cache._scan_size()
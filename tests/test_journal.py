@@ -0,0 +1,43 @@
+"""Tests for journal module."""
+from ut.journal import JOURNAL_FILE_NAME, RunJournal
+
+
+def test_resume_replays_completed_files(tmp_path):
+    """Test that only unchanged, completed files with an output are done."""
+
+    # Arrange
+    source = tmp_path / "module.py"
+    source.write_text("def f(): pass")
+    output = tmp_path / "out" / "test_module.py"
+    failed = tmp_path / "failed.py"
+    failed.write_text("def g(): pass")
+
+    journal = RunJournal(tmp_path / "out")
+    journal.record_function(source, "f", "abc", "def test_f(): pass", fingerprint="v1")
+    journal.record_file(source, output)
+    journal.record_file(failed, error=ValueError("quota"))
+    journal.close()
+    with open(tmp_path / "out" / JOURNAL_FILE_NAME, "a") as f:
+        f.write('{"type": "file", "fi')
+
+    # Act
+    output.write_text("def test_f(): pass")
+    resumed = RunJournal(tmp_path / "out", resume=True)
+
+    # Assert
+    assert resumed.is_file_done(source)
+    assert not resumed.is_file_done(failed)
+    assert set(resumed.files) == {str(source), str(failed)}
+    assert resumed.completed_function(source, "f", "v1") == (
+        "def test_f(): pass",
+        "abc",
+    )
+    assert resumed.completed_function(source, "f", "v2") is None
+
+    source.write_text("def f(): return 1")
+    assert not resumed.is_file_done(source)
+    resumed.close()
+
+    fresh = RunJournal(tmp_path / "out")
+    assert not fresh.files
+    fresh.close()
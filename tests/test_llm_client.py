@@ -0,0 +1,23 @@
+"""Tests for llm_client module."""
+from unittest.mock import MagicMock, patch
+
+from ut.llm_client import GeminiClient
+
+
+def test_gemini_client_configures_model_once():
+    """Test that the SDK setup is paid on the first call only."""
+
+    # Arrange
+    genai = MagicMock()
+    genai.GenerativeModel.return_value.generate_content.return_value.text = "code"
+    client = GeminiClient(model_name="some-model", api_key="key")
+
+    # Act
+    with patch("ut.llm_client._get_genai", return_value=genai):
+        results = [client.generate("prompt") for _ in range(3)]
+
+    # Assert
+    assert results == ["code"] * 3
+    genai.configure.assert_called_once_with(api_key="key")
+    genai.GenerativeModel.assert_called_once()
+    assert genai.GenerativeModel.call_args.args == ("some-model",)
@@ -0,0 +1,67 @@
+"""Tests for parser module."""
+from ut.parser import source_code_analysis
+
+SOURCE = '''import os
+from typing import Optional
+
+
+def top(x):
+    def inner():
+        return x
+
+    return inner
+
+
+class Outer:
+    """Outer class."""
+
+    def method(self):
+        return os.getcwd()
+
+    async def fetch(self) -> Optional[str]:
+        return None
+
+    class Inner:
+        def deep(self):
+            import json
+
+            def helper():
+                class Local:
+                    def hidden(self):
+                        return json
+
+                return Local
+
+            return helper
+'''
+
+
+def test_source_code_analysis_single_pass(tmp_path):
+    """Test that every function is reported once, in source order, with its scope."""
+
+    # Arrange
+    source_file = tmp_path / "module.py"
+    source_file.write_text(SOURCE, encoding="utf-8")
+
+    # Act
+    imports_code, functions = source_code_analysis(str(source_file))
+
+    # Assert
+    assert imports_code == "import os\nfrom typing import Optional\nimport json"
+    assert [f["qualname"] for f in functions] == [
+        "top",
+        "Outer.method",
+        "Outer.fetch",
+        "Outer.Inner.deep",
+    ]
+
+    by_name = {f["qualname"]: f for f in functions}
+    assert "def inner():" in by_name["top"]["function_code"]
+    assert by_name["Outer.fetch"]["is_async"] is True
+    assert by_name["Outer.fetch"]["function_code"].startswith("async def fetch")
+    assert by_name["Outer.method"]["class_name"] == "Outer"
+    assert by_name["Outer.Inner.deep"]["class_name"] == "Inner"
+    assert (
+        by_name["Outer.method"]["parent_class_code"]
+        is by_name["Outer.fetch"]["parent_class_code"]
+    )
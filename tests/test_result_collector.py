@@ -0,0 +1,44 @@
+"""Tests for result_collector module."""
+from types import SimpleNamespace
+
+from result_collector import ResultCollector, build_report
+
+
+def _report(nodeid, when, outcome, duration=0.1, longreprtext=""):
+    return SimpleNamespace(
+        nodeid=nodeid,
+        when=when,
+        outcome=outcome,
+        duration=duration,
+        longreprtext=longreprtext,
+        failed=outcome == "failed",
+        skipped=outcome == "skipped",
+    )
+
+
+def test_result_collector_counts_teardown_error_once():
+    """Test that a passed call followed by a teardown error is one error."""
+
+    # Arrange
+    collector = ResultCollector()
+    phases = [
+        _report("test_a.py::test_ok", "setup", "passed"),
+        _report("test_a.py::test_ok", "call", "passed"),
+        _report("test_a.py::test_ok", "teardown", "passed"),
+        _report("test_a.py::test_broken", "setup", "passed"),
+        _report("test_a.py::test_broken", "call", "passed"),
+        _report("test_a.py::test_broken", "teardown", "failed", 0.2, "boom"),
+    ]
+
+    # Act
+    for report in phases:
+        collector.pytest_runtest_logreport(report)
+    result = build_report(collector.tests)
+
+    # Assert
+    assert [(t["name"], t["outcome"]) for t in collector.tests] == [
+        ("test_ok", "passed"),
+        ("test_broken", "error"),
+    ]
+    assert collector.tests[1]["message"] == "boom"
+    assert (result["total"], result["passed"], result["errors"]) == (2, 1, 1)
@@ -0,0 +1,59 @@
+"""Tests for telemetry module."""
+import json
+
+import pytest
+
+from ut.telemetry import Telemetry, get_telemetry, percentile, timed
+
+
+def test_summary_reports_percentiles_and_counters(tmp_path):
+    """Test that spans are summarized with p50/p95 and counters add up."""
+
+    # Arrange
+    telemetry = Telemetry()
+    for seconds in range(1, 101):
+        telemetry.record("llm", seconds / 100)
+    telemetry.increment("cache_hits")
+    telemetry.increment("cache_hits", 2)
+    metrics_file = tmp_path / "metrics.json"
+
+    # Act
+    with pytest.raises(ValueError), telemetry.span("parse"):
+        raise ValueError("recorded anyway")
+    telemetry.write_json(metrics_file)
+    summary = json.loads(metrics_file.read_text())
+
+    # Assert
+    assert summary["spans"]["llm"]["count"] == 100
+    assert summary["spans"]["llm"]["p50"] == 0.5
+    assert summary["spans"]["llm"]["p95"] == 0.95
+    assert summary["spans"]["parse"]["count"] == 1
+    assert summary["counters"] == {"cache_hits": 3}
+    assert percentile([], 0.5) == 0.0
+
+
+def test_prometheus_export_and_timed_decorator():
+    """Test the Prometheus text format of stages recorded by `timed`."""
+
+    # Arrange
+    telemetry = get_telemetry()
+    telemetry.reset()
+    telemetry.enabled = True
+
+    @timed("postprocess")
+    def postprocess(code):
+        return code.strip()
+
+    # Act
+    result = postprocess("  code  ")
+    telemetry.increment("gemini.prompt_tokens", 12)
+    text = telemetry.to_prometheus()
+    telemetry.enabled = False
+    telemetry.reset()
+
+    # Assert
+    assert result == "code"
+    assert "# TYPE ut_stage_duration_seconds summary" in text
+    assert 'ut_stage_duration_seconds{stage="postprocess",quantile="0.95"}' in text
+    assert 'ut_stage_duration_seconds_count{stage="postprocess"} 1' in text
+    assert "ut_gemini_prompt_tokens_total 12" in text
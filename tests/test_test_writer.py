@@ -0,0 +1,140 @@
+"""Tests for test_writer module."""
+from ut.test_writer import (
+    StreamingTestWriter,
+    append_test_to_file,
+    combine_test_code,
+    count_tests,
+    extract_imports_and_functions,
+    is_test_block,
+)
+
+TEST_CODE = """from mymod import (
+    add,
+    sub,
+)
+import pytest
+
+
+@pytest.fixture
+def numbers():
+    return [1, 2]
+
+
+def helper():
+    return 3
+
+
+class TestAdd:
+    def test_positive(self, numbers):
+        assert add(*numbers) == 3
+
+
+@pytest.mark.parametrize("x", [1, 2])
+def test_sub(x):
+    def inner():
+        return x
+
+    # Same value
+    assert sub(inner(), x) == 0
+
+
+def test_sub(x):
+    assert False
+"""
+
+
+def test_extract_imports_and_functions_uses_ast():
+    """Test classes, fixtures, multi-line imports and nested helpers."""
+
+    # Act
+    imports, functions = extract_imports_and_functions(TEST_CODE)
+
+    # Assert
+    assert imports == {"from mymod import add, sub", "import pytest"}
+    assert [f.split("\n")[0] for f in functions] == [
+        "@pytest.fixture",
+        "class TestAdd:",
+        '@pytest.mark.parametrize("x", [1, 2])',
+    ]
+    assert "    def inner():" in functions[2]
+    assert "# Same value" in functions[2]
+
+
+def test_count_tests_skips_fixtures():
+    """Test that only test functions and test class methods are counted."""
+
+    # Arrange
+    _, functions = extract_imports_and_functions(TEST_CODE)
+
+    # Act
+    count = count_tests(functions)
+
+    # Assert
+    assert count == 2
+    assert [is_test_block(f) for f in functions] == [False, True, True]
+    assert count_tests(["def test_cut(:\n    assert True"]) == 1
+
+
+def test_extract_imports_and_functions_falls_back_on_syntax_error():
+    """Test that invalid code goes through the tolerant scanner."""
+
+    # Arrange
+    broken = "import pytest\n\ndef test_ok():\n    assert True\n\ndef test_cut(:\n"
+
+    # Act
+    imports, functions = extract_imports_and_functions(broken)
+
+    # Assert
+    assert imports == {"import pytest"}
+    assert functions[0].startswith("def test_ok():")
+
+
+def test_append_test_to_file_splices_imports_and_tests(tmp_path):
+    """Test that new imports and tests are added without rewriting the rest."""
+
+    # Arrange
+    test_file = tmp_path / "test_mymod.py"
+    test_file.write_text(
+        '"""Tests for mymod module."""\nimport pytest\n\n\n'
+        "def test_a():\n    # keep me\n    assert True\n"
+    )
+
+    # Act
+    append_test_to_file(
+        test_file,
+        "import os\n\ndef test_a():\n    pass\n\ndef test_b():\n    assert os.sep\n",
+        "b",
+    )
+
+    # Assert
+    assert test_file.read_text() == (
+        '"""Tests for mymod module."""\nimport pytest\nimport os\n\n\n'
+        "def test_a():\n    # keep me\n    assert True\n\n\n"
+        "def test_b():\n    assert os.sep\n"
+    )
+
+
+def test_streaming_writer_matches_combine_test_code(tmp_path):
+    """Test that streamed tests end up identical to a combined file."""
+
+    # Arrange
+    test_file = tmp_path / "test_mymod.py"
+    blocks = [
+        ({"from mymod import add"}, ["def test_add():\n    assert add(1, 1) == 2"]),
+        ({"import os", "from mymod import sub"}, ["def test_sub():\n    assert os"]),
+    ]
+
+    # Act
+    with StreamingTestWriter(test_file, "mymod", "mymod") as writer:
+        writer.add(*blocks[0])
+        partial = test_file.read_text()
+        writer.add(*blocks[1])
+
+    # Assert
+    assert "def test_add():" in partial
+    assert test_file.read_text() == combine_test_code(
+        blocks[0][0] | blocks[1][0],
+        blocks[0][1] + blocks[1][1],
+        "mymod",
+        "mymod",
+    )
@@ -1,13 +1,21 @@
 """Interface Web pour le Générateur de Tests Unitaires IA."""
+import json
 import os
 import sys
+import threading
+import time
+import uuid
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context, url_for
 from werkzeug.utils import secure_filename
 import subprocess
 import tempfile
 import shutil
 
+from job_queue import FINISHED_STATUSES, JobQueue, QueueFullError
+from pytest_pool import get_pytest_pool
+from result_collector import public_report
+
 # Ajouter le src au path pour imports directs
 project_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.join(project_dir, 'src'))
@@ -27,6 +35,12 @@ app.config['OUTPUT_FOLDER'] = output_folder
 
 ALLOWED_EXTENSIONS = {'py'}
 
+# File de tâches : base SQLite (survit aux redémarrages) et taille du pool
+JOB_DB_PATH = os.path.join(project_dir, 'web_jobs.sqlite3')
+JOB_WORKERS = 2
+JOB_EVENTS_POLL_INTERVAL = 0.5
+PYTEST_TIMEOUT = 30
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -104,9 +118,121 @@ def index():
     return render_template('index.html')
 
 
+def run_upload_job(payload, emit):
+    """
+    Génère et exécute les tests d'un fichier uploadé (exécuté par la file de tâches).
+
+    Args:
+        payload: {'filename', 'filepath', 'job_dir'} enregistrés par /upload
+        emit: Publie un événement de progression (étape, données)
+
+    Returns:
+        Résultat JSON affiché par l'interface
+    """
+    filename = payload['filename']
+    filepath = payload['filepath']
+
+    # Un dossier par tâche : deux uploads du même nom ne s'écrasent pas
+    # (les tâches d'avant ce découpage n'ont pas de job_dir)
+    job_dir = payload.get('job_dir', '')
+    output_dir = job_output_dir(job_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Import direct des modules
+    from ut.cli.commands.file_processor import process_file
+    from ut.providers import get_default_provider
+
+    print(f"🔧 Génération en cours...")
+    emit('generating', {'message': 'Génération des tests par l\'IA'})
+
+    # Appeler directement la fonction de traitement
+    try:
+        process_file(
+            file_path=Path(filepath),  # Convertir en Path
+            output_base=Path(output_dir),  # Convertir en Path
+            mirror_structure=False,
+            verbose=False,
+            dry_run=False,  # Ne pas faire de simulation
+            show_status=False,  # Pas de spinner Rich hors du thread principal
+            provider=get_default_provider()  # Client Gemini partagé entre les requêtes
+        )
+        print(f"✅ Génération terminée")
+    except Exception as gen_error:
+        print(f"❌ Erreur génération: {gen_error}")
+        raise RuntimeError(f'Erreur lors de la génération: {gen_error}') from gen_error
+
+    # Lire le fichier de tests généré
+    test_filename = f"test_{filename}"
+    test_filepath = os.path.join(output_dir, test_filename)
+
+    if not os.path.exists(test_filepath):
+        raise RuntimeError('Fichier de tests non généré: le fichier test n\'a pas été créé dans ut_output/')
+
+    # Corriger automatiquement les imports manquants
+    emit('fixing_imports', {'message': 'Correction des imports'})
+    fix_test_imports(test_filepath, filename)
+
+    with open(test_filepath, 'r', encoding='utf-8') as f:
+        test_content = f.read()
+
+    # Exécuter les tests sur un worker pytest déjà démarré
+    emit('testing', {'message': 'Exécution de pytest'})
+    pytest_result = get_pytest_pool().run(test_filepath, cwd=project_dir, timeout=PYTEST_TIMEOUT)
+    if pytest_result['timed_out']:
+        raise RuntimeError('Timeout - exécution des tests trop longue')
+
+    passed = pytest_result['passed']
+    failed = pytest_result['failed'] + pytest_result['errors']
+    total = passed + failed
+
+    return {
+        'success': True,
+        'filename': filename,
+        'test_filename': test_filename,
+        'download_url': f"/download/{job_dir}/{test_filename}" if job_dir else f"/download/{test_filename}",
+        'test_content': test_content,
+        'stats': {
+            'total': total,
+            'passed': passed,
+            'failed': failed
+        },
+        'pytest_output': pytest_result['output'],
+        'test_report': public_report(pytest_result)
+    }
+
+
+def job_output_dir(job_dir):
+    """Dossier des tests générés pour une tâche."""
+    return os.path.join(project_dir, 'ut_output', job_dir)
+
+
+def remove_job_files(payload):
+    """Supprime l'upload et les tests d'une tâche purgée de la file."""
+    job_dir = payload.get('job_dir')
+    if job_dir:
+        shutil.rmtree(os.path.join(app.config['UPLOAD_FOLDER'], job_dir), ignore_errors=True)
+        shutil.rmtree(job_output_dir(job_dir), ignore_errors=True)
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Retourne la file de tâches du serveur, créée (et reprise) au premier appel."""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(
+                    JOB_DB_PATH, run_upload_job, workers=JOB_WORKERS, on_purge=remove_job_files
+                )
+    return _job_queue
+
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    """Upload et génération de tests."""
+    """Upload du fichier et mise en file de la génération de tests."""
     if 'file' not in request.files:
         return jsonify({'error': 'Aucun fichier fourni'}), 400
     
@@ -121,96 +247,87 @@ def upload_file():
     try:
         # Sauvegarder le fichier uploadé
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        job_dir = uuid.uuid4().hex
+        os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], job_dir))
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], job_dir, filename)
         file.save(filepath)
         
         print(f"📁 Fichier sauvegardé: {filepath}")
         
-        # Générer les tests directement via Python (sans subprocess/Rich)
-        project_dir = os.path.dirname(os.path.abspath(__file__))
-        output_dir = os.path.join(project_dir, 'ut_output')
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Import direct des modules
-        from ut.cli.commands.file_processor import process_file
-        
-        print(f"🔧 Génération en cours...")
-        
-        # Appeler directement la fonction de traitement
-        try:
-            result_info = process_file(
-                file_path=Path(filepath),  # Convertir en Path
-                output_base=Path(output_dir),  # Convertir en Path
-                mirror_structure=False,
-                verbose=False,
-                dry_run=False  # Ne pas faire de simulation
-            )
-            print(f"✅ Génération terminée")
-        except Exception as gen_error:
-            print(f"❌ Erreur génération: {gen_error}")
-            return jsonify({
-                'error': 'Erreur lors de la génération',
-                'details': str(gen_error)
-            }), 500
-        
-        # Lire le fichier de tests généré
-        test_filename = f"test_{filename}"
-        test_filepath = os.path.join(output_dir, test_filename)
-        
-        if not os.path.exists(test_filepath):
-            return jsonify({
-                'error': 'Fichier de tests non généré',
-                'details': 'Le fichier test n\'a pas été créé dans ut_output/'
-            }), 500
-        
-        # Corriger automatiquement les imports manquants
-        fix_test_imports(test_filepath, filename)
-        
-        with open(test_filepath, 'r', encoding='utf-8') as f:
-            test_content = f.read()
-        
-        # Exécuter les tests
-        pytest_result = subprocess.run(
-            ['python', '-m', 'pytest', test_filepath, '-v', '--tb=short'],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=project_dir
-        )
-        
-        # Compter les tests
-        import re
-        passed_match = re.search(r'(\d+) passed', pytest_result.stdout)
-        failed_match = re.search(r'(\d+) failed', pytest_result.stdout)
-        
-        passed = int(passed_match.group(1)) if passed_match else 0
-        failed = int(failed_match.group(1)) if failed_match else 0
-        total = passed + failed
-        
-        return jsonify({
-            'success': True,
-            'filename': filename,
-            'test_filename': test_filename,
-            'test_content': test_content,
-            'stats': {
-                'total': total,
-                'passed': passed,
-                'failed': failed
-            },
-            'pytest_output': pytest_result.stdout
-        })
-        
-    except subprocess.TimeoutExpired:
-        return jsonify({'error': 'Timeout - génération trop longue'}), 500
+        # La génération et pytest tournent en arrière-plan : on répond tout de suite
+        job_id = get_job_queue().submit({'filename': filename, 'filepath': filepath, 'job_dir': job_dir})
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': f'Erreur: {str(e)}'}), 500
 
+    status_url = url_for('job_status', job_id=job_id)
+    response = jsonify({
+        'job_id': job_id,
+        'status_url': status_url,
+        'events_url': url_for('job_events', job_id=job_id)
+    })
+    response.headers['Location'] = status_url
+    return response, 202
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """État d'une tâche et son résultat une fois terminée."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Tâche inconnue'}), 404
+    job.pop('payload')
+    return jsonify(job)
+
+
+def sse_event(data, event=None, event_id=None):
+    """Formate un message Server-Sent Events."""
+    message = f"id: {event_id}\n" if event_id is not None else ""
+    message += f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Diffuse la progression d'une tâche (Server-Sent Events), étape par étape."""
+    queue = get_job_queue()
+    if queue.get(job_id) is None:
+        return jsonify({'error': 'Tâche inconnue'}), 404
+
+    # Reprise après reconnexion du navigateur : EventSource renvoie Last-Event-ID
+    last_id = request.headers.get('Last-Event-ID', '0')
+    last_id = int(last_id) if last_id.isdigit() else 0
+
+    def events():
+        nonlocal last_id
+        while True:
+            for event in queue.events(job_id, last_id):
+                last_id = event['id']
+                yield sse_event(event['data'], event['stage'], event['id'])
+
+            job = queue.get(job_id)
+            if job is None:
+                # Tâche purgée pendant le flux : ses événements ont disparu avec elle
+                yield sse_event({'status': 'purged'}, 'end')
+                return
+            if job['status'] in FINISHED_STATUSES and not queue.events(job_id, last_id):
+                yield sse_event({'status': job['status']}, 'end')
+                return
+            time.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 
 @app.route('/download/<filename>')
-def download_file(filename):
+@app.route('/download/<job_dir>/<filename>')
+def download_file(filename, job_dir=''):
     """Télécharger le fichier de tests généré."""
-    project_dir = os.path.dirname(os.path.abspath(__file__))
-    filepath = os.path.join(project_dir, 'ut_output', secure_filename(filename))
+    filepath = os.path.join(job_output_dir(secure_filename(job_dir)), secure_filename(filename))
     if os.path.exists(filepath):
         return send_file(filepath, as_attachment=True)
     return jsonify({'error': 'Fichier non trouvé'}), 404
@@ -231,6 +348,10 @@ if __name__ == '__main__':
     print("🚀 Démarrage du serveur web...")
     print("📱 Interface disponible sur: http://127.0.0.1:5000")
     print("⚠️  Utilisez Ctrl+C pour arrêter")
+
+    # Démarrer les workers pytest, puis reprendre les tâches interrompues
+    get_pytest_pool()
+    get_job_queue()
     
     # Mode production pour éviter les rechargements
     app.run(
@@ -1,17 +1,22 @@
 """Interface Web DÉMO - Utilise les tests pré-générés (sans appel Gemini)."""
 import os
 import sys
+import copy
 import json
 import re
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
 from werkzeug.utils import secure_filename
 import subprocess
 import shutil
 
+from pytest_pool import get_pytest_pool
+from result_collector import build_report, declared_tests, parse_junit_xml, public_report
+from analysis_store import get_analysis_store
+
 # Import Ollama client
 try:
-    from ollama_client import OllamaClient, get_ai_client
+    from ollama_client import OllamaClient, get_ai_client, get_client
     OLLAMA_AVAILABLE = True
 except ImportError:
     OLLAMA_AVAILABLE = False
@@ -19,6 +24,7 @@ except ImportError:
 # Import Code Analyzer pour analyse dynamique
 try:
     from code_analyzer import CodeAnalyzer, analyze_code
+    from analysis_cache import analyzer_version, get_analysis_cache
     CODE_ANALYZER_AVAILABLE = True
     print("✅ CodeAnalyzer dynamique chargé")
 except ImportError:
@@ -34,25 +40,17 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0  # Pas de cache pour les fichiers st
 project_dir = os.path.dirname(os.path.abspath(__file__))
 upload_folder = os.path.join(project_dir, 'web_uploads')
 output_folder = os.path.join(project_dir, 'ut_output')
-bug_analysis_folder = os.path.join(project_dir, 'bug_analysis')
-test_complexity_folder = os.path.join(project_dir, 'test_complexity')
-security_analysis_folder = os.path.join(project_dir, 'security_analysis')
-coverage_prediction_folder = os.path.join(project_dir, 'coverage_prediction')
-performance_analysis_folder = os.path.join(project_dir, 'performance_analysis')
-code_smells_folder = os.path.join(project_dir, 'code_smells')
+# Rapports JUnit XML (TEST-<nom>.xml) produits par mvn test ou jest-junit
+junit_reports_folder = os.path.join(output_folder, 'junit_reports')
 os.makedirs(upload_folder, exist_ok=True)
 os.makedirs(output_folder, exist_ok=True)
-os.makedirs(bug_analysis_folder, exist_ok=True)
-os.makedirs(test_complexity_folder, exist_ok=True)
-os.makedirs(security_analysis_folder, exist_ok=True)
-os.makedirs(coverage_prediction_folder, exist_ok=True)
-os.makedirs(performance_analysis_folder, exist_ok=True)
-os.makedirs(code_smells_folder, exist_ok=True)
 
 app.config['UPLOAD_FOLDER'] = upload_folder
 app.config['OUTPUT_FOLDER'] = output_folder
 
 ALLOWED_EXTENSIONS = {'py', 'ts', 'java', 'js'}
+PYTEST_TIMEOUT = 30
+LANGUAGE_NAMES = {'java': 'Java', 'ts': 'TypeScript', 'js': 'JavaScript'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -60,148 +58,95 @@ def allowed_file(filename):
 # Initialiser le client Ollama avec phi (déjà installé)
 ollama_client = None
 if OLLAMA_AVAILABLE:
-    from ollama_client import OllamaClient
-    ollama_client = OllamaClient(model="phi")
+    ollama_client = get_client(model="phi")
     print("✅ Client Ollama initialisé (modèle: phi)")
     print("💡 Pour un meilleur modèle code: ollama pull codellama OU ollama pull deepseek-coder")
 else:
     print("❌ Ollama non disponible - TOUTES les analyses nécessitent Ollama !")
 
-def get_base_filename(filename):
-    """Retourne le nom de base du fichier pour chercher les analyses."""
-    # Pour .ts: user.service.ts -> user_service_ts
-    # Pour .java: Calculator.java -> Calculator_java
-    # Pour .py: calculator.py -> calculator
-    base_name = filename.rsplit('.', 1)[0]
-    extension = filename.rsplit('.', 1)[1].lower()
-    
-    if extension == 'ts':
-        # Remplacer les points par des underscores pour TypeScript
-        return base_name.replace('.', '_') + '_ts'
-    elif extension == 'java':
-        return base_name + '_java'
-    else:  # Python
-        return base_name
-
-
-def load_bug_analysis(filename):
-    """Charge l'analyse de bugs pré-générée pour un fichier."""
-    base_filename = get_base_filename(filename)
-    bug_file = os.path.join(bug_analysis_folder, f"{base_filename}_bugs.json")
-    
-    if os.path.exists(bug_file):
-        with open(bug_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    # Retour par défaut si pas d'analyse
-    return {
-        "score": 90,
-        "bugs": [],
-        "strengths": ["Code bien structuré", "Pas de problème majeur détecté"],
-        "improvements": ["Continue le bon travail !"]
+# Analyses par défaut, pour les catégories absentes de la base
+DEFAULT_ANALYSES = {
+    'bug_analysis': {
+        'score': 85,
+        'issues': [],
+        'strengths': ['✅ Analyse par défaut'],
+        'suggestions': ['Installer CodeAnalyzer pour analyse complète']
+    },
+    'security_analysis': {
+        'score': 85,
+        'vulnerabilities': [],
+        'secure_points': ['✅ Analyse par défaut'],
+        'recommendations': ['Installer CodeAnalyzer']
+    },
+    'test_complexity': {
+        'score': 80,
+        'cyclomatic': 1.0,
+        'maintainability': 80,
+        'duplication': 5
+    },
+    'coverage_prediction': {
+        'score': 75,
+        'estimated_coverage': 75,
+        'uncovered_lines': 0,
+        'missing_tests': 0,
+        'strengths': ['Analyse par défaut']
+    },
+    'performance_analysis': {
+        'score': 80,
+        'level': 'Bon',
+        'bottlenecks': [],
+        'complexity': 'O(n)',
+        'strengths': ['Analyse par défaut']
+    },
+    'code_smells': {
+        'score': 80,
+        'level': 'Bon',
+        'smells': [],
+        'lines_per_function': 10,
+        'strengths': ['Analyse par défaut']
     }
+}
 
 
-def load_test_complexity(filename):
-    """Charge l'analyse de complexité des tests pré-générée pour un fichier."""
-    base_filename = get_base_filename(filename)
-    complexity_file = os.path.join(test_complexity_folder, f"{base_filename}_complexity.json")
-    
-    if os.path.exists(complexity_file):
-        with open(complexity_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    # Retour par défaut si pas d'analyse
-    return {
-        "score": 85,
-        "complexity": {
-            "cyclomatic": 2.0,
-            "cognitive": 1.8,
-            "maintainability": 85
-        },
-        "metrics": {
-            "total_tests": 0,
-            "avg_lines_per_test": 5,
-            "avg_assertions_per_test": 2,
-            "duplication_rate": 10
-        },
-        "strengths": ["Tests bien structurés"],
-        "opportunities": ["Aucune amélioration critique nécessaire"],
-        "quality_indicators": {
-            "readability": "Bonne",
-            "maintainability": "Bonne",
-            "complexity": "Simple"
-        }
-    }
-
+def load_analyses(filename, source_code=None):
+    """
+    Charge les six analyses d'un fichier depuis la base d'analyses, en une lecture.
 
-def load_security_analysis(filename):
-    """Charge l'analyse de sécurité pré-générée pour un fichier."""
-    base_filename = get_base_filename(filename)
-    security_file = os.path.join(security_analysis_folder, f"{base_filename}_security.json")
-    
-    if os.path.exists(security_file):
-        with open(security_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
+    Cherche d'abord par contenu (analyses faites par `analysis_store.py analyze`),
+    puis par nom (anciens dossiers migrés par `analysis_store.py import-legacy`) ;
+    les catégories manquantes prennent les valeurs par défaut.
+    """
+    stored = get_analysis_store().lookup(filename, source_code)
     return {
-        "score": 90,
-        "risk_level": "Low",
-        "vulnerabilities": [],
-        "strengths": ["Pas de vulnérabilité critique détectée"],
-        "recommendations": []
+        category: stored.get(category) or copy.deepcopy(default)
+        for category, default in DEFAULT_ANALYSES.items()
     }
 
 
-def load_coverage_prediction(filename):
-    """Charge la prédiction de couverture pour un fichier."""
-    base_filename = get_base_filename(filename)
-    coverage_file = os.path.join(coverage_prediction_folder, f"{base_filename}_coverage.json")
-    
-    if os.path.exists(coverage_file):
-        with open(coverage_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    return {
-        "coverage_score": 85,
-        "estimated_coverage": 90,
-        "uncovered_lines": [],
-        "missing_tests": [],
-        "strengths": ["Bonne couverture globale"]
-    }
+def stored_analysis(filename, source_code, tests_generated):
+    """
+    Résultat complet d'`analyze_all` tiré de la base d'analyses, ou None.
 
+    Sert les fichiers analysés hors ligne (`analysis_store.py analyze`) sans
+    relancer CodeAnalyzer : seulement si les six catégories viennent de la
+    version actuelle de l'analyseur, avec le même nombre de tests pour la
+    couverture. Les analyses migrées, connues par nom seulement, sont ignorées.
+    """
+    stored = get_analysis_store().lookup(
+        filename, source_code, analyzer_version(), include_legacy=False
+    )
+    if set(stored) != set(DEFAULT_ANALYSES):
+        return None
+    if stored['coverage_prediction'].get('tests_generated') != tests_generated:
+        return None
 
-def load_performance_analysis(filename):
-    """Charge l'analyse de performance pour un fichier."""
-    base_filename = get_base_filename(filename)
-    performance_file = os.path.join(performance_analysis_folder, f"{base_filename}_performance.json")
-    
-    if os.path.exists(performance_file):
-        with open(performance_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
+    # Les compteurs ne sont pas enregistrés : ce sont de simples regex
+    analyzer = CodeAnalyzer(source_code, filename)
     return {
-        "score": 85,
-        "performance_level": "Good",
-        "bottlenecks": [],
-        "strengths": ["Pas de problème de performance majeur"]
-    }
-
-
-def load_code_smells(filename):
-    """Charge l'analyse des code smells pour un fichier."""
-    base_filename = get_base_filename(filename)
-    smells_file = os.path.join(code_smells_folder, f"{base_filename}_smells.json")
-    
-    if os.path.exists(smells_file):
-        with open(smells_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    return {
-        "score": 85,
-        "quality_level": "Good",
-        "smells": [],
-        "strengths": ["Code bien structuré"]
+        **stored,
+        'functions_count': analyzer.count_functions(),
+        'classes_count': analyzer.count_classes(),
+        'tests_generated': tests_generated
     }
 
 
@@ -358,11 +303,14 @@ def upload_file():
         print(f"🔬 Analyse dynamique IA pour {filename}...")
         
         if CODE_ANALYZER_AVAILABLE:
-            # Utiliser l'analyseur dynamique
-            analyzer = CodeAnalyzer(source_content, filename, use_ai=False)
-            
+            # Analyses faites hors ligne d'abord, sinon l'analyseur dynamique,
+            # mémoïsé par contenu (re-uploads instantanés)
             # Passer le nombre de tests générés pour un calcul de coverage HONNÊTE
-            analysis_results = analyzer.analyze_all(tests_generated=tests_generated)
+            analysis_results = stored_analysis(filename, source_content, tests_generated)
+            if analysis_results is None:
+                analysis_results = get_analysis_cache().analyze(
+                    source_content, filename, tests_generated=tests_generated
+                )
             
             # Extraire les résultats
             bug_analysis = analysis_results['bug_analysis']
@@ -376,52 +324,15 @@ def upload_file():
             
             print(f"✅ Analyse dynamique terminée - Score bugs: {bug_analysis['score']}, Sécurité: {security_analysis['score']}")
         else:
-            # Fallback: Analyses par défaut
-            print(f"⚠️ CodeAnalyzer non disponible, utilisation des valeurs par défaut")
-            bug_analysis = {
-                'score': 85,
-                'issues': [],
-                'strengths': ['✅ Analyse par défaut'],
-                'suggestions': ['Installer CodeAnalyzer pour analyse complète']
-            }
-            
-            security_analysis = {
-                'score': 85,
-                'vulnerabilities': [],
-                'secure_points': ['✅ Analyse par défaut'],
-                'recommendations': ['Installer CodeAnalyzer']
-            }
-            
-            test_complexity = {
-                'score': 80,
-                'cyclomatic': 1.0,
-                'maintainability': 80,
-                'duplication': 5
-            }
-            
-            coverage_prediction = {
-                'score': 75,
-                'estimated_coverage': 75,
-                'uncovered_lines': 0,
-                'missing_tests': 0,
-                'strengths': ['Analyse par défaut']
-            }
-            
-            performance_analysis = {
-                'score': 80,
-                'level': 'Bon',
-                'bottlenecks': [],
-                'complexity': 'O(n)',
-                'strengths': ['Analyse par défaut']
-            }
-            
-            code_smells = {
-                'score': 80,
-                'level': 'Bon',
-                'smells': [],
-                'lines_per_function': 10,
-                'strengths': ['Analyse par défaut']
-            }
+            # Fallback: analyses pré-calculées de la base (une seule lecture), sinon valeurs par défaut
+            print(f"⚠️ CodeAnalyzer non disponible, utilisation des analyses enregistrées")
+            analyses = load_analyses(filename, source_content)
+            bug_analysis = analyses['bug_analysis']
+            test_complexity = analyses['test_complexity']
+            security_analysis = analyses['security_analysis']
+            coverage_prediction = analyses['coverage_prediction']
+            performance_analysis = analyses['performance_analysis']
+            code_smells = analyses['code_smells']
             
             functions_count = len(re.findall(r'(def |function |public |private )\w+\s*\(', source_content))
             classes_count = len(re.findall(r'class\s+\w+', source_content)) or 1
@@ -435,57 +346,34 @@ def upload_file():
         
         print(f"✅ Analyses dynamiques terminées pour {filename}!")
         
-        # Exécuter les tests selon le langage
+        # Exécuter les tests selon le langage : un rapport structuré dans tous les cas
         if extension == 'py':
-            # Python: utiliser pytest
-            test_result = subprocess.run(
-                ['python', '-m', 'pytest', test_filepath, '-v', '--tb=short'],
-                capture_output=True,
-                text=True,
-                timeout=30,
-                cwd=project_dir
+            # Python: pytest sur un worker déjà démarré (pas de nouvel interpréteur)
+            test_result = get_pytest_pool().run(test_filepath, cwd=project_dir, timeout=PYTEST_TIMEOUT)
+            if test_result['timed_out']:
+                return jsonify({'error': 'Timeout - exécution trop longue'}), 500
+            pytest_output = test_result['output']
+        else:
+            # Java / TS / JS : rapport JUnit XML s'il a été produit (mvn test, jest-junit),
+            # sinon simulation à partir des tests déclarés dans le fichier
+            runner = 'JUnit' if extension == 'java' else 'Jest'
+            junit_path = os.path.join(junit_reports_folder, f"TEST-{base_filename}.xml")
+            if os.path.exists(junit_path):
+                test_result = build_report(parse_junit_xml(junit_path))
+                header = f"📄 Rapport {runner} : {junit_path}"
+            else:
+                test_result = build_report(declared_tests(test_content, extension, test_filename), simulated=True)
+                header = f"✅ MODE DÉMO {LANGUAGE_NAMES[extension]}\n\nTests {runner} simulés pour {test_filename}"
+            pytest_output = (
+                f"{header}\n\n"
+                f"Tests run: {test_result['total']}, Failures: {test_result['failed']}, "
+                f"Errors: {test_result['errors']}, Skipped: {test_result['skipped']}\n"
+                f"Finished in {test_result['duration']:.3f} seconds"
             )
-            pytest_output = test_result.stdout + test_result.stderr
-        elif extension == 'ts':
-            # TypeScript: simulation (pas de vraie exécution en mode démo)
-            pytest_output = f"✅ MODE DÉMO TypeScript\n\nTests Jest simulés pour {test_filename}\n\n13 specs, 0 failures\nFinished in 0.234 seconds"
-            test_result = type('obj', (object,), {'stdout': pytest_output, 'returncode': 0})()
-        elif extension == 'java':
-            # Java: Compter VRAIS tests pour simulation
-            real_test_count = test_content.count('@Test')
-            pytest_output = f"✅ MODE DÉMO Java\n\nTests JUnit simulés pour {test_filename}\n\nTests run: {real_test_count}, Failures: 0, Errors: 0, Skipped: 0\n\nBUILD SUCCESS"
-            test_result = type('obj', (object,), {'stdout': pytest_output, 'returncode': 0})()
-        elif extension == 'js':
-            # JavaScript: simulation (pas de vraie exécution en mode démo)
-            real_test_count = test_content.count("it('") + test_content.count('it("') + test_content.count('test(')
-            pytest_output = f"✅ MODE DÉMO JavaScript\n\nTests Jest simulés pour {test_filename}\n\n{real_test_count} specs, 0 failures\nFinished in 0.189 seconds"
-            test_result = type('obj', (object,), {'stdout': pytest_output, 'returncode': 0})()
         
         # Compter les tests
-        if extension == 'py':
-            passed_match = re.search(r'(\d+) passed', test_result.stdout)
-            failed_match = re.search(r'(\d+) failed', test_result.stdout)
-            passed = int(passed_match.group(1)) if passed_match else 0
-            failed = int(failed_match.group(1)) if failed_match else 0
-        elif extension == 'ts':
-            # Compter les tests dans le fichier .spec.ts
-            test_count = test_content.count("it('") + test_content.count('it("')
-            passed = test_count if test_count > 0 else 2
-            failed = 0
-        elif extension == 'java':
-            # Compter les @Test dans le fichier Java (CORRECTION : vrai nombre)
-            test_count = test_content.count('@Test')
-            passed = test_count
-            failed = 0
-        elif extension == 'js':
-            # Compter les tests dans le fichier .test.js
-            test_count = test_content.count("it('") + test_content.count('it("') + test_content.count('test(')
-            passed = test_count if test_count > 0 else 2
-            failed = 0
-        else:
-            # Fallback pour autres extensions
-            passed = 0
-            failed = 0
+        passed = test_result['passed']
+        failed = test_result['failed'] + test_result['errors']
         
         total = passed + failed
         
@@ -511,7 +399,8 @@ def upload_file():
                 'passed': passed,
                 'failed': failed
             },
-            'pytest_output': pytest_output
+            'pytest_output': pytest_output,
+            'test_report': public_report(test_result)
         })
         
     except subprocess.TimeoutExpired:
@@ -684,6 +573,69 @@ def ai_edge_cases():
         }), 500
 
 
+# Actions diffusables en SSE → (méthode du client Ollama, champ JSON contenant le code)
+STREAM_ACTIONS = {
+    'explain': ('explain_code', 'code'),
+    'detect-bugs': ('detect_bugs', 'code'),
+    'improve-tests': ('improve_tests', 'test_code'),
+    'edge-cases': ('add_edge_cases', 'code'),
+}
+
+
+def sse_event(data, event=None):
+    """Formate un message Server-Sent Events."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+@app.route('/ai/stream/<action>', methods=['POST'])
+def ai_stream(action):
+    """Diffuse la réponse d'Ollama token par token (Server-Sent Events)."""
+    if not OLLAMA_AVAILABLE:
+        return jsonify({
+            'success': False,
+            'error': '❌ Ollama non disponible'
+        }), 400
+    
+    if action not in STREAM_ACTIONS:
+        return jsonify({'success': False, 'error': f'Action inconnue: {action}'}), 404
+    
+    method_name, code_field = STREAM_ACTIONS[action]
+    data = request.json or {}
+    code = data.get(code_field, '')
+    language = data.get('language', 'java')
+    
+    if not code:
+        return jsonify({'success': False, 'error': 'Code vide'}), 400
+    
+    # Client configuré du module (modèle choisi au démarrage), sans message à chaque appel
+    client = ollama_client
+    if client is None or not client.available:
+        return jsonify({
+            'success': False,
+            'error': '❌ Ollama non lancé'
+        }), 503
+    
+    def events():
+        tokens = getattr(client, method_name)(code, language, stream=True)
+        try:
+            yield sse_event({'model': client.model}, 'start')
+            for token in tokens:
+                yield sse_event({'token': token})
+            yield sse_event({}, 'done')
+        except Exception as e:
+            yield sse_event({'error': f'Erreur: {str(e)}'}, 'error')
+        finally:
+            # Client déconnecté ou fin normale : libérer la connexion Ollama
+            tokens.close()
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/ai/status', methods=['GET'])
 def ai_status():
     """Vérifie le statut d'Ollama."""
@@ -813,6 +765,9 @@ if __name__ == '__main__':
     print("\n🛑 Ctrl+C pour arrêter")
     print("=" * 70)
     
+    # Démarrer les workers pytest avant la première requête
+    get_pytest_pool()
+    
     app.run(
         debug=True,  # Mode debug pour voir les erreurs
         host='0.0.0.0',  # Permet localhost ET 127.0.0.1